@@ -0,0 +1,266 @@
+"""
+Ingest and query benchmark suite over synthetic logs.
+
+For each format and size it generates a DataFlash .bin, a .tlog and/or a PX4 .ulg with the given
+message mix, parses it the way an upload is parsed (parse_log_file_into_database, in a
+fresh process so peak RSS belongs to that run alone), records the per-stage timings
+reported by parse_and_store_log, and times a fixed set of representative queries against
+the stored database. Results are written as JSON; with --baseline, every metric is
+compared against an earlier result file and the run fails on regressions.
+
+Usage (from src/chatbot-backend):
+    python -m benchmarks.bench_ingest --formats bin tlog ulg --sizes-mb 20 100 --output bench_ingest.json
+    python -m benchmarks.bench_ingest --sizes-mb 20 --bin-rates IMU=400,GPS=10 --baseline bench_ingest.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.synthetic_logs import (DATAFLASH_MESSAGE_RATES, TLOG_MESSAGE_RATES, ULOG_MESSAGE_RATES, write_dataflash_log,
+                                      write_tlog, write_ulog)
+
+RESULT_FORMAT_VERSION = 1
+
+# Representative chat queries per format: counts, time-window statistics, downsampling,
+# grouped segments, an ASOF join between message types and the precomputed summary.
+# {t0} and {t1} bound the middle tenth of the log.
+QUERIES = {
+    "bin": {
+        "row_count": "SELECT count(*) FROM IMU",
+        "time_window_stats": "SELECT min(AccZ), max(AccZ), avg(AccZ), stddev(AccZ) FROM IMU WHERE time_us BETWEEN {t0} AND {t1}",
+        "per_second_downsample": "SELECT time_us // 1000000 AS s, avg(Alt) AS alt FROM BARO GROUP BY s ORDER BY s",
+        "vibration_peaks": "SELECT max(VibeX), max(VibeY), max(VibeZ), sum(Clip) FROM VIBE",
+        "mode_segments": "SELECT Mode, min(time_us), max(time_us), count(*) FROM MODE GROUP BY Mode ORDER BY 2",
+        "asof_join": "SELECT count(*), avg(a.Roll) FROM GPS g ASOF JOIN ATT a ON g.time_us >= a.time_us",
+        "battery_drop": "SELECT arg_min(Volt, time_us) - arg_max(Volt, time_us), max(Curr) FROM BAT",
+        "flight_summary": "SELECT * FROM flight_summary",
+    },
+    "tlog": {
+        "row_count": "SELECT count(*) FROM RAW_IMU",
+        "time_window_stats": "SELECT min(zacc), max(zacc), avg(zacc), stddev(zacc) FROM RAW_IMU WHERE time_us BETWEEN {t0} AND {t1}",
+        "per_second_downsample": "SELECT time_us // 1000000 AS s, avg(relative_alt) AS alt FROM GLOBAL_POSITION_INT GROUP BY s ORDER BY s",
+        "vibration_peaks": "SELECT max(vibration_x), max(vibration_y), max(vibration_z), sum(clipping_0) FROM VIBRATION",
+        "mode_segments": "SELECT custom_mode, min(time_us), max(time_us), count(*) FROM HEARTBEAT GROUP BY custom_mode ORDER BY 2",
+        "asof_join": "SELECT count(*), avg(a.roll) FROM GPS_RAW_INT g ASOF JOIN ATTITUDE a ON g.time_us >= a.time_us",
+        "battery_drop": "SELECT arg_min(voltage_battery, time_us) - arg_max(voltage_battery, time_us), max(current_battery) FROM SYS_STATUS",
+        "flight_summary": "SELECT * FROM flight_summary",
+    },
+    "ulg": {
+        "row_count": "SELECT count(*) FROM sensor_combined",
+        "time_window_stats": "SELECT min(accelerometer_m_s2[3]), max(accelerometer_m_s2[3]), avg(accelerometer_m_s2[3]), "
+                             "stddev(accelerometer_m_s2[3]) FROM sensor_combined WHERE time_us BETWEEN {t0} AND {t1}",
+        "per_second_downsample": "SELECT time_us // 1000000 AS s, avg(baro_alt_meter) AS alt FROM vehicle_air_data GROUP BY s ORDER BY s",
+        "esc_peaks": "SELECT max(e.esc_rpm), max(e.esc_current) FROM (SELECT unnest(esc) AS e FROM esc_status)",
+        "mode_segments": "SELECT nav_state, min(time_us), max(time_us), count(*) FROM vehicle_status GROUP BY nav_state ORDER BY 2",
+        "asof_join": "SELECT count(*), avg(a.q[2]) FROM vehicle_gps_position g ASOF JOIN vehicle_attitude a ON g.time_us >= a.time_us",
+        "battery_drop": "SELECT arg_min(voltage_v, time_us) - arg_max(voltage_v, time_us), max(current_a) FROM battery_status",
+        "flight_summary": "SELECT * FROM flight_summary",
+    },
+}
+# Table whose time range defines {t0} and {t1}.
+WINDOW_TABLE = {"bin": "IMU", "tlog": "RAW_IMU", "ulg": "sensor_combined"}
+SYNTHETIC_LOG_WRITERS = {"bin": write_dataflash_log, "tlog": write_tlog, "ulg": write_ulog}
+
+# Differences below this many seconds are noise, whatever the ratio.
+REGRESSION_FLOOR_S = 0.005
+
+
+def _parse_rates(text: str | None, default: dict[str, int]) -> dict[str, int]:
+    if not text:
+        return dict(default)
+    rates = {}
+    for item in text.split(","):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = int(rate)
+    return rates
+
+
+def _synthetic_log(data_dir: str, fmt: str, size_mb: int, rates: dict[str, int]) -> str:
+    """Path of a cached synthetic log for this format, size and message mix, generated if missing."""
+    mix = hashlib.sha1(json.dumps(rates, sort_keys=True).encode()).hexdigest()[:8]
+    path = os.path.join(data_dir, f"bench_ingest_{size_mb}mb_{mix}.{fmt}")
+    if not os.path.exists(path):
+        print(f"generating {path} ...")
+        SYNTHETIC_LOG_WRITERS[fmt](f"{path}.partial", size_mb * 1024 * 1024, rates)
+        os.replace(f"{path}.partial", path)
+    return path
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux.
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def _run_once(path: str, fmt: str, workers: int, query_repeat: int) -> dict:
+    """Ingests `path` and runs the query set. Runs in its own spawned process."""
+    os.environ["PARALLEL_PARSE_WORKERS"] = str(workers)
+    import duckdb
+    import structlog
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    from server.log_store import parse_log_file_into_database
+
+    rss_before_mb = _peak_rss_mb(resource.RUSAGE_SELF)
+    with tempfile.TemporaryDirectory(prefix="bench_ingest_") as work_dir:
+        db_path = os.path.join(work_dir, "bench.duckdb")
+        start = time.perf_counter()
+        result = parse_log_file_into_database(path, os.path.basename(path), db_path, "bench")
+        end_to_end_s = time.perf_counter() - start
+        if result.get("status") != "success":
+            raise RuntimeError(f"ingest of {path} failed: {result}")
+        run = {
+            "end_to_end_s": round(end_to_end_s, 4),
+            "stage_timings_s": result["stage_timings_s"],
+            "messages": result["total_messages_parsed"],
+            "rows_stored": result["total_rows_stored"],
+            "tables": len(result["tables_created"]),
+            "db_bytes": os.path.getsize(db_path),
+            "rss_before_mb": rss_before_mb,
+            "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+            # Parallel decode workers, once they have exited.
+            "worker_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        }
+
+        conn = duckdb.connect(db_path, read_only=True)
+        try:
+            time_min, time_max = conn.execute(f"SELECT min(time_us), max(time_us) FROM {WINDOW_TABLE[fmt]}").fetchone()
+            span = time_max - time_min
+            window = {"t0": time_min + span * 45 // 100, "t1": time_min + span * 55 // 100}
+            queries = {}
+            for name, sql in QUERIES[fmt].items():
+                sql = sql.format(**window)
+                timings_ms, rows = [], 0
+                for _ in range(query_repeat):
+                    query_start = time.perf_counter()
+                    rows = len(conn.execute(sql).fetchall())
+                    timings_ms.append((time.perf_counter() - query_start) * 1000)
+                queries[name] = {"median_ms": round(statistics.median(timings_ms), 3), "min_ms": round(min(timings_ms), 3),
+                                 "rows": rows}
+            run["queries"] = queries
+        finally:
+            conn.close()
+    return run
+
+
+def _environment() -> dict:
+    import duckdb
+    import numpy
+    import pyarrow
+    import pymavlink
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "duckdb": duckdb.__version__,
+        "pyarrow": pyarrow.__version__,
+        "numpy": numpy.__version__,
+        "pymavlink": getattr(pymavlink, "__version__", None),
+    }
+
+
+def _run_key(run: dict) -> tuple:
+    return run["format"], run["size_mb"], run["workers"], json.dumps(run["message_rates"], sort_keys=True)
+
+
+def _metrics(run: dict) -> dict[str, float]:
+    """Flat name -> value (seconds, or MB for memory) of everything compared against a baseline."""
+    metrics = {"end_to_end_s": run["end_to_end_s"], "peak_rss_mb": run["peak_rss_mb"]}
+    metrics.update({f"stage.{stage}_s": seconds for stage, seconds in run["stage_timings_s"].items()})
+    metrics.update({f"query.{name}_s": query["median_ms"] / 1000 for name, query in run["queries"].items()})
+    return metrics
+
+
+def compare_to_baseline(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Metrics that grew by more than `max_regression` times relative to the matching baseline run."""
+    baseline_runs = {_run_key(run): run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in results["runs"]:
+        old_run = baseline_runs.get(_run_key(run))
+        if old_run is None:
+            continue
+        old_metrics = _metrics(old_run)
+        label = f"{run['format']} {run['size_mb']} MB"
+        for name, new in _metrics(run).items():
+            old = old_metrics.get(name)
+            if not old:
+                continue
+            ratio = new / old
+            print(f"  {label:<14}{name:<36}{old:12.4f}{new:12.4f}{ratio:8.2f}x")
+            floor = 0.0 if name.endswith("_mb") else REGRESSION_FLOOR_S
+            if ratio > max_regression and new - old > floor:
+                regressions.append(f"{label} {name}: {old:.4f} -> {new:.4f} ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", choices=["bin", "tlog", "ulg"], default=["bin", "tlog"])
+    parser.add_argument("--sizes-mb", nargs="+", type=int, default=[20], help="sizes of the synthetic logs")
+    parser.add_argument("--bin-rates", help="DataFlash message mix as TYPE=HZ,...")
+    parser.add_argument("--tlog-rates", help="tlog message mix as TYPE=HZ,...")
+    parser.add_argument("--ulg-rates", help="ULog topic mix as TOPIC=HZ,...")
+    parser.add_argument("--workers", type=int, default=1, help="parallel decode workers (1 = serial path)")
+    parser.add_argument("--query-repeat", type=int, default=5, help="runs per query; the median is reported")
+    parser.add_argument("--data-dir", default=tempfile.gettempdir(), help="where synthetic logs are generated and reused")
+    parser.add_argument("--output", default="bench_ingest.json", help="JSON results file")
+    parser.add_argument("--baseline", help="earlier JSON results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25, help="largest accepted slowdown or memory growth ratio")
+    args = parser.parse_args()
+
+    rates = {"bin": _parse_rates(args.bin_rates, DATAFLASH_MESSAGE_RATES), "tlog": _parse_rates(args.tlog_rates, TLOG_MESSAGE_RATES),
+             "ulg": _parse_rates(args.ulg_rates, ULOG_MESSAGE_RATES)}
+    results = {"format_version": RESULT_FORMAT_VERSION, "created_at": datetime.now(timezone.utc).isoformat(),
+               "environment": _environment(), "runs": []}
+
+    print(f"{'format':<7}{'MB':>6}{'total s':>9}{'MB/s':>8}{'copy':>7}{'decode':>8}{'build':>7}{'write':>7}"
+          f"{'sort':>7}{'summary':>8}{'RSS MB':>8}")
+    for fmt in args.formats:
+        for size_mb in args.sizes_mb:
+            path = _synthetic_log(args.data_dir, fmt, size_mb, rates[fmt])
+            # A fresh process per run, so ru_maxrss is this run's peak.
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                run = executor.submit(_run_once, path, fmt, args.workers, args.query_repeat).result()
+            file_mb = os.path.getsize(path) / (1024 * 1024)
+            run = {"format": fmt, "size_mb": size_mb, "file_bytes": os.path.getsize(path), "workers": args.workers,
+                   "message_rates": rates[fmt], "mb_per_s": round(file_mb / run["end_to_end_s"], 2), **run}
+            results["runs"].append(run)
+            stages = run["stage_timings_s"]
+            print(f"{fmt:<7}{file_mb:6.0f}{run['end_to_end_s']:9.2f}{run['mb_per_s']:8.1f}"
+                  + "".join(f"{stages.get(stage, 0.0):{width}.2f}" for stage, width in
+                            (("copy", 7), ("decode", 8), ("build", 7), ("write", 7), ("sort", 7), ("summary", 8)))
+                  + f"{run['peak_rss_mb']:8.0f}")
+            print("        " + "  ".join(f"{name} {query['median_ms']:.1f}ms" for name, query in run["queries"].items()))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"compared with {args.baseline} ({baseline.get('environment', {}).get('git_revision')}):")
+        print(f"  {'run':<14}{'metric':<36}{'baseline':>12}{'current':>12}{'ratio':>9}")
+        regressions = compare_to_baseline(results, baseline, args.max_regression)
+        if regressions:
+            raise SystemExit("regressions beyond {:.2f}x:\n  ".format(args.max_regression) + "\n  ".join(regressions))
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
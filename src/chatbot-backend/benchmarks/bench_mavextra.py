@@ -0,0 +1,302 @@
+"""
+Derived signals of server/mavextra.py against per-sample ports of the frontend's
+src/mavextra/mavextra.js: times the sample-by-sample loop, the NumPy functions and the
+DuckDB functions over synthetic columns, and fails if any result differs from the
+per-sample semantics by more than --tolerance.
+
+Usage (from src/chatbot-backend):
+    python -m benchmarks.bench_mavextra --rows 1000000
+"""
+import argparse
+import logging
+import math
+import os
+import re
+import time
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import structlog
+
+from server import mavextra
+from server.mag_field_tables import DECLINATION_TABLE, INCLINATION_TABLE, INTENSITY_TABLE
+
+MAVEXTRA_JS = os.path.join(os.path.dirname(__file__), "..", "..", "mavextra", "mavextra.js")
+
+
+# Per-sample ports of mavextra.js, kept as literal as possible, including its global filter state.
+
+def js_degrees(a):
+    return 57.2958 * a
+
+
+def js_radians(a):
+    return 0.0174533 * a
+
+
+def js_from_euler(roll, pitch, yaw):
+    cp, sp, sr, cr, sy, cy = math.cos(pitch), math.sin(pitch), math.sin(roll), math.cos(roll), math.sin(yaw), math.cos(yaw)
+    return [cp * cy, sr * sp * cy - cr * sy, cr * sp * cy + sr * sy,
+            cp * sy, sr * sp * sy + cr * cy, cr * sp * sy - sr * cy,
+            -sp, sr * cp, cr * cp]
+
+
+def js_altitude(press_abs, ground_pressure, ground_temp):
+    scaling = ground_pressure / (press_abs * 100.0)
+    return math.log(scaling) * (ground_temp + 273.15) * 29271.267 * 0.001
+
+
+def js_altitude2(press_abs, ground_pressure, ground_temp):
+    scaling = press_abs * 100.0 / ground_pressure
+    return 153.8462 * (ground_temp + 273.15) * (1.0 - math.exp(0.190259 * math.log(scaling)))
+
+
+def _js_heading(mag_x, mag_y, mag_z, dcm, declination):
+    cos_pitch_sqr = 1.0 - dcm[6] * dcm[6]
+    head_y = mag_y * dcm[8] - mag_z * dcm[7]
+    head_x = mag_x * cos_pitch_sqr - dcm[6] * (mag_y * dcm[7] + mag_z * dcm[8])
+    return js_degrees(math.atan2(-head_y, head_x)) + declination
+
+
+def js_mag_heading(mag_x, mag_y, mag_z, roll, pitch, yaw, declination):
+    heading = _js_heading(mag_x, mag_y, mag_z, js_from_euler(roll, pitch, yaw), declination)
+    return heading + 360 if heading < -180 else heading
+
+
+def js_mag_heading_df(mag_x, mag_y, mag_z, roll, pitch, yaw, declination):
+    heading = _js_heading(mag_x, mag_y, mag_z, js_from_euler(js_radians(roll), js_radians(pitch), js_radians(yaw)), declination)
+    return heading + 360 if heading < 0 else heading
+
+
+def js_mag_field(mag_x, mag_y, mag_z):
+    return math.sqrt(mag_x ** 2 + mag_y ** 2 + mag_z ** 2)
+
+
+class JsState:
+    """window.lastLowpass, window.lastDelta and window.earth_field."""
+    def __init__(self):
+        self.last_lowpass = None
+        self.last_delta = {}
+        self.earth_field = None
+
+    def lowpass(self, variable, factor):
+        if self.last_lowpass is None or math.isnan(self.last_lowpass):
+            self.last_lowpass = variable
+        else:
+            self.last_lowpass = factor * self.last_lowpass + (1.0 - factor) * variable
+        return self.last_lowpass
+
+    def delta(self, variable, key):
+        ret = 0.0
+        if key not in self.last_delta:
+            self.last_delta[key] = variable
+        if self.last_delta[key] is None or math.isnan(self.last_delta[key]):
+            self.last_delta[key] = variable
+        else:
+            ret = variable - self.last_delta[key]
+            self.last_delta[key] = variable
+        return ret
+
+    def expected_earth_field(self, tables, gps_status, lat, lon):
+        if self.earth_field is not None:
+            return self.earth_field
+        if gps_status < 3:
+            return [0.0, 0.0, 0.0]
+        declination, inclination, intensity = js_get_mag_field_ef(tables, lat, lon)
+        dcm = js_from_euler(0.0, -js_radians(inclination), js_radians(declination))
+        self.earth_field = [dcm[0] * intensity * 1000.0, dcm[3] * intensity * 1000.0, dcm[6] * intensity * 1000.0]
+        return self.earth_field
+
+    def expected_mag(self, tables, gps_status, lat, lon, roll, pitch, yaw):
+        self.expected_earth_field(tables, gps_status, lat, lon)
+        if self.earth_field is None:
+            return [0.0, 0.0, 0.0]
+        r = js_from_euler(js_radians(roll), js_radians(pitch), js_radians(yaw))
+        ef = self.earth_field
+        return [r[0] * ef[0] + r[3] * ef[1] + r[6] * ef[2],
+                r[1] * ef[0] + r[4] * ef[1] + r[7] * ef[2],
+                r[2] * ef[0] + r[5] * ef[1] + r[8] * ef[2]]
+
+
+def js_interpolate_table(table, lat, lon):
+    min_lat = math.floor(math.floor(lat / 10.0) * 10.0)
+    min_lon = math.floor(math.floor(lon / 10.0) * 10.0)
+    min_lat_index = math.floor(math.floor(90.0 + min_lat) / 10.0)
+    min_lon_index = math.floor(math.floor(180.0 + min_lon) / 10.0)
+    data_sw = table[min_lat_index][min_lon_index]
+    data_se = table[min_lat_index][min_lon_index + 1]
+    data_ne = table[min_lat_index + 1][min_lon_index + 1]
+    data_nw = table[min_lat_index + 1][min_lon_index]
+    data_min = ((lon - min_lon) / 10.0) * (data_se - data_sw) + data_sw
+    data_max = ((lon - min_lon) / 10.0) * (data_ne - data_nw) + data_nw
+    return ((lat - min_lat) / 10.0) * (data_max - data_min) + data_min
+
+
+def js_get_mag_field_ef(tables, lat, lon):
+    if lat < -90.0 or lat >= 90.0 or lon < -180.0 or lon >= 180.0:
+        return None
+    return [js_interpolate_table(tables["declination"], lat, lon), js_interpolate_table(tables["inclination"], lat, lon),
+            js_interpolate_table(tables["intensity"], lat, lon)]
+
+
+def load_js_tables() -> dict | None:
+    """The field tables as defined in mavextra.js, to check server/mag_field_tables.py against."""
+    if not os.path.exists(MAVEXTRA_JS):
+        return None
+    with open(MAVEXTRA_JS) as f:
+        source = f.read()
+    tables = {}
+    for name in ("declination", "inclination", "intensity"):
+        body = re.search(rf"window\.{name}_table\s*=\s*\[(.*?)\n\]", source, re.DOTALL).group(1)
+        tables[name] = [[float(v) for v in row.split(",")] for row in re.findall(r"\[([^\[\]]*)\]", body)]
+    return tables
+
+
+def synthetic_columns(rows: int, seed: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    t = np.arange(rows) / 50.0
+    columns = {
+        "time_us": (t * 1e6).astype(np.int64),
+        "press_abs": 1013.25 - 0.12 * (20 + 15 * np.sin(t / 60)) + rng.normal(0, 0.05, rows),
+        "roll": 0.3 * np.sin(t / 3) + rng.normal(0, 0.01, rows),
+        "pitch": 0.2 * np.cos(t / 5) + rng.normal(0, 0.01, rows),
+        "yaw": np.mod(t / 10, 2 * np.pi) - np.pi,
+        "mag_x": 200 + 150 * np.cos(t / 10) + rng.normal(0, 5, rows),
+        "mag_y": -150 * np.sin(t / 10) + rng.normal(0, 5, rows),
+        "mag_z": 380 + rng.normal(0, 5, rows),
+        "gps_status": np.where(t < 5, 1.0, 3.0),
+        "lat": 47.3977 + 0.001 * np.sin(t / 100),
+        "lon": 8.5456 + 0.001 * np.cos(t / 100),
+        "alt": 20 + 15 * np.sin(t / 60) + rng.normal(0, 0.3, rows),
+        # Positions over the whole globe, a few of them outside the field tables.
+        "sweep_lat": rng.uniform(-92, 92, rows),
+        "sweep_lon": rng.uniform(-182, 182, rows),
+    }
+    columns["alt"][rng.choice(rows, size=max(rows // 10000, 1), replace=False)] = np.nan
+    for name in ("roll", "pitch", "yaw"):
+        columns[f"{name}_deg"] = np.degrees(columns[name])
+    return columns
+
+
+def _max_error(actual, expected, angle: bool = False) -> float:
+    actual, expected = np.asarray(actual, dtype=np.float64), np.asarray(expected, dtype=np.float64)
+    if not np.array_equal(np.isnan(actual), np.isnan(expected)):
+        return math.inf
+    diff = np.abs(actual - expected)[~np.isnan(expected)]
+    if angle:
+        diff = np.minimum(diff, 360 - diff)
+    return float(diff.max()) if len(diff) else 0.0
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="samples per synthetic column")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="largest absolute difference accepted")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    failures = []
+    js_tables = load_js_tables()
+    module_tables = {"declination": DECLINATION_TABLE, "inclination": INCLINATION_TABLE, "intensity": INTENSITY_TABLE}
+    if js_tables is None:
+        print(f"{MAVEXTRA_JS} not found; using server/mag_field_tables.py as the reference tables")
+        js_tables = module_tables
+    elif js_tables != module_tables:
+        failures.append("mag_field_tables.py differs from the tables in mavextra.js")
+
+    c = synthetic_columns(args.rows, args.seed)
+    ground_pressure, ground_temp, declination, factor = 101325.0, 21.5, 2.5, 0.9
+    n = args.rows
+
+    state = JsState()
+    references = {
+        "altitude": lambda: [js_altitude(c["press_abs"][i], ground_pressure, ground_temp) for i in range(n)],
+        "altitude2": lambda: [js_altitude2(c["press_abs"][i], ground_pressure, ground_temp) for i in range(n)],
+        "mag_field": lambda: [js_mag_field(c["mag_x"][i], c["mag_y"][i], c["mag_z"][i]) for i in range(n)],
+        "mag_heading": lambda: [js_mag_heading(c["mag_x"][i], c["mag_y"][i], c["mag_z"][i], c["roll"][i], c["pitch"][i],
+                                               c["yaw"][i], declination) for i in range(n)],
+        "mag_heading_df": lambda: [js_mag_heading_df(c["mag_x"][i], c["mag_y"][i], c["mag_z"][i], c["roll_deg"][i],
+                                                     c["pitch_deg"][i], c["yaw_deg"][i], declination) for i in range(n)],
+        "lowpass": lambda: [state.lowpass(c["alt"][i], factor) for i in range(n)],
+        "delta": lambda: [state.delta(c["alt"][i], "alt") for i in range(n)],
+        "mag_field_ef": lambda: [js_get_mag_field_ef(js_tables, c["sweep_lat"][i], c["sweep_lon"][i]) for i in range(n)],
+        "expected_mag": lambda: [state.expected_mag(js_tables, c["gps_status"][i], c["lat"][i], c["lon"][i], c["roll_deg"][i],
+                                                    c["pitch_deg"][i], c["yaw_deg"][i]) for i in range(n)],
+    }
+    vectorized = {
+        "altitude": lambda: mavextra.altitude(c["press_abs"], ground_pressure, ground_temp),
+        "altitude2": lambda: mavextra.altitude2(c["press_abs"], ground_pressure, ground_temp),
+        "mag_field": lambda: mavextra.mag_field(c["mag_x"], c["mag_y"], c["mag_z"]),
+        "mag_heading": lambda: mavextra.mag_heading(c["mag_x"], c["mag_y"], c["mag_z"], c["roll"], c["pitch"], c["yaw"], declination),
+        "mag_heading_df": lambda: mavextra.mag_heading_df(c["mag_x"], c["mag_y"], c["mag_z"], c["roll_deg"], c["pitch_deg"],
+                                                          c["yaw_deg"], declination),
+        "lowpass": lambda: mavextra.lowpass(c["alt"], factor),
+        "delta": lambda: mavextra.delta(c["alt"]),
+        "mag_field_ef": lambda: np.column_stack(mavextra.mag_field_ef(c["sweep_lat"], c["sweep_lon"])),
+        "expected_mag": lambda: mavextra.expected_mag(c["gps_status"], c["lat"], c["lon"], c["roll_deg"], c["pitch_deg"], c["yaw_deg"]),
+    }
+    # expected_mag in SQL takes the reference position explicitly: the first 3D fix, as the JS caches it.
+    first_fix = int(np.flatnonzero(c["gps_status"] >= 3)[0])
+    ref_lat, ref_lon = c["lat"][first_fix], c["lon"][first_fix]
+    sql = {
+        "altitude": f"SELECT altitude(press_abs, {ground_pressure}, {ground_temp}) FROM s ORDER BY time_us",
+        "altitude2": f"SELECT altitude2(press_abs, {ground_pressure}, {ground_temp}) FROM s ORDER BY time_us",
+        "mag_field": "SELECT mag_field(mag_x, mag_y, mag_z) FROM s ORDER BY time_us",
+        "mag_heading": f"SELECT mag_heading(mag_x, mag_y, mag_z, roll, pitch, yaw, declination := {declination}) FROM s ORDER BY time_us",
+        "mag_heading_df": f"SELECT mag_heading_df(mag_x, mag_y, mag_z, roll_deg, pitch_deg, yaw_deg, declination := {declination}) "
+                          f"FROM s ORDER BY time_us",
+        "lowpass": f"SELECT unnest(lowpass(list(alt ORDER BY time_us), {factor})) FROM s",
+        "delta": "SELECT unnest(delta(list(alt ORDER BY time_us))) FROM s",
+        "mag_field_ef": "SELECT f.declination, f.inclination, f.intensity FROM (SELECT mag_field_ef(sweep_lat, sweep_lon) AS f, time_us FROM s) "
+                        "ORDER BY time_us",
+        "expected_mag": f"SELECT CASE WHEN time_us < {c['time_us'][first_fix]} THEN 0 ELSE m.x END, "
+                        f"CASE WHEN time_us < {c['time_us'][first_fix]} THEN 0 ELSE m.y END, "
+                        f"CASE WHEN time_us < {c['time_us'][first_fix]} THEN 0 ELSE m.z END "
+                        f"FROM (SELECT expected_mag({ref_lat}, {ref_lon}, roll_deg, pitch_deg, yaw_deg) AS m, time_us FROM s) ORDER BY time_us",
+    }
+
+    conn = duckdb.connect()
+    try:
+        mavextra.register_mavextra_functions(conn)
+        mavextra.create_mavextra_macros(conn)
+        conn.register("samples", pa.table(c))
+        conn.execute("CREATE TABLE s AS SELECT * REPLACE (CASE WHEN isnan(alt) THEN NULL ELSE alt END AS alt) FROM samples")
+
+        print(f"{'function':<16}{'per-sample s':>14}{'numpy s':>10}{'duckdb s':>10}{'numpy x':>9}{'duckdb x':>9}"
+              f"{'numpy err':>11}{'duckdb err':>11}")
+        for name in references:
+            expected, loop_s = _timed(references[name])
+            if name == "mag_field_ef":
+                expected = [row if row is not None else [math.nan] * 3 for row in expected]
+            expected = np.asarray(expected, dtype=np.float64)
+            actual, numpy_s = _timed(vectorized[name])
+            rows, duckdb_s = _timed(lambda: conn.execute(sql[name]).fetchnumpy())
+            from_sql = np.column_stack([np.ma.filled(np.ma.asarray(column, dtype=np.float64), np.nan)
+                                        for column in rows.values()])
+            from_sql = from_sql[:, 0] if expected.ndim == 1 else from_sql
+            angle = name.startswith("mag_heading")
+            numpy_err, duckdb_err = _max_error(actual, expected, angle), _max_error(from_sql, expected, angle)
+            print(f"{name:<16}{loop_s:14.3f}{numpy_s:10.4f}{duckdb_s:10.4f}{loop_s / numpy_s:9.0f}{loop_s / duckdb_s:9.0f}"
+                  f"{numpy_err:11.2e}{duckdb_err:11.2e}")
+            for path, error in (("numpy", numpy_err), ("duckdb", duckdb_err)):
+                if not error <= args.tolerance:
+                    failures.append(f"{name} ({path}): max abs error {error:.3g} > {args.tolerance:g}")
+    finally:
+        conn.close()
+
+    if failures:
+        raise SystemExit("parity failures:\n  " + "\n  ".join(failures))
+    print(f"all {len(references)} functions match the per-sample semantics over {n} samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the serial and multi-process decoding paths of parse_and_store_log.
+
+Usage (from src/chatbot-backend):
+    python -m benchmarks.bench_parallel_parse --size-mb 300 --format bin --workers 8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import duckdb
+import structlog
+
+from benchmarks.synthetic_logs import write_dataflash_log, write_tlog
+from server.log_parser import parse_and_store_log
+
+
+def _run(path: str, workers: int) -> tuple[float, dict]:
+    conn = duckdb.connect()
+    try:
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            result = parse_and_store_log(f, os.path.basename(path), conn, log_id="bench", workers=workers)
+        elapsed = time.perf_counter() - start
+        row_counts = {table: conn.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+                      for table in result.get("tables_created", [])}
+    finally:
+        conn.close()
+    if result.get("status") != "success":
+        raise RuntimeError(f"parse failed: {result}")
+    return elapsed, row_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=300, help="size of the synthetic log")
+    parser.add_argument("--format", choices=["bin", "tlog"], default="bin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log", help="reuse an existing log file instead of generating one")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    path = args.log
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"bench_parallel_{args.size_mb}mb.{args.format}")
+        if not os.path.exists(path):
+            print(f"generating {path} ...")
+            writer = write_dataflash_log if args.format == "bin" else write_tlog
+            writer(f"{path}.partial", args.size_mb * 1024 * 1024)
+            os.replace(f"{path}.partial", path)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+
+    serial_s, serial_rows = _run(path, workers=1)
+    print(f"serial:            {serial_s:8.2f} s  {size_mb / serial_s:7.1f} MB/s")
+    parallel_s, parallel_rows = _run(path, workers=args.workers)
+    print(f"parallel ({args.workers:2d} wk): {parallel_s:8.2f} s  {size_mb / parallel_s:7.1f} MB/s")
+    print(f"speed-up:          {serial_s / parallel_s:8.2f}x")
+
+    if serial_rows != parallel_rows:
+        raise SystemExit(f"row counts differ between paths: serial={serial_rows} parallel={parallel_rows}")
+    print(f"row counts match across {len(serial_rows)} tables ({sum(serial_rows.values())} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Per-log prompt setup costs: schema summary construction, system prompt reuse across
+sessions, GenerativeModel reuse across chat turns, and end-to-end chat latency with the
+local stub LLM (LLM_BACKEND=stub), so no provider calls are made.
+
+Usage (from src/chatbot-backend):
+    python -m benchmarks.bench_prompt_setup --size-mb 20 --repeat 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import structlog
+
+STORE_DIR = tempfile.mkdtemp(prefix="bench_log_store_")
+os.environ["LOG_STORE_DIR"] = STORE_DIR
+os.environ["LLM_BACKEND"] = "stub"
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+
+import httpx  # noqa: E402
+
+from benchmarks.synthetic_logs import write_dataflash_log  # noqa: E402
+from main import app  # noqa: E402
+from server.chatbot_backend import _build_data_schema_summary  # noqa: E402
+from server.dependencies import db_pool, log_store, system_prompt_cache  # noqa: E402
+from server.gemini_helper import GeminiClient  # noqa: E402
+from server.workers import get_worker_cursor  # noqa: E402
+
+
+def _legacy_schema_summary(log_id: str, catalogs: list[str]) -> str:
+    """The previous implementation: one PRAGMA table_info round trip per table."""
+    cursor = get_worker_cursor()
+    lines = ["Available MAVLink message tables and their columns:"]
+    for catalog in catalogs:
+        tables = cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_catalog = ? AND table_schema = 'main'",
+                                [catalog]).fetchall()
+        for (table_name,) in tables:
+            columns = cursor.execute(f"PRAGMA table_info('{catalog}.{table_name}')").fetchall()
+            lines.append(f"- {table_name}: {', '.join(col[1] for col in columns)}")
+    return "\n".join(lines)
+
+
+def _timed_ms(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _line(name: str, samples: list[float]) -> str:
+    return f"{name:<34} p50={statistics.median(samples):8.3f} ms  max={max(samples):8.3f} ms"
+
+
+async def run(size_mb: int, repeat: int):
+    workdir = tempfile.mkdtemp(prefix="bench_logs_")
+    path = os.path.join(workdir, "bench.bin")
+    write_dataflash_log(path, size_mb * 1024 * 1024)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        with open(path, "rb") as f:
+            response = await client.post("/api/upload_log/", files={"file": ("bench.bin", f)})
+        response.raise_for_status()
+        session_id, log_id = response.json()["session_id"], response.json()["log_id"]
+        catalogs = log_store.query_catalogs(log_id)
+
+        legacy = [await db_pool.run(lambda: _timed_ms(lambda: _legacy_schema_summary(log_id, catalogs), 1)[0]) for _ in range(repeat)]
+        lookups = [await db_pool.run(lambda: _timed_ms(lambda: _build_data_schema_summary(log_id, catalogs), 1)[0]) for _ in range(repeat)]
+        print(_line("schema summary, PRAGMA per table", legacy))
+        print(_line("schema summary, catalog lookups", lookups))
+
+        reupload_cold, reupload_warm = [], []
+        for samples in (reupload_cold, reupload_warm):
+            for _ in range(repeat):
+                if samples is reupload_cold:
+                    system_prompt_cache.invalidate_log(log_id)
+                start = time.perf_counter()
+                with open(path, "rb") as f:
+                    response = await client.post("/api/upload_log/", files={"file": ("bench.bin", f)})
+                response.raise_for_status()
+                samples.append((time.perf_counter() - start) * 1000)
+        print(_line("re-open stored log, prompt built", reupload_cold))
+        print(_line("re-open stored log, prompt cached", reupload_warm))
+
+        chat = []
+        headers = {"X-Session-ID": session_id}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.post("/api/chat/", json={"message": "Summarize the flight."}, headers=headers)
+            response.raise_for_status()
+            chat.append((time.perf_counter() - start) * 1000)
+        print(_line("chat turn (stub LLM, 1 query)", chat))
+
+    instruction = "x" * 12_000
+    uncached = GeminiClient()
+    uncached_samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        uncached.get_model(system_instruction=f"{instruction}{i}")
+        uncached_samples.append((time.perf_counter() - start) * 1000)
+    cached = GeminiClient()
+    cached.get_model(system_instruction=instruction)
+    print(_line("GenerativeModel, new per request", uncached_samples))
+    print(_line("GenerativeModel, cached per log", _timed_ms(lambda: cached.get_model(system_instruction=instruction), repeat)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    asyncio.run(run(args.size_mb, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares the parse throughput of the columnar ULog path with the generic pymavlink path.
+
+pymavlink cannot read ULog, so the generic path is measured on a DataFlash log with the
+same message mix, rates and size: a ULog and a .bin carrying one synthetic flight are
+generated, and each is parsed by parse_and_store_log into an in-memory database. The
+generic path runs serially and, with --workers above 1, with parallel range decoding;
+speedups are relative to the serial generic run.
+
+Usage (from src/chatbot-backend):
+    python -m benchmarks.bench_ulog --size-mb 100 --workers 8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import duckdb
+import structlog
+
+from benchmarks.synthetic_logs import write_dataflash_log, write_ulog
+from server.log_parser import parse_and_store_log
+from server.parallel_parser import PARALLEL_PARSE_MIN_BYTES, can_parse_in_parallel
+
+
+def _run(path: str, workers: int, batch_size: int) -> tuple[float, dict]:
+    conn = duckdb.connect()
+    try:
+        start = time.perf_counter()
+        result = parse_and_store_log(path, os.path.basename(path), conn, log_id="bench", batch_size=batch_size, workers=workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    if result.get("status") != "success":
+        raise RuntimeError(f"parse of {path} failed: {result}")
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100, help="size of each synthetic log")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="workers for the parallel generic run")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows per batch written to DuckDB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per path; the fastest is reported")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    with tempfile.TemporaryDirectory(prefix="bench_ulog_") as work_dir:
+        ulog_path = os.path.join(work_dir, "bench.ulg")
+        bin_path = os.path.join(work_dir, "bench.bin")
+        write_ulog(ulog_path, args.size_mb * 1024 * 1024)
+        write_dataflash_log(bin_path, args.size_mb * 1024 * 1024)
+
+        runs = [("generic serial", bin_path, 1)]
+        if args.workers > 1 and can_parse_in_parallel(bin_path):
+            runs.append((f"generic {args.workers} workers", bin_path, args.workers))
+        elif args.workers > 1:
+            print(f"skipping the parallel generic run: logs under {PARALLEL_PARSE_MIN_BYTES} bytes are decoded serially")
+        runs.append(("ulog columnar", ulog_path, 1))
+        print(f"{'path':<22}{'MB':>6}{'seconds':>9}{'MB/s':>8}{'msgs/s':>11}{'decode':>8}{'build':>7}{'write':>7}{'speedup':>9}")
+        serial_s = None
+        for label, path, workers in runs:
+            elapsed, result = min((_run(path, workers, args.batch_size) for _ in range(args.repeat)), key=lambda run: run[0])
+            serial_s = serial_s or elapsed
+            file_mb = os.path.getsize(path) / (1024 * 1024)
+            stages = result["stage_timings_s"]
+            print(f"{label:<22}{file_mb:6.0f}{elapsed:9.2f}{file_mb / elapsed:8.1f}{result['total_messages_parsed'] / elapsed:11.0f}"
+                  + "".join(f"{stages.get(stage, 0.0):{width}.2f}" for stage, width in (("decode", 8), ("build", 7), ("write", 7)))
+                  + f"{serial_s / elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Load test: chat and health-check latency while a large log upload is being parsed.
+
+The LLM is replaced by a stub that issues one `QUERY DB:` round trip per chat turn,
+so the numbers reflect the backend's own scheduling rather than the model provider.
+
+Usage (from src/chatbot-backend):
+    python -m benchmarks.load_chat_latency --upload-mb 100
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import structlog
+
+STORE_DIR = tempfile.mkdtemp(prefix="bench_log_store_")
+os.environ["LOG_STORE_DIR"] = STORE_DIR
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+
+import httpx  # noqa: E402
+
+from benchmarks.synthetic_logs import write_dataflash_log  # noqa: E402
+from main import app  # noqa: E402
+from server.dependencies import get_llm_model  # noqa: E402
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _StubModel:
+    """Asks for one aggregate query, then answers; sleeps to mimic provider latency."""
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    async def generate_content_async(self, contents, generation_config=None, **kwargs):
+        await asyncio.sleep(self.latency_s)
+        self.calls += 1
+        if self.calls == 1:
+            return _StubResponse("QUERY DB:SELECT max(Alt), min(Alt) FROM GPS\n")
+        return _StubResponse("The maximum altitude was reached mid-flight.")
+
+
+def _summary(name: str, samples: list[float]) -> str:
+    if not samples:
+        return f"{name:<28} no samples"
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return (f"{name:<28} n={len(samples):3d}  p50={statistics.median(samples) * 1000:7.1f} ms"
+            f"  p95={p95 * 1000:7.1f} ms  max={max(samples) * 1000:7.1f} ms")
+
+
+async def _timed(coro) -> tuple[float, httpx.Response]:
+    start = time.perf_counter()
+    response = await coro
+    return time.perf_counter() - start, response
+
+
+async def _chat_loop(client: httpx.AsyncClient, session_id: str, stop: asyncio.Event | None, count: int):
+    chat_latencies, health_latencies = [], []
+    headers = {"X-Session-ID": session_id}
+    while (stop is None and len(chat_latencies) < count) or (stop is not None and not stop.is_set()):
+        elapsed, response = await _timed(client.post("/api/chat/", json={"message": "What was the max altitude?"}, headers=headers))
+        response.raise_for_status()
+        chat_latencies.append(elapsed)
+        elapsed, response = await _timed(client.get("/api/health"))
+        response.raise_for_status()
+        health_latencies.append(elapsed)
+    return chat_latencies, health_latencies
+
+
+async def run(upload_mb: int, llm_latency_s: float, baseline_chats: int):
+    app.dependency_overrides[get_llm_model] = lambda: _StubModel(llm_latency_s)
+    workdir = tempfile.mkdtemp(prefix="bench_logs_")
+    small_log = os.path.join(workdir, "small.bin")
+    large_log = os.path.join(workdir, "large.bin")
+    write_dataflash_log(small_log, 2 * 1024 * 1024)
+    print(f"generating {upload_mb} MB upload ...")
+    write_dataflash_log(large_log, upload_mb * 1024 * 1024)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        with open(small_log, "rb") as f:
+            response = await client.post("/api/upload_log/", files={"file": ("small.bin", f)})
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+
+        chat_idle, health_idle = await _chat_loop(client, session_id, None, baseline_chats)
+
+        stop = asyncio.Event()
+
+        async def upload_large():
+            try:
+                with open(large_log, "rb") as f:
+                    return await _timed(client.post("/api/upload_log/", files={"file": ("large.bin", f)}))
+            finally:
+                stop.set()
+
+        upload_task = asyncio.create_task(upload_large())
+        chat_busy, health_busy = await _chat_loop(client, session_id, stop, 0)
+        upload_s, upload_response = await upload_task
+        upload_response.raise_for_status()
+
+    print(f"large upload parsed in {upload_s:.1f} s")
+    print(_summary("chat (idle)", chat_idle))
+    print(_summary("chat (during upload)", chat_busy))
+    print(_summary("health (idle)", health_idle))
+    print(_summary("health (during upload)", health_busy))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upload-mb", type=int, default=100)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--baseline-chats", type=int, default=20)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    asyncio.run(run(args.upload_mb, args.llm_latency_ms / 1000.0, args.baseline_chats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Synthetic ArduPilot DataFlash (.bin), MAVLink telemetry (.tlog) and PX4 ULog (.ulg) log generators.
+
+The generated flight climbs to ~60 m, loiters and descends while the battery drains,
+with a configurable message mix (message type -> rate in Hz). Files are written until
+they reach the requested size.
+"""
+import math
+import struct
+
+from pymavlink.DFReader import FORMAT_TO_STRUCT
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+DF_HEAD = b"\xa3\x95"
+
+# name: (type id, format, columns)
+DATAFLASH_FORMATS = {
+    'FMT': (128, 'BBnNZ', 'Type,Length,Name,Format,Columns'),
+    'MSG': (129, 'QZ', 'TimeUS,Message'),
+    'MODE': (130, 'QMBB', 'TimeUS,Mode,ModeNum,Rsn'),
+    'GPS': (131, 'QBIHBcLLeffB', 'TimeUS,Status,GMS,GWk,NSats,HDop,Lat,Lng,Alt,Spd,GCrs,U'),
+    'ATT': (132, 'QccccCCff', 'TimeUS,DesRoll,Roll,DesPitch,Pitch,DesYaw,Yaw,ErrRP,ErrYaw'),
+    'IMU': (133, 'QBffffffIIfBBHH', 'TimeUS,I,GyrX,GyrY,GyrZ,AccX,AccY,AccZ,EG,EA,T,GH,AH,GHz,AHz'),
+    'BAT': (134, 'QBfffffcf', 'TimeUS,Inst,Volt,VoltR,Curr,CurrTot,EnrgTot,Temp,Res'),
+    'BARO': (135, 'QBffcfIff', 'TimeUS,I,Alt,Press,Temp,CRt,SMS,Offset,GndTemp'),
+    'VIBE': (136, 'QBfffI', 'TimeUS,IMU,VibeX,VibeY,VibeZ,Clip'),
+}
+
+DATAFLASH_MESSAGE_RATES = {'IMU': 400, 'ATT': 50, 'BARO': 20, 'GPS': 10, 'VIBE': 10, 'BAT': 5}
+
+TLOG_MESSAGE_RATES = {
+    'RAW_IMU': 50, 'ATTITUDE': 25, 'GLOBAL_POSITION_INT': 10, 'VFR_HUD': 10, 'SCALED_PRESSURE': 5,
+    'GPS_RAW_INT': 5, 'VIBRATION': 5, 'SYS_STATUS': 2, 'BATTERY_STATUS': 1, 'HEARTBEAT': 1,
+}
+
+MODE_NAMES = ['STABILIZE', 'LOITER', 'AUTO', 'RTL', 'LAND']
+FLIGHT_DURATION_S = 600.0
+HOME_LAT = -35.3632610
+HOME_LNG = 149.1652300
+HOME_ALT_M = 584.0
+
+
+def flight_state(t: float) -> dict:
+    """Deterministic synthetic vehicle state at `t` seconds since boot (repeats every flight)."""
+    phase = (t % FLIGHT_DURATION_S) / FLIGHT_DURATION_S
+    alt = 60.0 * math.sin(math.pi * phase)
+    mode_index = min(int(phase * len(MODE_NAMES)), len(MODE_NAMES) - 1)
+    return {
+        'alt': alt,
+        'lat': HOME_LAT + 0.001 * math.sin(2 * math.pi * phase),
+        'lng': HOME_LNG + 0.001 * math.cos(2 * math.pi * phase),
+        'roll': 0.05 * math.sin(t),
+        'pitch': 0.03 * math.cos(t),
+        'yaw': (t * 0.1) % (2 * math.pi),
+        'volt': 16.8 - 2.4 * phase,
+        'curr': 12.0 + 3.0 * math.sin(t / 10.0),
+        'press': 101325.0 - 12.0 * alt,
+        'vibe': 8.0 + 4.0 * math.sin(t / 7.0),
+        'mode': mode_index,
+        'sats': 14 if 0.4 < phase < 0.45 else 12,
+        'fix': 1 if 0.4 < phase < 0.45 else 3,
+    }
+
+
+def _dataflash_format_record(name: str) -> bytes:
+    type_id, fmt, columns = DATAFLASH_FORMATS[name]
+    length = 3 + struct.calcsize('<' + ''.join(FORMAT_TO_STRUCT[c][0] for c in fmt))
+    return DF_HEAD + bytes([128]) + struct.pack('<BB4s16s64s', type_id, length, name.encode(), fmt.encode(), columns.encode())
+
+
+_DATAFLASH_PACKERS = {
+    name: (DF_HEAD + bytes([type_id]), struct.Struct('<' + ''.join(FORMAT_TO_STRUCT[c][0] for c in fmt)).pack)
+    for name, (type_id, fmt, _) in DATAFLASH_FORMATS.items()
+}
+
+
+def _dataflash_record(name: str, *values) -> bytes:
+    header, pack = _DATAFLASH_PACKERS[name]
+    return header + pack(*values)
+
+
+def _dataflash_messages(name: str, time_us: int, s: dict) -> bytes:
+    if name == 'IMU':
+        return b''.join(_dataflash_record('IMU', time_us, i, 0.01, -0.02, 0.005, 0.1, -0.05, -9.81, 0, 0, 40.0, 1, 1, 400, 400) for i in range(2))
+    if name == 'ATT':
+        return _dataflash_record('ATT', time_us, int(math.degrees(s['roll']) * 100), int(math.degrees(s['roll']) * 100),
+                                 int(math.degrees(s['pitch']) * 100), int(math.degrees(s['pitch']) * 100),
+                                 int(math.degrees(s['yaw']) * 100), int(math.degrees(s['yaw']) * 100), 0.01, 0.02)
+    if name == 'BARO':
+        return _dataflash_record('BARO', time_us, 0, s['alt'], s['press'], 3500, 0, time_us // 1000, 0.0, 25.0)
+    if name == 'GPS':
+        return _dataflash_record('GPS', time_us, s['fix'], (time_us // 1000) % 604800000, 2200, s['sats'], 80,
+                                 int(s['lat'] * 1e7), int(s['lng'] * 1e7), int((HOME_ALT_M + s['alt']) * 100), 5.0, 90.0, 1)
+    if name == 'VIBE':
+        return _dataflash_record('VIBE', time_us, 0, s['vibe'], s['vibe'] * 0.9, s['vibe'] * 1.4, 0)
+    if name == 'BAT':
+        return _dataflash_record('BAT', time_us, 0, s['volt'], s['volt'] + 0.2, s['curr'], time_us / 3.6e6 * s['curr'], 0.0, 3000, 0.01)
+    raise ValueError(f"Unsupported synthetic DataFlash message: {name}")
+
+
+def write_dataflash_log(path: str, target_bytes: int, message_rates: dict[str, int] | None = None) -> dict:
+    """Writes a synthetic DataFlash log of at least `target_bytes`; returns per-type message counts."""
+    message_rates = message_rates or DATAFLASH_MESSAGE_RATES
+    tick_hz = max(message_rates.values())
+    counts = {name: 0 for name in message_rates}
+    written = 0
+    tick = 0
+    last_mode = None
+    with open(path, 'wb') as f:
+        header = b''.join(_dataflash_format_record(name) for name in DATAFLASH_FORMATS)
+        header += _dataflash_record('MSG', 0, b'ArduCopter V4.5.1 (abcdef12)')
+        f.write(header)
+        written += len(header)
+        while written < target_bytes:
+            time_us = tick * 1_000_000 // tick_hz
+            s = flight_state(time_us / 1e6)
+            chunk = []
+            if s['mode'] != last_mode:
+                chunk.append(_dataflash_record('MODE', time_us, s['mode'], s['mode'], 1))
+                last_mode = s['mode']
+            for name, rate in message_rates.items():
+                if tick % (tick_hz // rate) == 0:
+                    chunk.append(_dataflash_messages(name, time_us, s))
+                    counts[name] += 1
+            data = b''.join(chunk)
+            f.write(data)
+            written += len(data)
+            tick += 1
+    return counts
+
+
+def _tlog_message(mav: mavlink.MAVLink, name: str, time_us: int, s: dict):
+    time_ms = time_us // 1000
+    if name == 'RAW_IMU':
+        return mav.raw_imu_encode(time_us, 10, -20, -1000, 1, 2, 3, 200, -50, 400)
+    if name == 'ATTITUDE':
+        return mav.attitude_encode(time_ms, s['roll'], s['pitch'], s['yaw'], 0.01, 0.02, 0.03)
+    if name == 'GLOBAL_POSITION_INT':
+        return mav.global_position_int_encode(time_ms, int(s['lat'] * 1e7), int(s['lng'] * 1e7),
+                                              int((HOME_ALT_M + s['alt']) * 1000), int(s['alt'] * 1000), 100, 0, 0, 9000)
+    if name == 'VFR_HUD':
+        return mav.vfr_hud_encode(5.0, 5.0, 90, 45, HOME_ALT_M + s['alt'], 0.5)
+    if name == 'SCALED_PRESSURE':
+        return mav.scaled_pressure_encode(time_ms, s['press'] / 100.0, 0.0, 2500)
+    if name == 'GPS_RAW_INT':
+        return mav.gps_raw_int_encode(time_us, s['fix'], int(s['lat'] * 1e7), int(s['lng'] * 1e7),
+                                      int((HOME_ALT_M + s['alt']) * 1000), 80, 120, 500, 9000, s['sats'])
+    if name == 'VIBRATION':
+        return mav.vibration_encode(time_us, s['vibe'], s['vibe'] * 0.9, s['vibe'] * 1.4, 0, 0, 0)
+    if name == 'SYS_STATUS':
+        return mav.sys_status_encode(0, 0, 0, 250, int(s['volt'] * 1000), int(s['curr'] * 100), 80, 0, 0, 0, 0, 0, 0)
+    if name == 'BATTERY_STATUS':
+        return mav.battery_status_encode(0, 0, 0, 3000, [int(s['volt'] * 250)] * 4 + [65535] * 6,
+                                         int(s['curr'] * 100), -1, -1, 80)
+    if name == 'HEARTBEAT':
+        return mav.heartbeat_encode(2, 3, 81, s['mode'], 4, 3)
+    raise ValueError(f"Unsupported synthetic MAVLink message: {name}")
+
+
+def write_tlog(path: str, target_bytes: int, message_rates: dict[str, int] | None = None,
+               start_unix_us: int = 1_700_000_000_000_000) -> dict:
+    """Writes a synthetic MAVLink telemetry log of at least `target_bytes`; returns per-type message counts."""
+    message_rates = message_rates or TLOG_MESSAGE_RATES
+    tick_hz = max(message_rates.values())
+    counts = {name: 0 for name in message_rates}
+    written = 0
+    tick = 0
+    last_mode = None
+    with open(path, 'wb') as f:
+        mav = mavlink.MAVLink(f, srcSystem=1, srcComponent=1)
+        while written < target_bytes:
+            time_us = tick * 1_000_000 // tick_hz
+            s = flight_state(time_us / 1e6)
+            timestamp = struct.pack('>Q', start_unix_us + time_us)
+            chunk = []
+            if s['mode'] != last_mode:
+                text = f"Mode changed to {MODE_NAMES[s['mode']]}".encode()
+                chunk.append(timestamp + mav.statustext_encode(6, text).pack(mav))
+                last_mode = s['mode']
+            for name, rate in message_rates.items():
+                if tick % (tick_hz // rate) == 0:
+                    chunk.append(timestamp + _tlog_message(mav, name, time_us, s).pack(mav))
+                    counts[name] += 1
+            data = b''.join(chunk)
+            f.write(data)
+            written += len(data)
+            tick += 1
+    return counts
+
+
+# PX4 uORB formats (trimmed to a few fields each); esc_status nests an array of esc_report.
+ULOG_FORMATS = {
+    'sensor_combined': 'uint64_t timestamp;float[3] gyro_rad;uint32_t gyro_integral_dt;int32_t accelerometer_timestamp_relative;'
+                       'float[3] accelerometer_m_s2;uint32_t accelerometer_integral_dt;uint8_t accelerometer_clipping;'
+                       'uint8_t gyro_clipping;uint8_t[2] _padding0;',
+    'vehicle_attitude': 'uint64_t timestamp;uint64_t timestamp_sample;float[4] q;float[4] delta_q_reset;'
+                        'uint8_t quat_reset_counter;uint8_t[7] _padding0;',
+    'vehicle_air_data': 'uint64_t timestamp;uint64_t timestamp_sample;uint32_t baro_device_id;float baro_alt_meter;'
+                        'float baro_temp_celcius;float baro_pressure_pa;float rho;uint8_t calibration_count;uint8_t[3] _padding0;',
+    'vehicle_gps_position': 'uint64_t timestamp;uint64_t time_utc_usec;int32_t lat;int32_t lon;int32_t alt;float eph;float epv;'
+                            'float vel_m_s;float cog_rad;uint8_t fix_type;uint8_t satellites_used;uint8_t[6] _padding0;',
+    'esc_report': 'uint64_t timestamp;uint32_t esc_errorcount;int32_t esc_rpm;float esc_voltage;float esc_current;'
+                  'uint8_t esc_address;uint8_t[3] _padding0;',
+    'esc_status': 'uint64_t timestamp;uint16_t counter;uint8_t esc_count;uint8_t esc_connectiontype;uint8_t[4] _padding0;'
+                  'esc_report[4] esc;',
+    'battery_status': 'uint64_t timestamp;float voltage_v;float current_a;float discharged_mah;float remaining;'
+                      'float temperature;uint8_t cell_count;uint8_t[3] _padding0;',
+    'vehicle_status': 'uint64_t timestamp;uint8_t nav_state;uint8_t arming_state;uint8_t[6] _padding0;',
+}
+
+# The same mix as DATAFLASH_MESSAGE_RATES; sensor_combined is logged by two instances like IMU.
+ULOG_MESSAGE_RATES = {'sensor_combined': 400, 'vehicle_attitude': 50, 'vehicle_air_data': 20,
+                      'vehicle_gps_position': 10, 'esc_status': 10, 'battery_status': 5}
+
+# PX4 nav_state values for MODE_NAMES (stabilized, auto loiter, auto mission, auto RTL, auto land).
+PX4_NAV_STATES = [15, 4, 3, 5, 18]
+_ULOG_ESC_REPORT = struct.Struct('<QIiffB3x')
+
+
+def _ulog_message(msg_type: str, payload: bytes) -> bytes:
+    return struct.pack('<HB', len(payload), ord(msg_type)) + payload
+
+
+def _ulog_key_value(msg_type: str, key: str, value: bytes) -> bytes:
+    return _ulog_message(msg_type, bytes([len(key)]) + key.encode() + value)
+
+
+def _ulog_record(name: str, time_us: int, s: dict) -> bytes:
+    """A topic's data message body with trailing padding left off, as PX4 writes it."""
+    if name == 'sensor_combined':
+        return struct.pack('<Q3fIi3fIBB', time_us, 0.01, -0.02, 0.005, 2500, 0, 0.1, -0.05, -9.81, 2500, 0, 0)
+    if name == 'vehicle_attitude':
+        cr, sr = math.cos(s['roll'] / 2), math.sin(s['roll'] / 2)
+        cp, sp = math.cos(s['pitch'] / 2), math.sin(s['pitch'] / 2)
+        cy, sy = math.cos(s['yaw'] / 2), math.sin(s['yaw'] / 2)
+        q = (cr * cp * cy + sr * sp * sy, sr * cp * cy - cr * sp * sy, cr * sp * cy + sr * cp * sy, cr * cp * sy - sr * sp * cy)
+        return struct.pack('<QQ4f4fB', time_us, time_us, *q, 0.0, 0.0, 0.0, 0.0, 0)
+    if name == 'vehicle_air_data':
+        return struct.pack('<QQIffffB', time_us, time_us, 1, s['alt'], 35.0, s['press'], 1.225, 1)
+    if name == 'vehicle_gps_position':
+        return struct.pack('<QQiiiffffBB', time_us, 1_700_000_000_000_000 + time_us, int(s['lat'] * 1e7), int(s['lng'] * 1e7),
+                           int((HOME_ALT_M + s['alt']) * 1000), 0.8, 1.2, 5.0, 1.57, s['fix'], s['sats'])
+    if name == 'esc_status':
+        escs = b''.join(_ULOG_ESC_REPORT.pack(time_us, 0, int(4000 + 100 * s['alt']), s['volt'], s['curr'] / 4, i) for i in range(4))
+        return struct.pack('<QHBB4x', time_us, time_us // 100_000 % 65536, 4, 1) + escs
+    if name == 'battery_status':
+        return struct.pack('<QfffffB', time_us, s['volt'], s['curr'], time_us / 3.6e6 * s['curr'],
+                           (s['volt'] - 14.0) / 2.8, 25.0, 4)
+    raise ValueError(f"Unsupported synthetic ULog topic: {name}")
+
+
+def write_ulog(path: str, target_bytes: int, message_rates: dict[str, int] | None = None) -> dict:
+    """Writes a synthetic PX4 ULog of at least `target_bytes`; returns per-topic data message counts."""
+    message_rates = message_rates or ULOG_MESSAGE_RATES
+    tick_hz = max(message_rates.values())
+    counts = {name: 0 for name in message_rates}
+    subscriptions = {'vehicle_status': [0]}
+    for name in message_rates:
+        subscriptions[name] = [0, 1] if name == 'sensor_combined' else [0]
+    with open(path, 'wb') as f:
+        header = [b'ULog\x01\x12\x35\x01', struct.pack('<Q', 0), _ulog_message('B', bytes(40))]
+        header += [_ulog_message('F', f'{name}:{fields}'.encode()) for name, fields in ULOG_FORMATS.items()]
+        header.append(_ulog_key_value('I', 'char[3] sys_name', b'PX4'))
+        header.append(_ulog_key_value('I', 'uint32_t ver_sw_release', struct.pack('<I', 0x010E00FF)))
+        header.append(_ulog_key_value('I', 'char[9] ver_hw', b'PX4_FMU_V'))
+        header.append(_ulog_key_value('P', 'int32_t MAV_TYPE', struct.pack('<i', 2)))
+        header.append(_ulog_key_value('P', 'float MPC_XY_VEL_MAX', struct.pack('<f', 12.0)))
+        msg_ids = {}
+        for name, multi_ids in subscriptions.items():
+            for multi_id in multi_ids:
+                msg_ids[name, multi_id] = len(msg_ids)
+                header.append(_ulog_message('A', struct.pack('<BH', multi_id, msg_ids[name, multi_id]) + name.encode()))
+        data = b''.join(header)
+        f.write(data)
+        written = len(data)
+        tick = 0
+        last_mode = None
+        while written < target_bytes:
+            time_us = tick * 1_000_000 // tick_hz
+            s = flight_state(time_us / 1e6)
+            chunk = []
+            if s['mode'] != last_mode:
+                status = struct.pack('<HQBB', msg_ids['vehicle_status', 0], time_us, PX4_NAV_STATES[s['mode']], 2)
+                chunk.append(_ulog_message('D', status))
+                text = f"Mode changed to {MODE_NAMES[s['mode']]}".encode()
+                chunk.append(_ulog_message('L', b'6' + struct.pack('<Q', time_us) + text))
+                last_mode = s['mode']
+            for name, rate in message_rates.items():
+                if tick % (tick_hz // rate) == 0:
+                    record = _ulog_record(name, time_us, s)
+                    for multi_id in subscriptions[name]:
+                        chunk.append(_ulog_message('D', struct.pack('<H', msg_ids[name, multi_id]) + record))
+                        counts[name] += 1
+            data = b''.join(chunk)
+            f.write(data)
+            written += len(data)
+            tick += 1
+    return counts
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware 
 from server.chatbot_backend import chatbot_router
+from server.metrics import RequestMetricsMiddleware, metrics_endpoint
+from server.profiling import PROFILE_SLOW_REQUESTS_MS, SlowRequestProfilerMiddleware
 import structlog
 import logging
 import sys
@@ -41,8 +43,13 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+if PROFILE_SLOW_REQUESTS_MS > 0:
+    app.add_middleware(SlowRequestProfilerMiddleware)
+
 
 app.include_router(chatbot_router)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 if __name__ == "__main__":
     import uvicorn
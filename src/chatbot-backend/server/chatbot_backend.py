@@ -1,86 +1,171 @@
-import structlog
-import uuid
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
 import duckdb
+import structlog
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
-from server.models import ChatMessage, ChatResponse, UploadResponse
+from server.models import (ChatMessage, ChatResponse, FleetFilter, FleetLogsResponse, FleetQueryRequest, FleetQueryResponse,
+                           IngestProfile, SeriesResponse, UploadResponse, UploadJobStatus)
 from google.generativeai.types import GenerationConfig
-from server.dependencies import get_app_state, get_llm_model, get_duckdb_conn, AppState
-from server.log_parser import parse_and_store_log
-from server.duckdb_manager import drop_tables_for_log_id
+from server.dependencies import get_llm_model, get_log_store, get_session_registry, get_optional_session, get_active_session, get_db_pool, get_parse_pool, get_upload_job_registry, get_query_result_cache, get_system_prompt_cache, get_fleet_catalog
+from server.fleet import FleetCatalog
+from server.flight_summary import format_flight_summary
+from server.ingest_profile import parse_ingest_profile
+from server.jobs import JOB_CANCELLED, JOB_FAILED, JOB_SUCCEEDED, UploadJob, UploadJobRegistry
+from server.series import SERIES_DEFAULT_POINTS, SERIES_MAX_POINTS, SeriesRequestError, query_series
+from server.sessions import Session, SessionRegistry
+from server.log_store import LogStore
+from server.metrics import CHAT_DB_QUERY_ITERATIONS, UPLOAD_BYTES, time_llm_call, timed_llm_stream
+from server.parquet_bundle import BUNDLE_EXTENSION, export_log_bundle, is_bundle_filename
+from server.workers import WorkerPool, PoolSaturatedError, get_worker_cursor
+from server.prompt_cache import SystemPromptCache
+from server.query_cache import QueryResultCache
+from server.query_executor import QueryRejectedError, QueryTimeoutError, execute_llm_query
+from server.uploads import ReceivedUpload, UploadError, receive_upload
 
 logger = structlog.get_logger()
 
 chatbot_router = APIRouter(prefix='/api', tags=['api'])
 
+# ".zip" is a Parquet bundle written by /api/export_log/; it is imported without parsing.
+ALLOWED_LOG_EXTENSIONS = (".bin", ".tlog", ".log", ".px4log", ".ulg", BUNDLE_EXTENSION)
+# Upload endpoints read the multipart body themselves (see server.uploads), so describe it for the docs.
+UPLOAD_OPENAPI_EXTRA = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object",
+    "required": ["file"],
+    "properties": {"file": {"type": "string", "format": "binary"}, "ingest_profile": {"type": "string"}},
+}}}}}
+# How often the upload job event stream checks the job for changes.
+UPLOAD_JOB_EVENT_POLL_S = 0.25
 
-@chatbot_router.post("/upload_log/", response_model=UploadResponse)
-async def upload_log_file(
-    file: UploadFile = File(...),
-    app_state: AppState = Depends(get_app_state),
-    db_conn: duckdb.DuckDBPyConnection | None = Depends(get_duckdb_conn)
-):
-    """ Accepts a .bin log file, parses it, and stores the data. """
-    allowed_extensions = (".bin", ".tlog", ".log", ".px4log", ".ulg")
-    
-    if not file.filename.lower().endswith(allowed_extensions):
-        logger.warning("invalid_file_type_uploaded", filename=file.filename)
-        raise HTTPException(status_code=400, detail=f"Invalid file type. Allowed types: {', '.join(allowed_extensions)}")
-
-    app_state.reset()
-    if app_state.active_log_id and db_conn:
-        logger.info("attempting_to_drop_tables_for_old_log", old_log_id=app_state.active_log_id)
-        drop_tables_for_log_id(db_conn, app_state.active_log_id)
-
-    new_log_id = str(uuid.uuid4())
-    app_state.active_log_id = new_log_id
-    app_state.log_filename = file.filename
-
-    logger.info("processing_new_log_upload", filename=file.filename, new_log_id=new_log_id)
-    parse_result = parse_and_store_log(
-        original_file_obj=file.file, 
-        original_filename=file.filename,
-        db_conn=db_conn,
-        log_id=new_log_id
-    )
+QUERY_DB_MARKER = "QUERY DB:"
+MAX_HISTORY_MESSAGES_TO_SEND = 10
+# Database queries the model may run per chat turn, in /chat/ and /chat/stream alike; after the
+# last one it gets one more call to answer from the results.
+MAX_DB_QUERY_ATTEMPTS = 3
+MAX_DB_QUERY_ATTEMPTS_MESSAGE = "I tried to query the database multiple times but could not retrieve the information needed to answer your question. Please try rephrasing or ask something different."
+CHAT_GENERATION_CONFIG = GenerationConfig(
+    temperature=0.3,
+    top_p=0.9,
+    top_k=40,
+)
 
-    if parse_result.get("status") != "success":
-        logger.error("log_parsing_and_storage_failed", filename=file.filename, log_id=new_log_id, result=parse_result)
-        app_state.reset()
-        raise HTTPException(status_code=500, detail=f"Failed to process log file: {parse_result.get('message', 'Unknown error')}")
 
-    data_schema_summary = ""
-    if db_conn and new_log_id:
-        try:
-            tables_query = f"SELECT table_name FROM information_schema.tables WHERE table_name LIKE '{new_log_id}_%'"
-            tables_result = db_conn.execute(tables_query).fetchall()
-            
-            if tables_result:
-                schema_lines = ["Available MAVLink message tables and their columns:"]
-                for table_tuple in tables_result:
-                    full_table_name = table_tuple[0]
-                    clean_table_name = full_table_name.replace(f"{new_log_id}_", "", 1)
-                    
-                    columns_query = f"PRAGMA table_info('{full_table_name}')"
-                    columns_result = db_conn.execute(columns_query).fetchall()
-                    column_names = [col[1] for col in columns_result]
-                    
-                    schema_lines.append(f"- {clean_table_name}: {', '.join(column_names)}")
-                
-                data_schema_summary = "\n".join(schema_lines)
-        except Exception as e_schema:
-            logger.error("failed_to_generate_schema_summary_for_llm", log_id=new_log_id, error=str(e_schema), exc_info=True)
-            data_schema_summary = "Could not retrieve data schema information for the log file."
+def _validate_log_filename(filename: str):
+    if not filename.lower().endswith(ALLOWED_LOG_EXTENSIONS):
+        logger.warning("invalid_file_type_uploaded", filename=filename)
+        raise HTTPException(status_code=400, detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_LOG_EXTENSIONS)}")
+
+
+def _build_data_schema_summary(log_id: str, catalogs: list[str] | None = None, deferred_types: list[str] | None = None) -> str:
+    """Lists a log's tables and columns for the system prompt. Runs on a db pool worker."""
+    cursor = get_worker_cursor()
+    catalogs = catalogs or [log_id]
+    placeholders = ", ".join("?" for _ in catalogs)
+    # duckdb_tables() and zero-row selects only touch this log's catalog entries; the
+    # information_schema views and PRAGMA table_info scan every attached database.
+    # Logs imported from Parquet bundles hold views rather than tables.
+    tables_result = cursor.execute(
+        f"SELECT database_name, table_name FROM duckdb_tables() WHERE database_name IN ({placeholders}) AND schema_name = 'main' "
+        f"UNION ALL SELECT database_name, view_name FROM duckdb_views() WHERE NOT internal AND database_name IN ({placeholders}) AND schema_name = 'main' "
+        f"ORDER BY 2", [*catalogs, *catalogs]).fetchall()
+    if not tables_result:
+        return ""
+
+    schema_lines = ["Available MAVLink message tables and their columns:"]
+    for catalog, clean_table_name in sorted(tables_result, key=lambda row: catalogs.index(row[0])):
+        column_names = [column[0] for column in cursor.execute(f'SELECT * FROM "{catalog}".main."{clean_table_name}" LIMIT 0').description]
+        schema_lines.append(f"- {clean_table_name}: {', '.join(column_names)}")
+    if deferred_types:
+        schema_lines.append(f"These message tables were not loaded up front and are loaded automatically the first time a query names them: {', '.join(deferred_types)}")
+    return "\n".join(schema_lines)
+
+
+def _build_flight_summary_text(log_id: str) -> str:
+    """Renders the precomputed flight summary for the system prompt. Runs on a db pool worker."""
+    return format_flight_summary(get_worker_cursor(), log_id)
+
+
+def _parse_ingest_profile_field(ingest_profile: str | None, filename: str) -> IngestProfile | None:
+    if is_bundle_filename(filename):
+        # A bundle already holds the tables chosen when its source log was parsed.
+        return None
+    try:
+        return parse_ingest_profile(ingest_profile)
+    except ValueError as e_profile:
+        raise HTTPException(status_code=400, detail=str(e_profile))
 
 
+async def _receive_log_upload(request: Request, log_store: LogStore) -> tuple[ReceivedUpload, IngestProfile | None]:
+    """Streams an upload request's log file into the store's incoming directory and reads its ingest profile."""
+    try:
+        upload = await receive_upload(request, log_store.new_upload_path, validate_filename=_validate_log_filename)
+    except UploadError as e_upload:
+        raise HTTPException(status_code=400, detail=str(e_upload))
+    try:
+        profile = _parse_ingest_profile_field(upload.fields.get("ingest_profile"), upload.filename)
+    except HTTPException:
+        _remove_file(upload.path)
+        raise
+    UPLOAD_BYTES.observe(upload.size)
+    return upload, profile
+
+
+async def _load_log_into_session(session: Session, log_id: str, filename: str, db_pool: WorkerPool, log_store: LogStore,
+                                 prompt_cache: SystemPromptCache):
+    """
+    Makes a stored log the session's active log. The schema summary and system prompt are built
+    once per log and reused from `prompt_cache` by later sessions that open the same log.
+    """
+    deferred_types = log_store.deferred_types(log_id)
+    cached_prompt = prompt_cache.get(log_id, deferred_types)
+    if cached_prompt is not None:
+        data_schema_summary, base_system_prompt = cached_prompt
+        session.set_log(log_id, filename, data_schema_summary, base_system_prompt)
+        logger.info("system_instruction_set_for_llm", log_id=log_id, filename=filename, session_id=session.session_id, cached=True)
+        return
+
+    prompt_complete = True
+    try:
+        data_schema_summary = await db_pool.run(_build_data_schema_summary, log_id,
+                                                log_store.query_catalogs(log_id), deferred_types)
+    except PoolSaturatedError:
+        raise
+    except Exception as e_schema:
+        logger.error("failed_to_generate_schema_summary_for_llm", log_id=log_id, error=str(e_schema), exc_info=True)
+        data_schema_summary = "Could not retrieve data schema information for the log file."
+        prompt_complete = False
+
+    try:
+        flight_summary = await db_pool.run(_build_flight_summary_text, log_id)
+    except PoolSaturatedError:
+        raise
+    except Exception as e_summary:
+        logger.error("failed_to_format_flight_summary_for_llm", log_id=log_id, error=str(e_summary), exc_info=True)
+        flight_summary = ""
+        prompt_complete = False
+
     base_system_prompt = f"""
     You are a flight telemetry analysis assistant trained to understand and reason about parsed MAVLink logs. 
     Your primary role is to help users investigate flight data in a conversational and analytical manner.
     If telemetry is missing, incomplete, or ambiguous, explain the limitation clearly and suggest what additional data would be needed. Do not fabricate information. If you infer something, explain your reasoning.
     {data_schema_summary}
+    {flight_summary}
+    Other stored flights can be compared in one query through the fleet catalog: fleet.logs has one row per stored flight (log_id, filename, content_hash, vehicle, firmware, start_time in UTC, duration_s, message_types), and fleet.<table> (e.g. fleet.VIBE, fleet.flight_summary) unions that table across all stored logs with a leading log_id column. Use them only for questions about other or multiple flights, and filter fleet.logs first.
+    Every message table has a time_us column (microseconds on the log's clock) and is stored sorted by it; filter on time_us ranges for time windows instead of scanning whole tables.
+    Derived signals from the log viewer are available as SQL functions; use them instead of re-deriving the formulas: altitude(press_abs, ground_pressure, ground_temp) and altitude2(...) for barometric altitude in m from SCALED_PRESSURE (ground values from the GND_ABS_PRESS/GND_TEMP parameters), mag_field(x, y, z) for field strength, mag_heading(xmag, ymag, zmag, roll, pitch, yaw[, declination := deg]) with ATTITUDE radians, mag_heading_df(MagX, MagY, MagZ, Roll, Pitch, Yaw) with DataFlash ATT degrees, kmh(m_s), mag_field_ef(lat, lon) returning {{declination, inclination, intensity}}, and expected_mag(ref_lat, ref_lon, roll_deg, pitch_deg, yaw_deg) returning the expected body-frame field {{x, y, z}} in milligauss for a reference position such as the first GPS fix. lowpass and delta work on whole series in time order: SELECT unnest(lowpass(list(Alt ORDER BY time_us), 0.9)) FROM BARO.
     Use these tables and columns to understand the available data. Assume data conforms to MAVLink's common message format as defined at: https://mavlink.io/en/messages/common.html
     You may query the database using the format: QUERY DB:<Your query here>\n. If an answer cannot be resolved after 3 queries, inform the user. Be careful with how much data you are requesting. Use minimal queries wherever possible.
+    Query results come back as CSV limited to a few hundred rows; larger results are replaced by an evenly spaced sample and marked as such on the first line, so prefer aggregates (min, max, avg, count) over raw rows.
     You have access to structured telemetry such as: altitude, GPS signal quality, flight mode, battery status, RC input, servo outputs, IMU readings, system status, and mission data. Use this data to answer questions about flight behavior, performance, and anomalies.
     MAVLink reference:
     HEARTBEAT includes custom_mode (flight mode) and system_status; custom_mode must be interpreted per autopilot type.
@@ -103,6 +188,7 @@ async def upload_log_file(
     STATUSTEXT gives human-readable logs and warnings with severity level.
     COMMAND_ACK confirms command results.
     PARAM_VALUE provides parameter names and values.
+    PX4 ULog (.ulg) logs instead have one table per uORB topic (e.g. vehicle_attitude with quaternion q = [w, x, y, z], vehicle_gps_position, battery_status, vehicle_status with nav_state) plus a multi_id column for topics with several instances, and the ulog_info, ulog_parameters (name, value), ulog_logged_messages (log_level, message) and ulog_dropouts tables.
     Behavior:
     Maintain conversation state across turns.
     Respond precisely and clearly using available telemetry.
@@ -112,85 +198,493 @@ async def upload_log_file(
     When asked about anomalies, look for sudden changes in altitude, GPS inconsistency, battery overheating, RC dropout, STATUSTEXT errors, or mode changes. Start by constructing a query that you would like to run.
     """
 
-    app_state.current_system_instruction = base_system_prompt
-    logger.info("system_instruction_set_for_llm", log_id=new_log_id, filename=file.filename)
-    return UploadResponse(message="Log file uploaded, parsed, and stored successfully.", filename=app_state.log_filename, log_id=new_log_id)
+    if prompt_complete:
+        prompt_cache.put(log_id, deferred_types, data_schema_summary, base_system_prompt)
+    session.set_log(log_id, filename, data_schema_summary, base_system_prompt)
+    logger.info("system_instruction_set_for_llm", log_id=log_id, filename=filename, session_id=session.session_id, cached=False)
+
+
+@chatbot_router.get("/health")
+async def health_check(
+    db_pool: WorkerPool = Depends(get_db_pool),
+    parse_pool: WorkerPool = Depends(get_parse_pool),
+    query_cache: QueryResultCache = Depends(get_query_result_cache)
+):
+    """ Liveness probe; stays responsive while logs are being parsed. """
+    return {"status": "ok", "db_pool_pending": db_pool.pending, "parse_pool_pending": parse_pool.pending,
+            "query_cache": query_cache.stats()}
+
+
+@chatbot_router.post("/upload_log/", response_model=UploadResponse, openapi_extra=UPLOAD_OPENAPI_EXTRA)
+async def upload_log_file(
+    request: Request,
+    session: Session | None = Depends(get_optional_session),
+    session_registry: SessionRegistry = Depends(get_session_registry),
+    log_store: LogStore = Depends(get_log_store),
+    db_pool: WorkerPool = Depends(get_db_pool),
+    parse_pool: WorkerPool = Depends(get_parse_pool),
+    prompt_cache: SystemPromptCache = Depends(get_system_prompt_cache)
+):
+    """
+    Accepts a log file, parses it, and stores the data. Logs already in the store are reused without parsing,
+    and Parquet bundles from /api/export_log/ are imported as-is.
+    The log is loaded into the caller's session (X-Session-ID header), or into a new session if none is given.
+    The multipart form has the log as `file` and an optional `ingest_profile`: a preset name
+    ("full", "chat") or an IngestProfile JSON object. The file is streamed to disk and hashed as it arrives.
+    """
+    upload, profile = await _receive_log_upload(request, log_store)
+    new_log_id = log_store.log_id_for_hash(upload.content_hash, profile)
+
+    logger.info("processing_new_log_upload", filename=upload.filename, new_log_id=new_log_id, content_hash=upload.content_hash)
+    try:
+        parse_result = await run_in_threadpool(
+            log_store.ingest,
+            upload_path=upload.path,
+            filename=upload.filename,
+            content_hash=upload.content_hash,
+            keep=session_registry.active_log_ids(),
+            parse_pool=parse_pool,
+            profile=profile
+        )
+    except PoolSaturatedError as e_busy:
+        raise HTTPException(status_code=503, detail=str(e_busy))
+
+    if parse_result.get("status") != "success":
+        logger.error("log_parsing_and_storage_failed", filename=upload.filename, log_id=new_log_id, result=parse_result)
+        raise HTTPException(status_code=500, detail=f"Failed to process log file: {parse_result.get('message', 'Unknown error')}")
+
+    if session is None:
+        session = session_registry.create()
+    try:
+        await _load_log_into_session(session, new_log_id, upload.filename, db_pool, log_store, prompt_cache)
+    except PoolSaturatedError as e_busy:
+        raise HTTPException(status_code=503, detail=str(e_busy))
+    if parse_result.get("cached"):
+        upload_message = "Log file already stored; reusing parsed data."
+    elif parse_result.get("bundle"):
+        upload_message = "Parquet bundle imported and stored successfully."
+    else:
+        upload_message = "Log file uploaded, parsed, and stored successfully."
+    return UploadResponse(message=upload_message, filename=session.log_filename, log_id=new_log_id, session_id=session.session_id)
+
+
+async def _run_upload_job(job: UploadJob, upload: ReceivedUpload, profile: IngestProfile | None, session: Session,
+                          session_registry: SessionRegistry, log_store: LogStore, db_pool: WorkerPool, parse_pool: WorkerPool,
+                          prompt_cache: SystemPromptCache):
+    """Parses and stores an uploaded log in the background, recording progress on the job."""
+    job.mark_running()
+    job.start_progress_pump()
+    try:
+        if job.cancel_requested:
+            job.finish(JOB_CANCELLED, message="Log ingest was cancelled.")
+            return
+        parse_result = await run_in_threadpool(
+            log_store.ingest,
+            upload_path=upload.path,
+            filename=job.filename,
+            content_hash=upload.content_hash,
+            keep=session_registry.active_log_ids(),
+            parse_pool=parse_pool,
+            progress_queue=job.progress_queue,
+            cancel_event=job.cancel_event,
+            profile=profile
+        )
+
+        status = parse_result.get("status")
+        if status == "cancelled":
+            job.finish(JOB_CANCELLED, message=parse_result.get("message"))
+            return
+        if status != "success":
+            logger.error("log_parsing_and_storage_failed", filename=job.filename, job_id=job.job_id, result=parse_result)
+            job.finish(JOB_FAILED, message=f"Failed to process log file: {parse_result.get('message', 'Unknown error')}")
+            return
+
+        log_id = parse_result["log_id"]
+        await _load_log_into_session(session, log_id, job.filename, db_pool, log_store, prompt_cache)
+        upload_message = "Log file already stored; reusing parsed data." if parse_result.get("cached") else "Log file uploaded, parsed, and stored successfully."
+        job.finish(JOB_SUCCEEDED, message=upload_message, log_id=log_id)
+    except Exception as e:
+        logger.error("upload_job_failed", job_id=job.job_id, filename=job.filename, error=str(e), exc_info=True)
+        job.finish(JOB_FAILED, message=str(e))
+    finally:
+        await run_in_threadpool(job.stop_progress_pump)
+        # The store takes ownership of the upload once ingest starts; this only covers jobs that never got there.
+        try:
+            _remove_file(upload.path)
+        except OSError as e_os:
+            logger.warning("upload_job_upload_deletion_failed", path=upload.path, error=str(e_os))
+
+
+def _get_upload_job(job_id: str, upload_job_registry: UploadJobRegistry) -> UploadJob:
+    job = upload_job_registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found.")
+    return job
+
+
+@chatbot_router.post("/upload_jobs/", response_model=UploadJobStatus, status_code=202, openapi_extra=UPLOAD_OPENAPI_EXTRA)
+async def create_upload_job(
+    request: Request,
+    session: Session | None = Depends(get_optional_session),
+    session_registry: SessionRegistry = Depends(get_session_registry),
+    upload_job_registry: UploadJobRegistry = Depends(get_upload_job_registry),
+    log_store: LogStore = Depends(get_log_store),
+    db_pool: WorkerPool = Depends(get_db_pool),
+    parse_pool: WorkerPool = Depends(get_parse_pool),
+    prompt_cache: SystemPromptCache = Depends(get_system_prompt_cache)
+):
+    """
+    Accepts a log file, in the same form as /api/upload_log/, and returns with a job id once it
+    is on disk; parsing continues in the background.
+    Poll /api/upload_jobs/{job_id} or stream /api/upload_jobs/{job_id}/events for progress.
+    The log is loaded into the caller's session, or into the new session returned with the job.
+    """
+    upload, profile = await _receive_log_upload(request, log_store)
+    if session is None:
+        session = session_registry.create()
+    job = await run_in_threadpool(upload_job_registry.create, upload.filename, session.session_id)
+    job.task = asyncio.create_task(_run_upload_job(job, upload, profile, session, session_registry, log_store, db_pool, parse_pool, prompt_cache))
+    return UploadJobStatus(**job.snapshot())
+
+
+@chatbot_router.get("/upload_jobs/{job_id}", response_model=UploadJobStatus)
+async def get_upload_job_status(job_id: str, upload_job_registry: UploadJobRegistry = Depends(get_upload_job_registry)):
+    """ Returns the status and latest progress snapshot of an upload job. """
+    return UploadJobStatus(**_get_upload_job(job_id, upload_job_registry).snapshot())
+
+
+@chatbot_router.get("/upload_jobs/{job_id}/events")
+async def stream_upload_job_events(job_id: str, upload_job_registry: UploadJobRegistry = Depends(get_upload_job_registry)):
+    """ Server-sent events stream of job snapshots; ends after the job finishes. """
+    job = _get_upload_job(job_id, upload_job_registry)
+
+    async def events():
+        sent_version = -1
+        while True:
+            finished = job.finished
+            if job.version != sent_version:
+                sent_version = job.version
+                yield f"data: {json.dumps(job.snapshot())}\n\n"
+            if finished:
+                break
+            await asyncio.sleep(UPLOAD_JOB_EVENT_POLL_S)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@chatbot_router.delete("/upload_jobs/{job_id}", response_model=UploadJobStatus)
+async def cancel_upload_job(job_id: str, upload_job_registry: UploadJobRegistry = Depends(get_upload_job_registry)):
+    """ Requests cancellation of a running upload job; finished jobs are returned unchanged. """
+    job = _get_upload_job(job_id, upload_job_registry)
+    await run_in_threadpool(job.cancel)
+    return UploadJobStatus(**job.snapshot())
+
+
+def _read_series(log_id: str, catalogs: list[str], table: str, fields: list[str], start_us: int | None,
+                 end_us: int | None, points: int, method: str) -> dict:
+    """Runs a downsampled series read on a db pool worker."""
+    return query_series(get_worker_cursor(), catalogs, table, fields, start_us, end_us, points, method)
+
+
+@chatbot_router.get("/series", response_model=SeriesResponse)
+async def get_series(
+    table: str,
+    fields: list[str] = Query(...),
+    start_us: int | None = None,
+    end_us: int | None = None,
+    points: int = Query(default=SERIES_DEFAULT_POINTS, ge=2, le=SERIES_MAX_POINTS),
+    method: str = "minmax",
+    session: Session = Depends(get_active_session),
+    log_store: LogStore = Depends(get_log_store),
+    db_pool: WorkerPool = Depends(get_db_pool),
+    parse_pool: WorkerPool = Depends(get_parse_pool)
+):
+    """
+    Returns `fields` of a message table in the session's log between start_us and end_us
+    (default: the whole log), downsampled to about `points` samples per field with
+    min/max bucketing ("minmax") or Largest-Triangle-Three-Buckets ("lttb").
+    """
+    log_id = session.active_log_id
+    try:
+        deferred_types = log_store.deferred_types_in_query(log_id, table)
+        if deferred_types:
+            await run_in_threadpool(log_store.load_deferred_types, log_id, deferred_types, parse_pool)
+        result = await db_pool.run(_read_series, log_id, log_store.query_catalogs(log_id), table, fields,
+                                   start_us, end_us, points, method)
+    except SeriesRequestError as e_request:
+        raise HTTPException(status_code=400, detail=str(e_request))
+    except PoolSaturatedError as e_busy:
+        raise HTTPException(status_code=503, detail=str(e_busy))
+    return SeriesResponse(**result)
+
+
+def _export_bundle(catalogs: list[str], manifest: dict, out_path: str) -> dict:
+    """Writes a stored log's Parquet bundle on a db pool worker."""
+    return export_log_bundle(get_worker_cursor(), catalogs, manifest, out_path)
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+@chatbot_router.get("/export_log/")
+async def export_log(
+    session: Session = Depends(get_active_session),
+    log_store: LogStore = Depends(get_log_store),
+    db_pool: WorkerPool = Depends(get_db_pool)
+):
+    """
+    Downloads the session's log as a Parquet bundle: a zip of zstd-compressed Parquet files,
+    one per table, plus a manifest. Uploading the bundle skips parsing entirely.
+    """
+    log_id = session.active_log_id
+    fd, out_path = tempfile.mkstemp(prefix=f"{log_id}_", suffix=BUNDLE_EXTENSION)
+    os.close(fd)
+    try:
+        await db_pool.run(_export_bundle, log_store.query_catalogs(log_id), log_store.read_manifest(log_id), out_path)
+    except PoolSaturatedError as e_busy:
+        _remove_file(out_path)
+        raise HTTPException(status_code=503, detail=str(e_busy))
+    except Exception:
+        _remove_file(out_path)
+        raise
+    stem, _ = os.path.splitext(session.log_filename or log_id)
+    if stem.endswith(".parquet"):
+        stem = stem[:-len(".parquet")]
+    return FileResponse(out_path, media_type="application/zip", filename=f"{stem}.parquet{BUNDLE_EXTENSION}",
+                        background=BackgroundTask(_remove_file, out_path))
+
+
+@chatbot_router.get("/fleet/logs", response_model=FleetLogsResponse)
+async def list_fleet_logs(
+    vehicle: str | None = None,
+    firmware: str | None = None,
+    start_after: datetime | None = None,
+    start_before: datetime | None = None,
+    min_duration_s: float | None = None,
+    max_duration_s: float | None = None,
+    message_types: list[str] = Query(default=[]),
+    log_ids: list[str] | None = Query(default=None),
+    fleet: FleetCatalog = Depends(get_fleet_catalog),
+    db_pool: WorkerPool = Depends(get_db_pool)
+):
+    """ Lists stored logs and their metadata (vehicle, firmware, start time, duration, message types), filtered like /fleet/query. """
+    fleet_filter = FleetFilter(log_ids=log_ids, vehicle=vehicle, firmware=firmware, start_after=start_after, start_before=start_before,
+                               min_duration_s=min_duration_s, max_duration_s=max_duration_s, message_types=message_types)
+    try:
+        logs = await db_pool.run(fleet.list_logs, fleet_filter)
+    except PoolSaturatedError as e_busy:
+        raise HTTPException(status_code=503, detail=str(e_busy))
+    return FleetLogsResponse(logs=logs)
+
+
+@chatbot_router.post("/fleet/query", response_model=FleetQueryResponse)
+async def fleet_query(
+    request: FleetQueryRequest,
+    fleet: FleetCatalog = Depends(get_fleet_catalog),
+    db_pool: WorkerPool = Depends(get_db_pool)
+):
+    """
+    Runs one SELECT statement across every stored log whose metadata matches the request's
+    filter fields. Table names refer to that table in all matching logs, with a leading log_id
+    column; `logs` holds the matching logs' metadata. Any other kind of statement is a 400.
+    """
+    fleet_filter = FleetFilter(**request.model_dump(exclude={"sql"}))
+    try:
+        result = await db_pool.run(fleet.execute_query, request.sql, fleet_filter)
+    except PoolSaturatedError as e_busy:
+        raise HTTPException(status_code=503, detail=str(e_busy))
+    except (duckdb.Error, QueryRejectedError, QueryTimeoutError) as e_query:
+        raise HTTPException(status_code=400, detail=str(e_query))
+    return FleetQueryResponse(**result)
+
+
+def _chat_turn_messages(session: Session, user_query: str) -> list[dict]:
+    """Recent conversation history plus the new user message, as sent to the model."""
+    initial_messages_for_llm = []
+    if session.conversation_history:
+        start_index = max(0, len(session.conversation_history) - MAX_HISTORY_MESSAGES_TO_SEND)
+        initial_messages_for_llm.extend(session.conversation_history[start_index:])
+        if start_index > 0:
+            logger.info("conversation_history_truncated_for_llm_input", original_length=len(session.conversation_history), sent_length=MAX_HISTORY_MESSAGES_TO_SEND)
+    initial_messages_for_llm.append({"role": "user", "parts": [user_query]})
+    return initial_messages_for_llm
+
+
+def _extract_sql_query(bot_response_text: str) -> str:
+    query_start_index = bot_response_text.find(QUERY_DB_MARKER)
+    potential_query_block = bot_response_text[query_start_index + len(QUERY_DB_MARKER):].strip()
+    return potential_query_block.split('\n')[0].strip()
+
+
+async def _run_chat_query(session: Session, sql_query: str, user_query: str, db_pool: WorkerPool, parse_pool: WorkerPool,
+                          log_store: LogStore, query_cache: QueryResultCache, fleet: FleetCatalog) -> dict:
+    """
+    Runs a model-issued query for a chat turn. Returns the follow-up message for the model
+    ("message"), plus the query result or the error text. PoolSaturatedError is re-raised.
+    Queries over the fleet catalog see logs stored later, so their results are not cached.
+    """
+    try:
+        fleet_query = fleet.references_fleet(sql_query)
+        query_result = None if fleet_query else query_cache.get(session.active_log_id, sql_query)
+        if query_result is None:
+            deferred_types = log_store.deferred_types_in_query(session.active_log_id, sql_query)
+            if deferred_types:
+                await run_in_threadpool(log_store.load_deferred_types, session.active_log_id, deferred_types, parse_pool)
+            if fleet_query:
+                await db_pool.run(fleet.refresh)
+            query_result = await db_pool.run(execute_llm_query, session.active_log_id, sql_query,
+                                             log_store.query_catalogs(session.active_log_id))
+            if not fleet_query:
+                query_cache.put(session.active_log_id, sql_query, query_result)
+        else:
+            logger.info("db_query_cache_hit", log_id=session.active_log_id, query=sql_query)
+        query_results = query_result["text"]
+        logger.info("db_query_successful", results_preview=query_results[:200], truncated=query_result["truncated"])
+
+        message_with_db_results = f"Here are the results to your query ('{sql_query}') as CSV:\n{query_results}\nNow, using these results, please answer the original user query: '{user_query}'"
+        return {"message": message_with_db_results, "result": query_result, "error": None}
+    except PoolSaturatedError:
+        raise
+    except Exception as db_error:
+        logger.error("db_query_execution_error", query=sql_query, error=str(db_error), exc_info=True)
+        error_feedback_to_llm = f"You tried to execute the SQL query: '{sql_query}'. It failed with the following error: {str(db_error)}. Please analyze this error, correct your SQL query, and try again using the 'QUERY DB:' prefix."
+        return {"message": error_feedback_to_llm, "result": None, "error": str(db_error)}
 
 
 @chatbot_router.post("/chat/", response_model=ChatResponse)
 async def chat_endpoint(
     chat_message: ChatMessage,
-    app_state: AppState = Depends(get_app_state),
+    session: Session = Depends(get_active_session),
     llm_model = Depends(get_llm_model),
-    db_conn: duckdb.DuckDBPyConnection | None = Depends(get_duckdb_conn)
+    db_pool: WorkerPool = Depends(get_db_pool),
+    parse_pool: WorkerPool = Depends(get_parse_pool),
+    log_store: LogStore = Depends(get_log_store),
+    query_cache: QueryResultCache = Depends(get_query_result_cache),
+    fleet: FleetCatalog = Depends(get_fleet_catalog)
 ):
-    """ Handles user queries about the currently loaded log file. """
+    """ Handles user queries about the log file loaded in the caller's session. """
     user_query = chat_message.message
     try:
-        generation_config = GenerationConfig(
-            temperature=0.3,
-            top_p=0.9,
-            top_k=40,
-        )
-        
-        if not app_state.active_log_id or not app_state.current_system_instruction:
-            logger.warning("chat_attempt_with_no_active_log_or_system_instruction")
-            raise HTTPException(status_code=400, detail="No log file is currently active or system prompt not set. Please upload a log first.")
-
-        initial_messages_for_llm = []
-        MAX_HISTORY_MESSAGES_TO_SEND = 10
-        if app_state.conversation_history:
-            start_index = max(0, len(app_state.conversation_history) - MAX_HISTORY_MESSAGES_TO_SEND)
-            initial_messages_for_llm.extend(app_state.conversation_history[start_index:])
-            if start_index > 0:
-                logger.info("conversation_history_truncated_for_llm_input", original_length=len(app_state.conversation_history), sent_length=MAX_HISTORY_MESSAGES_TO_SEND)
-        initial_messages_for_llm.append({"role": "user", "parts": [user_query]})
-
         # This list will hold messages specifically for the current turn, especially within the DB query loop
-        current_turn_messages = list(initial_messages_for_llm) 
+        current_turn_messages = _chat_turn_messages(session, user_query)
         # Limit the number of DB query attempts
         db_query_attempts = 0
-        max_db_query_attempts = 3
-
-        while db_query_attempts < max_db_query_attempts:
-            response = await llm_model.generate_content_async(
-                contents=current_turn_messages, 
-                generation_config=generation_config
-            )
-            print(response)
+
+        while True:
+            with time_llm_call("chat"):
+                response = await llm_model.generate_content_async(
+                    contents=current_turn_messages,
+                    generation_config=CHAT_GENERATION_CONFIG
+                )
             bot_response_text = response.text
             logger.info("llm_response_received", attempt=db_query_attempts + 1, response_preview=f"{bot_response_text[:200]}...")
-            if "QUERY DB:" in bot_response_text:
-                db_query_attempts += 1
-                try:
-                    query_marker = "QUERY DB:"
-                    query_start_index = bot_response_text.find(query_marker)
-                    potential_query_block = bot_response_text[query_start_index + len(query_marker):].strip()
-                    sql_query = potential_query_block.split('\n')[0].strip()
-                    print("sql: ", sql_query)
-                    logger.info("extracted_sql_query", query=sql_query)
-                    query_results = db_conn.execute(sql_query).fetchall()
-                    print(query_results)
-                    logger.info("db_query_successful", results_preview=str(query_results)[:200])
-
-                    message_with_db_results = f"Here are the results to your query ('{sql_query}'): {query_results}. Now, using these results, please answer the original user query: '{user_query}'"
-                    current_turn_messages.append({"role": "user", "parts": [message_with_db_results]}) 
-
-                except Exception as db_error:
-                    logger.error("db_query_execution_error", query=sql_query if 'sql_query' in locals() else "unknown_query", error=str(db_error), exc_info=True)
-                    error_feedback_to_llm = f"You tried to execute the SQL query: '{sql_query if 'sql_query' in locals() else 'previous query attempt'}'. It failed with the following error: {str(db_error)}. Please analyze this error, correct your SQL query, and try again using the 'QUERY DB:' prefix."
-                    current_turn_messages.append({"role": "user", "parts": [error_feedback_to_llm]}) 
-            else:
+            if QUERY_DB_MARKER not in bot_response_text:
                 break
-        else:
-            if "QUERY DB:" in bot_response_text:
-                logger.warning("max_db_query_attempts_reached_llm_still_trying_to_query", log_id=app_state.active_log_id)
-                bot_response_text = "I tried to query the database multiple times but could not retrieve the information needed to answer your question. Please try rephrasing or ask something different."
+            if db_query_attempts == MAX_DB_QUERY_ATTEMPTS:
+                logger.warning("max_db_query_attempts_reached_llm_still_trying_to_query", log_id=session.active_log_id, session_id=session.session_id)
+                bot_response_text = MAX_DB_QUERY_ATTEMPTS_MESSAGE
+                break
+            db_query_attempts += 1
+            sql_query = _extract_sql_query(bot_response_text)
+            logger.info("extracted_sql_query", query=sql_query)
+            query_outcome = await _run_chat_query(session, sql_query, user_query, db_pool, parse_pool, log_store, query_cache, fleet)
+            current_turn_messages.append({"role": "user", "parts": [query_outcome["message"]]})
+        CHAT_DB_QUERY_ITERATIONS.labels(endpoint="chat").observe(db_query_attempts)
 
-        app_state.conversation_history.append({"role": "user", "parts": [user_query]})
-        app_state.conversation_history.append({"role": "model", "parts": [bot_response_text]})
+        session.conversation_history.append({"role": "user", "parts": [user_query]})
+        session.conversation_history.append({"role": "model", "parts": [bot_response_text]})
 
+    except PoolSaturatedError as e_busy:
+        raise HTTPException(status_code=503, detail=str(e_busy))
     except Exception as e:
         logger.error("llm_interaction_error", error=str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error communicating with LLM: {str(e)}")
-    return ChatResponse(response=bot_response_text)
\ No newline at end of file
+    return ChatResponse(response=bot_response_text)
+
+
+def _sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@chatbot_router.post("/chat/stream")
+async def chat_stream_endpoint(
+    chat_message: ChatMessage,
+    session: Session = Depends(get_active_session),
+    llm_model = Depends(get_llm_model),
+    db_pool: WorkerPool = Depends(get_db_pool),
+    parse_pool: WorkerPool = Depends(get_parse_pool),
+    log_store: LogStore = Depends(get_log_store),
+    query_cache: QueryResultCache = Depends(get_query_result_cache),
+    fleet: FleetCatalog = Depends(get_fleet_catalog)
+):
+    """
+    Server-sent events version of /chat/. Model text is forwarded as `token` events as it
+    arrives. Once a streamed response contains a complete `QUERY DB:` line, the rest of that
+    response is dropped and the query runs at once, reported through `status` events, before
+    the model is called again with the results. Ends with a `done` event carrying the final
+    answer, or an `error` event.
+    """
+    user_query = chat_message.message
+
+    async def events():
+        try:
+            current_turn_messages = _chat_turn_messages(session, user_query)
+            db_queries_run = 0
+            while True:
+                response_call = llm_model.generate_content_async(
+                    contents=current_turn_messages,
+                    generation_config=CHAT_GENERATION_CONFIG,
+                    stream=True
+                )
+                bot_response_text, emitted, query_complete = "", 0, False
+                async with contextlib.aclosing(timed_llm_stream("chat_stream", response_call)) as chunks:
+                    async for chunk in chunks:
+                        bot_response_text += chunk.text
+                        marker_index = bot_response_text.find(QUERY_DB_MARKER)
+                        # Hold back a tail that could be the start of a marker split across chunks.
+                        safe_end = marker_index if marker_index != -1 else len(bot_response_text) - len(QUERY_DB_MARKER) + 1
+                        if safe_end > emitted:
+                            yield _sse_event("token", {"text": bot_response_text[emitted:safe_end]})
+                            emitted = safe_end
+                        if marker_index != -1 and "\n" in bot_response_text[marker_index + len(QUERY_DB_MARKER):].lstrip():
+                            query_complete = True
+                            break
+                logger.info("llm_response_received", attempt=db_queries_run + 1, streamed=True, query_complete=query_complete,
+                            response_preview=f"{bot_response_text[:200]}...")
+
+                if QUERY_DB_MARKER not in bot_response_text:
+                    if len(bot_response_text) > emitted:
+                        yield _sse_event("token", {"text": bot_response_text[emitted:]})
+                    break
+                if db_queries_run == MAX_DB_QUERY_ATTEMPTS:
+                    logger.warning("max_db_query_attempts_reached_llm_still_trying_to_query", log_id=session.active_log_id, session_id=session.session_id)
+                    bot_response_text = MAX_DB_QUERY_ATTEMPTS_MESSAGE
+                    yield _sse_event("token", {"text": bot_response_text})
+                    break
+
+                sql_query = _extract_sql_query(bot_response_text)
+                logger.info("extracted_sql_query", query=sql_query)
+                yield _sse_event("status", {"stage": "query_started", "query": sql_query})
+                db_queries_run += 1
+                query_outcome = await _run_chat_query(session, sql_query, user_query, db_pool, parse_pool, log_store, query_cache, fleet)
+                if query_outcome["error"] is None:
+                    query_result = query_outcome["result"]
+                    yield _sse_event("status", {"stage": "query_finished", "query": sql_query, "rows": len(query_result["rows"]),
+                                                "total_rows": query_result["total_rows"], "truncated": query_result["truncated"]})
+                else:
+                    yield _sse_event("status", {"stage": "query_failed", "query": sql_query, "error": query_outcome["error"]})
+                current_turn_messages.append({"role": "user", "parts": [query_outcome["message"]]})
+            CHAT_DB_QUERY_ITERATIONS.labels(endpoint="chat_stream").observe(db_queries_run)
+
+            session.conversation_history.append({"role": "user", "parts": [user_query]})
+            session.conversation_history.append({"role": "model", "parts": [bot_response_text]})
+            yield _sse_event("done", {"response": bot_response_text})
+        except PoolSaturatedError as e_busy:
+            yield _sse_event("error", {"status_code": 503, "detail": str(e_busy)})
+        except Exception as e:
+            logger.error("llm_interaction_error", error=str(e), streamed=True, exc_info=True)
+            yield _sse_event("error", {"status_code": 500, "detail": f"Error communicating with LLM: {str(e)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,204 @@
+import array
+
+import numpy as np
+import pyarrow as pa
+from pymavlink import DFReader
+
+from server.time_index import TIME_COLUMN
+
+# ArduPilot logs the "M" flight-mode field as uint8_t, but pymavlink unpacks it as a signed
+# byte. Formats are built from this table as logs are read, by the serial and range readers alike.
+DFReader.FORMAT_TO_STRUCT["M"] = ("B", None, int)
+
+# Arrow types of DataFlash FMT format characters, after pymavlink applies multipliers
+# (c, C, e, E and L become floats). Strings and arrays are converted from Python lists.
+DATAFLASH_ARROW_TYPES = {
+    "b": pa.int8(), "B": pa.uint8(), "h": pa.int16(), "H": pa.uint16(),
+    "i": pa.int32(), "I": pa.uint32(), "q": pa.int64(), "Q": pa.uint64(),
+    "f": pa.float32(), "g": pa.float32(), "d": pa.float64(),
+    "c": pa.float64(), "C": pa.float64(), "e": pa.float64(), "E": pa.float64(), "L": pa.float64(),
+    "M": pa.uint8(), "n": pa.string(), "N": pa.string(), "Z": pa.string(), "a": pa.list_(pa.int16()),
+}
+
+# Arrow types of MAVLink XML field types; arrays of numeric types become lists.
+MAVLINK_ARROW_TYPES = {
+    "int8_t": pa.int8(), "uint8_t": pa.uint8(), "int16_t": pa.int16(), "uint16_t": pa.uint16(),
+    "int32_t": pa.int32(), "uint32_t": pa.uint32(), "int64_t": pa.int64(), "uint64_t": pa.uint64(),
+    "float": pa.float32(), "double": pa.float64(), "char": pa.string(),
+}
+
+# array.array typecodes that buffer fixed-width Arrow types without boxing each value.
+_ARRAY_TYPECODES = {
+    pa.int8(): 'b', pa.uint8(): 'B', pa.int16(): 'h', pa.uint16(): 'H',
+    pa.int32(): 'i', pa.uint32(): 'I', pa.int64(): 'q', pa.uint64(): 'Q',
+    pa.float32(): 'f', pa.float64(): 'd',
+}
+
+
+def typecode_for(value) -> str | None:
+    """Returns the array.array typecode used to buffer a field, or None for a plain list."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return 'q'
+    if isinstance(value, float):
+        return 'd'
+    return None
+
+
+def dataflash_column_types(fmt) -> dict[str, pa.DataType]:
+    """Arrow types of a DataFlash message's columns, from its FMT definition."""
+    types = {}
+    for column, format_char in zip(fmt.columns, fmt.format):
+        arrow_type = DATAFLASH_ARROW_TYPES.get(format_char)
+        if arrow_type is not None:
+            types[column] = arrow_type
+    if fmt.name == "FILE":
+        # pymavlink returns FILE contents as raw bytes.
+        types.pop("Data", None)
+    return types
+
+
+def mavlink_column_types(msg) -> dict[str, pa.DataType]:
+    """Arrow types of a MAVLink message's fields, from the dialect's field types and array lengths."""
+    array_lengths = dict(zip(msg.ordered_fieldnames, msg.array_lengths))
+    types = {}
+    for field, field_type in zip(msg.fieldnames, msg.fieldtypes):
+        # e.g. HEARTBEAT's "uint8_t_mavlink_version"
+        arrow_type = MAVLINK_ARROW_TYPES.get(field_type) or MAVLINK_ARROW_TYPES.get(field_type.split("_t_")[0] + "_t")
+        if arrow_type is None:
+            continue
+        if array_lengths.get(field) and field_type != "char":
+            arrow_type = pa.list_(arrow_type)
+        types[field] = arrow_type
+    return types
+
+
+def message_column_types(msg) -> dict[str, pa.DataType]:
+    """Declared Arrow column types of a decoded DataFlash or MAVLink message; empty if unknown."""
+    fmt = getattr(msg, "fmt", None)
+    if fmt is not None:
+        return dataflash_column_types(fmt)
+    if hasattr(msg, "fieldtypes"):
+        return mavlink_column_types(msg)
+    return {}
+
+
+def table_name_for(msg_type: str) -> str:
+    # Sanitize table name slightly, though mavpackettype is usually safe
+    return f"{msg_type.replace('-', '_').replace('.', '_')}"
+
+
+class MessageTypeBuffer:
+    """
+    Per-message-type column buffers, keyed by the message's field list.
+
+    `column_types` are the Arrow types declared for the fields by the log format (see
+    message_column_types); fixed-width fields are buffered in matching array.array
+    typecodes and handed to Arrow without a copy. Undeclared fields are typed from their
+    first value.
+
+    `time_sorted` stays True while the `time_us` values appended so far (across
+    clears) never decrease, so already ordered tables need no sort after ingest.
+    """
+    def __init__(self, msg_type: str, fieldnames: list[str], column_types: dict[str, pa.DataType] | None = None):
+        self.msg_type = msg_type
+        self.table_name = table_name_for(msg_type)
+        self.fieldnames = list(fieldnames)
+        self.column_types = {TIME_COLUMN: pa.int64(), **(column_types or {})}
+        self.columns: dict[str, array.array | list] = {}
+        self.num_rows = 0
+        self.time_sorted = True
+        self.first_time_us: int | None = None
+        self.last_time_us: int | None = None
+
+    def _track_time(self, time_us: int | None):
+        if time_us is None:
+            return
+        if self.first_time_us is None:
+            self.first_time_us = time_us
+        elif time_us < self.last_time_us:
+            self.time_sorted = False
+        self.last_time_us = time_us
+
+    def append(self, values: dict):
+        if not self.columns:
+            for name in self.fieldnames:
+                declared = self.column_types.get(name)
+                typecode = _ARRAY_TYPECODES.get(declared) if declared is not None else typecode_for(values.get(name))
+                self.columns[name] = array.array(typecode) if typecode else []
+        for name in self.fieldnames:
+            column = self.columns[name]
+            value = values.get(name)
+            try:
+                column.append(value)
+            except (TypeError, OverflowError):
+                # The field did not fit the typed buffer (e.g. None, uint64 overflow);
+                # fall back to a generic list for the rest of this batch.
+                column = self.columns[name] = column.tolist()
+                column.append(value)
+        self.num_rows += 1
+        self._track_time(values.get(TIME_COLUMN))
+
+    def extend(self, other: "MessageTypeBuffer"):
+        """Appends the rows of another buffer of the same message type."""
+        if other.num_rows == 0:
+            return
+        if other.first_time_us is not None:
+            self._track_time(other.first_time_us)
+            self.time_sorted = self.time_sorted and other.time_sorted
+            self.last_time_us = other.last_time_us
+        if not self.columns:
+            self.columns = other.columns
+            self.num_rows = other.num_rows
+            return
+        for name in self.fieldnames:
+            column = self.columns[name]
+            other_column = other.columns.get(name)
+            if other_column is None:
+                other_column = [None] * other.num_rows
+            if isinstance(column, array.array) and isinstance(other_column, array.array) \
+                    and column.typecode == other_column.typecode:
+                column.extend(other_column)
+                continue
+            if isinstance(column, array.array):
+                column = self.columns[name] = column.tolist()
+            column.extend(other_column)
+        self.num_rows += other.num_rows
+
+    def fill_missing_time(self, time_us: int):
+        """
+        Sets `time_us` on rows that have none. A TimeNormalizer only returns None before the
+        first timestamp it sees, so such rows are a prefix of the buffer.
+        """
+        column = self.columns.get(TIME_COLUMN)
+        if not isinstance(column, list) or column[0] is not None:
+            return
+        self.columns[TIME_COLUMN] = array.array('q', (time_us if value is None else value for value in column))
+        if self.first_time_us is None:
+            self.last_time_us = time_us
+        elif time_us > self.first_time_us:
+            self.time_sorted = False
+        self.first_time_us = time_us
+
+    def clear(self):
+        self.columns = {}
+        self.num_rows = 0
+
+    def _arrow_column(self, name: str) -> pa.Array:
+        column = self.columns[name]
+        if isinstance(column, array.array):
+            # Wraps the array's memory; valid until the buffer is cleared.
+            return pa.array(np.frombuffer(column, dtype=column.typecode))
+        declared = self.column_types.get(name)
+        if declared is not None:
+            try:
+                return pa.array(column, type=declared)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                # Values that do not fit the declared type (e.g. undecodable strings); let Arrow infer.
+                pass
+        return pa.array(column)
+
+    def to_arrow(self) -> pa.Table:
+        """The buffered rows as an Arrow table, one typed column per field."""
+        return pa.Table.from_arrays([self._arrow_column(name) for name in self.fieldnames], names=self.fieldnames)
@@ -1,52 +1,88 @@
+import os
+
 import structlog
-from fastapi import HTTPException
-from typing import Any
-import duckdb
+from fastapi import HTTPException, Header, Depends
 
 from server.gemini_helper import GeminiClient
-from server.duckdb_manager import DuckDBManager
+from server.duckdb_manager import DuckDBManager, on_log_tables_dropped
+from server.fleet import FleetCatalog
+from server.jobs import UploadJobRegistry
+from server.log_store import LogStore
+from server.mavextra import create_mavextra_macros, register_mavextra_functions
+from server.prompt_cache import SystemPromptCache
+from server.query_cache import QueryResultCache
+from server.sessions import Session, SessionRegistry
+from server.stub_llm import StubLLMClient
+from server.workers import WorkerPool, create_db_pool, create_parse_pool
 
 
 logger = structlog.get_logger()
 duckdb_manager = DuckDBManager()
+log_store = LogStore(duckdb_manager.get_connection())
+fleet_catalog = FleetCatalog(log_store)
+session_registry = SessionRegistry()
+upload_job_registry = UploadJobRegistry()
+register_mavextra_functions(duckdb_manager.get_connection())
+db_pool = create_db_pool(duckdb_manager.get_connection(), setup_cursor=create_mavextra_macros)
+parse_pool = create_parse_pool()
+query_result_cache = QueryResultCache()
+on_log_tables_dropped(query_result_cache.invalidate_log)
+system_prompt_cache = SystemPromptCache()
+on_log_tables_dropped(system_prompt_cache.invalidate_log)
+
+
+# "gemini" talks to the Gemini API; "stub" answers locally, for offline runs and benchmarks.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+llm_client = StubLLMClient() if LLM_BACKEND == "stub" else GeminiClient()
+
+def get_session_registry() -> SessionRegistry:
+    """Dependency function to get the shared session registry."""
+    return session_registry
 
+def get_upload_job_registry() -> UploadJobRegistry:
+    """Dependency function to get the registry of background upload jobs."""
+    return upload_job_registry
 
-gemini_client = GeminiClient()
+def get_optional_session(x_session_id: str | None = Header(default=None)) -> Session | None:
+    """Dependency function to get the caller's session, if the X-Session-ID header names a live one."""
+    return session_registry.get(x_session_id)
 
-class AppState:
-    """Simple class to hold application state."""
-    def __init__(self):
-        self.active_log_id: str | None = None
-        self.log_filename: str | None = None      
-        self.conversation_history: list[dict[str, any]] = [] 
-        self.current_system_instruction: str | None = None
+def get_active_session(session: Session | None = Depends(get_optional_session)) -> Session:
+    """Dependency function to get the caller's session, which must have a log loaded."""
+    if session is None or not session.active_log_id or not session.current_system_instruction:
+        logger.warning("chat_attempt_with_no_active_log_or_system_instruction")
+        raise HTTPException(status_code=400, detail="No log file is currently active or system prompt not set. Please upload a log first.")
+    return session
 
-    def reset(self):
-        """Resets the state, typically when a new log is uploaded."""
-        self.active_log_id = None
-        self.log_filename = None
-        self.conversation_history = []
-        self.current_system_instruction = None
-        logger.info("app_state_reset")
+def get_db_pool() -> WorkerPool:
+    """Dependency function to get the thread pool that runs DuckDB queries."""
+    return db_pool
 
-app_state = AppState()
+def get_parse_pool() -> WorkerPool:
+    """Dependency function to get the process pool that parses uploaded logs."""
+    return parse_pool
 
-def get_app_state() -> AppState:
-    """Dependency function to get the shared AppState instance."""
-    return app_state
+def get_query_result_cache() -> QueryResultCache:
+    """Dependency function to get the cache of chat query results."""
+    return query_result_cache
 
-def get_duckdb_conn() -> duckdb.DuckDBPyConnection | None:
-    """Dependency function to get the DuckDB connection."""
-    conn = duckdb_manager.get_connection()
-    if conn is None:
-        logger.error("duckdb_connection_not_available_dependency")
-    return conn
+def get_system_prompt_cache() -> SystemPromptCache:
+    """Dependency function to get the per-log cache of schema summaries and system prompts."""
+    return system_prompt_cache
 
-def get_llm_model():
+def get_log_store() -> LogStore:
+    """Dependency function to get the persistent log store."""
+    return log_store
+
+def get_fleet_catalog() -> FleetCatalog:
+    """Dependency function to get the catalog that spans every stored log."""
+    return fleet_catalog
+
+def get_llm_model(session: Session = Depends(get_active_session)):
     """Dependency function to get the initialized LLM model."""
-    model = gemini_client.get_model(system_instruction=app_state.current_system_instruction)
-    
+    model = llm_client.get_model(system_instruction=session.current_system_instruction)
+
     if not model:
-        logger.error("llm_model_not_available_or_creation_failed", model_name=gemini_client.model_name)
+        logger.error("llm_model_not_available_or_creation_failed", model_name=llm_client.model_name)
         raise HTTPException(status_code=503, detail="LLM service is not configured or available.")
-    return model
\ No newline at end of file
+    return model
@@ -1,3 +1,5 @@
+from typing import Callable
+
 import duckdb
 import structlog
 
@@ -24,15 +26,26 @@ class DuckDBManager:
             self.connection.close()
             logger.info("duckdb_connection_closed")
 
+_drop_listeners: list[Callable[[str], None]] = []
+
+
+def on_log_tables_dropped(callback: Callable[[str], None]):
+    """Registers `callback(log_id)` to run after a log's tables are dropped, e.g. to invalidate caches."""
+    _drop_listeners.append(callback)
+
+
 def drop_tables_for_log_id(conn: duckdb.DuckDBPyConnection, log_id: str):
-    """Drops all tables associated with a given log_id."""
+    """Drops all tables associated with a given log_id by detaching the log's database."""
     if not conn or not log_id:
         return
     try:
-        tables = conn.execute(f"SELECT table_name FROM information_schema.tables WHERE table_name LIKE '{log_id}_%'").fetchall()
+        tables = conn.execute("SELECT table_name FROM information_schema.tables WHERE table_catalog = ?", [log_id]).fetchall()
+        if conn.execute("SELECT current_database()").fetchone()[0] == log_id:
+            conn.execute("USE memory")
+        conn.execute(f'DETACH DATABASE IF EXISTS "{log_id}"')
         for table_name_tuple in tables:
-            table_name = table_name_tuple[0]
-            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-            logger.info("duckdb_table_dropped_via_manager", table_name=table_name, log_id=log_id)
+            logger.info("duckdb_table_dropped_via_manager", table_name=table_name_tuple[0], log_id=log_id)
+        for callback in _drop_listeners:
+            callback(log_id)
     except Exception as e:
         logger.error("duckdb_error_dropping_tables_via_manager", log_id=log_id, error=str(e), exc_info=True)
\ No newline at end of file
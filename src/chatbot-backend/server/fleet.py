@@ -0,0 +1,273 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import duckdb
+import structlog
+
+from server.flight_summary import FLIGHT_EVENTS_TABLE, FLIGHT_SUMMARY_TABLE, log_metadata
+from server.ingest_profile import profile_fingerprint
+from server.log_store import LogStore
+from server.mavextra import create_mavextra_macros
+from server.metrics import observe_sql_query
+from server.models import FleetFilter, IngestProfile
+from server.parquet_bundle import source_content_hash, source_profile
+from server.query_executor import check_read_only, run_budgeted_query
+from server.workers import use_log
+
+logger = structlog.get_logger()
+
+FLEET_CATALOG = "fleet"
+FLEET_LOGS_TABLE = "logs"
+FLEET_QUERY_MAX_ROWS = int(os.getenv("FLEET_QUERY_MAX_ROWS", "5000"))
+FLEET_QUERY_MAX_BYTES = int(os.getenv("FLEET_QUERY_MAX_BYTES", str(4 * 1024 * 1024)))
+FLEET_QUERY_TIMEOUT_S = float(os.getenv("FLEET_QUERY_TIMEOUT_S", "30"))
+
+# A reference to the fleet catalog, e.g. fleet.VIBE or "fleet".logs, in a chat query.
+_FLEET_REFERENCE = re.compile(rf'(?<![\w."])"?{FLEET_CATALOG}"?\s*\.', re.IGNORECASE)
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """fleet.logs stores start times as UTC TIMESTAMPs; naive inputs are taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _copy_preference(manifest: dict) -> tuple[bool, bool]:
+    """Sort key among stored copies of one source file: full-profile copies first, parsed logs before bundles."""
+    profile = source_profile(manifest)
+    full_profile = profile_fingerprint(IngestProfile(**profile) if profile else None) is None
+    return not full_profile, manifest.get("bundle") is not None
+
+
+def _union_sql(table: str, sources: list[tuple[str, str]]) -> str:
+    # BY NAME lines up columns that differ between firmware versions; missing ones are NULL.
+    return " UNION ALL BY NAME ".join(
+        f'SELECT {_sql_string(log_id)} AS log_id, * FROM "{catalog}".main."{table}"' for log_id, catalog in sources)
+
+
+class FleetCatalog:
+    """
+    Makes every stored log queryable at once through the `fleet` catalog on the shared
+    connection. `fleet.logs` holds one row of metadata per log (source content hash, vehicle,
+    firmware, UTC start time, duration, message types), and `fleet.<TABLE>` is a view over
+    that table in every log that has it, with a leading log_id column.
+
+    A file stored more than once (under another ingest profile, or re-imported as an export
+    bundle) is one flight: only its preferred copy, the full-profile one, is included.
+
+    The catalog is rebuilt lazily: storing or evicting a log only marks it stale, and the next
+    fleet query refreshes it, attaching any stored logs that are not attached yet.
+    """
+    def __init__(self, log_store: LogStore):
+        self.log_store = log_store
+        self._lock = threading.Lock()
+        self._generation = 1
+        self._built_generation = 0
+        # Table name -> [(log_id, catalog)] of the logs each fleet view unions.
+        self._sources: dict[str, list[tuple[str, str]]] = {}
+        cursor = log_store.conn.cursor()
+        try:
+            cursor.execute(f"ATTACH ':memory:' AS {FLEET_CATALOG}")
+            cursor.execute(f"""
+                CREATE TABLE {FLEET_CATALOG}.main.{FLEET_LOGS_TABLE} (
+                    log_id VARCHAR, filename VARCHAR, content_hash VARCHAR, vehicle VARCHAR, firmware VARCHAR,
+                    start_time TIMESTAMP, duration_s DOUBLE, time_us_min BIGINT, time_us_max BIGINT,
+                    message_types VARCHAR[]
+                )
+            """)
+        finally:
+            cursor.close()
+        log_store.on_log_stored(self._mark_stale)
+        log_store.on_log_evicted(self._mark_stale)
+
+    def _mark_stale(self, log_id: str):
+        self._generation += 1
+
+    @staticmethod
+    def references_fleet(sql_query: str) -> bool:
+        return _FLEET_REFERENCE.search(sql_query) is not None
+
+    def _metadata(self, cursor: duckdb.DuckDBPyConnection, log_id: str) -> dict:
+        """The log's metadata from its manifest; logs stored before it was recorded get it computed once."""
+        metadata = self.log_store.read_manifest(log_id).get("metadata")
+        if metadata is None:
+            use_log(cursor, log_id)
+            metadata = log_metadata(cursor)
+            self.log_store.update_manifest(log_id, metadata=metadata)
+            logger.info("fleet_metadata_backfilled", log_id=log_id)
+        return metadata
+
+    def _table_sources(self, cursor: duckdb.DuckDBPyConnection, log_ids: list[str]) -> dict[str, list[tuple[str, str]]]:
+        catalogs = {catalog: log_id for log_id in log_ids for catalog in self.log_store.query_catalogs(log_id)}
+        if not catalogs:
+            return {}
+        placeholders = ", ".join("?" for _ in catalogs)
+        rows = cursor.execute(
+            f"SELECT database_name, table_name FROM duckdb_tables() WHERE database_name IN ({placeholders}) AND schema_name = 'main' "
+            f"UNION ALL SELECT database_name, view_name FROM duckdb_views() WHERE NOT internal AND database_name IN ({placeholders}) "
+            f"AND schema_name = 'main' ORDER BY 2, 1", [*catalogs, *catalogs]).fetchall()
+        sources: dict[str, list[tuple[str, str]]] = {}
+        for catalog, table in rows:
+            if table != FLEET_LOGS_TABLE:
+                sources.setdefault(table, []).append((catalogs[catalog], catalog))
+        return sources
+
+    def refresh(self):
+        """Brings fleet.logs and the fleet views up to date with the store. Runs on a db pool worker."""
+        if self._built_generation == self._generation:
+            return
+        with self._lock:
+            generation = self._generation
+            if self._built_generation == generation:
+                return
+            started = time.perf_counter()
+            cursor = self.log_store.conn.cursor()
+            try:
+                manifests, copies = {}, {}
+                for log_id in self.log_store.stored_log_ids():
+                    manifests[log_id] = self.log_store.read_manifest(log_id)
+                    copies.setdefault(source_content_hash(manifests[log_id]) or log_id, []).append(log_id)
+                log_ids, metadata = [], {}
+                for content_hash, copy_ids in copies.items():
+                    # Try copies in order of preference, falling back if one cannot be attached.
+                    for log_id in sorted(copy_ids, key=lambda copy_id: (_copy_preference(manifests[copy_id]), copy_id)):
+                        try:
+                            self.log_store.attach(log_id, touch=False)
+                            metadata[log_id] = self._metadata(cursor, log_id)
+                        except (duckdb.Error, OSError) as e_attach:
+                            # Evicted or half-written since the directory was listed.
+                            logger.warning("fleet_log_skipped", log_id=log_id, error=str(e_attach))
+                            continue
+                        if len(copy_ids) > 1:
+                            logger.info("fleet_duplicate_logs_skipped", log_id=log_id, content_hash=content_hash,
+                                        skipped=[copy_id for copy_id in copy_ids if copy_id != log_id])
+                        log_ids.append(log_id)
+                        break
+                log_ids.sort()
+                sources = self._table_sources(cursor, log_ids)
+
+                types_by_log: dict[str, list[str]] = {log_id: [] for log_id in log_ids}
+                for table, table_sources in sources.items():
+                    if table not in (FLIGHT_SUMMARY_TABLE, FLIGHT_EVENTS_TABLE):
+                        for log_id, _ in table_sources:
+                            types_by_log[log_id].append(table)
+                rows = []
+                for log_id in log_ids:
+                    start_time = metadata[log_id].get("start_time")
+                    rows.append((log_id, manifests[log_id].get("filename"), source_content_hash(manifests[log_id]),
+                                 metadata[log_id].get("vehicle"), metadata[log_id].get("firmware"),
+                                 _utc_naive(datetime.fromisoformat(start_time)) if start_time else None,
+                                 metadata[log_id].get("duration_s"), metadata[log_id].get("time_us_min"),
+                                 metadata[log_id].get("time_us_max"), types_by_log[log_id]))
+
+                cursor.execute("BEGIN TRANSACTION")
+                try:
+                    cursor.execute(f"DELETE FROM {FLEET_CATALOG}.main.{FLEET_LOGS_TABLE}")
+                    if rows:
+                        cursor.executemany(f"INSERT INTO {FLEET_CATALOG}.main.{FLEET_LOGS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    for table in self._sources.keys() - sources.keys():
+                        cursor.execute(f'DROP VIEW IF EXISTS {FLEET_CATALOG}.main."{table}"')
+                    for table, table_sources in sources.items():
+                        cursor.execute(f'CREATE OR REPLACE VIEW {FLEET_CATALOG}.main."{table}" AS {_union_sql(table, table_sources)}')
+                    cursor.execute("COMMIT")
+                except duckdb.Error:
+                    cursor.execute("ROLLBACK")
+                    raise
+            finally:
+                cursor.close()
+            self._sources = sources
+            self._built_generation = generation
+        logger.info("fleet_catalog_refreshed", logs=len(log_ids), views=len(sources),
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+
+    def select_log_ids(self, cursor: duckdb.DuckDBPyConnection, fleet_filter: FleetFilter) -> list[str]:
+        """Ids of the logs in fleet.logs whose metadata matches every field set on `fleet_filter`."""
+        conditions, params = [], []
+        if fleet_filter.log_ids is not None:
+            conditions.append(f"log_id IN ({', '.join('?' for _ in fleet_filter.log_ids) or 'NULL'})")
+            params.extend(fleet_filter.log_ids)
+        if fleet_filter.vehicle:
+            conditions.append("lower(vehicle) = lower(?)")
+            params.append(fleet_filter.vehicle)
+        if fleet_filter.firmware:
+            # "4.5" matches 4.5, 4.5.1 and 4.5.1-dev, but not 4.50.
+            conditions.append("(firmware = ? OR starts_with(firmware, ? || '.') OR starts_with(firmware, ? || '-'))")
+            params.extend([fleet_filter.firmware] * 3)
+        if fleet_filter.start_after is not None:
+            conditions.append("start_time >= ?")
+            params.append(_utc_naive(fleet_filter.start_after))
+        if fleet_filter.start_before is not None:
+            conditions.append("start_time < ?")
+            params.append(_utc_naive(fleet_filter.start_before))
+        if fleet_filter.min_duration_s is not None:
+            conditions.append("duration_s >= ?")
+            params.append(fleet_filter.min_duration_s)
+        if fleet_filter.max_duration_s is not None:
+            conditions.append("duration_s <= ?")
+            params.append(fleet_filter.max_duration_s)
+        if fleet_filter.message_types:
+            conditions.append("list_has_all(message_types, ?)")
+            params.append(fleet_filter.message_types)
+        where = " AND ".join(conditions) or "TRUE"
+        return [row[0] for row in cursor.execute(
+            f"SELECT log_id FROM {FLEET_CATALOG}.main.{FLEET_LOGS_TABLE} WHERE {where} ORDER BY start_time, log_id", params).fetchall()]
+
+    def list_logs(self, fleet_filter: FleetFilter) -> list[dict]:
+        """fleet.logs rows matching `fleet_filter`. Runs on a db pool worker."""
+        self.refresh()
+        cursor = self.log_store.conn.cursor()
+        try:
+            log_ids = self.select_log_ids(cursor, fleet_filter)
+            if not log_ids:
+                return []
+            result = cursor.execute(
+                f"SELECT * FROM {FLEET_CATALOG}.main.{FLEET_LOGS_TABLE} WHERE log_id IN ({', '.join('?' for _ in log_ids)}) "
+                f"ORDER BY start_time, log_id", log_ids)
+            columns = [d[0] for d in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+        finally:
+            cursor.close()
+
+    def execute_query(self, sql_query: str, fleet_filter: FleetFilter, max_rows: int = FLEET_QUERY_MAX_ROWS,
+                      max_bytes: int = FLEET_QUERY_MAX_BYTES, timeout_s: float = FLEET_QUERY_TIMEOUT_S) -> dict:
+        """
+        Runs one SQL statement across the stored logs matching `fleet_filter`, within the same
+        budgets as chat queries. Unqualified table names resolve to temporary views that union
+        only the matching logs, so logs ruled out by their metadata are never scanned, and
+        `logs` is fleet.logs narrowed to them. Runs on a db pool worker on a private cursor.
+        Anything but a single SELECT statement raises QueryRejectedError before any work is done.
+        Returns the result dictionary of run_budgeted_query plus "log_ids".
+        """
+        cursor = self.log_store.conn.cursor()
+        try:
+            check_read_only(cursor, sql_query)
+            self.refresh()
+            create_mavextra_macros(cursor)
+            log_ids = self.select_log_ids(cursor, fleet_filter)
+            selected = set(log_ids)
+            id_list = ", ".join(_sql_string(log_id) for log_id in log_ids) or "NULL"
+            cursor.execute(f'CREATE TEMP VIEW "{FLEET_LOGS_TABLE}" AS '
+                           f"SELECT * FROM {FLEET_CATALOG}.main.{FLEET_LOGS_TABLE} WHERE log_id IN ({id_list})")
+            for table, table_sources in self._sources.items():
+                if not re.search(rf'(?<![\w.]){re.escape(table)}(?!\w)', sql_query, re.IGNORECASE):
+                    continue
+                matching = [source for source in table_sources if source[0] in selected]
+                if matching:
+                    cursor.execute(f'CREATE TEMP VIEW "{table}" AS {_union_sql(table, matching)}')
+                else:
+                    cursor.execute(f'CREATE TEMP VIEW "{table}" AS SELECT * FROM {FLEET_CATALOG}.main."{table}" WHERE FALSE')
+            result = run_budgeted_query(cursor, sql_query, max_rows, max_bytes, timeout_s)
+        finally:
+            cursor.close()
+        logger.info("fleet_query_executed", logs=len(log_ids), rows=len(result["rows"]), total_rows=result["total_rows"],
+                    truncated=result["truncated"], elapsed_ms=round(result["elapsed_ms"], 1))
+        observe_sql_query("fleet", result)
+        return {**result, "log_ids": log_ids}
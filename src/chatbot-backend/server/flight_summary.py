@@ -0,0 +1,419 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+import duckdb
+import structlog
+from pymavlink import mavutil
+
+from server.time_index import TIME_COLUMN
+
+logger = structlog.get_logger()
+
+FLIGHT_SUMMARY_TABLE = "flight_summary"
+FLIGHT_EVENTS_TABLE = "flight_events"
+# Time-bucketed rollups live in one schema per bucket size, e.g. rollup_1s."GPS".
+ROLLUP_BUCKETS_S = {"rollup_1s": 1, "rollup_1m": 60}
+
+# Timestamp columns in order of preference, with their scale to seconds. time_us is
+# added to every table at ingest; the others cover databases built before it existed.
+TIME_COLUMNS = ((TIME_COLUMN, 1e-6), ("TimeUS", 1e-6), ("time_usec", 1e-6), ("time_boot_ms", 1e-3), ("TimeMS", 1e-3))
+
+NUMERIC_TYPE_PREFIXES = ("BIGINT", "INTEGER", "SMALLINT", "TINYINT", "HUGEINT", "UBIGINT", "UINTEGER",
+                         "USMALLINT", "UTINYINT", "DOUBLE", "FLOAT", "REAL", "DECIMAL")
+
+# (metric, table, aggregate expression, unit). Metrics whose table or columns are
+# missing from a log are skipped, so DataFlash, tlog and PX4 ULog variants can all be listed.
+SUMMARY_METRICS = [
+    ("max_altitude_amsl", "GPS", "max(Alt)", "m"),
+    ("max_altitude_amsl", "GLOBAL_POSITION_INT", "max(alt) / 1000.0", "m"),
+    ("max_altitude_amsl", "vehicle_global_position", "max(alt)", "m"),
+    ("max_altitude_amsl", "vehicle_gps_position", "max(alt) / 1000.0", "m"),
+    ("max_relative_altitude", "BARO", "max(Alt)", "m"),
+    ("max_relative_altitude", "GLOBAL_POSITION_INT", "max(relative_alt) / 1000.0", "m"),
+    ("max_relative_altitude", "vehicle_local_position", "max(-z)", "m"),
+    ("max_relative_altitude", "vehicle_air_data", "max(baro_alt_meter) - arg_min(baro_alt_meter, time_us)", "m"),
+    ("max_ground_speed", "GPS", "max(Spd)", "m/s"),
+    ("max_ground_speed", "VFR_HUD", "max(groundspeed)", "m/s"),
+    ("max_ground_speed", "vehicle_gps_position", "max(vel_m_s)", "m/s"),
+    ("min_gps_satellites", "GPS", "min(NSats)", "count"),
+    ("min_gps_satellites", "GPS_RAW_INT", "min(satellites_visible)", "count"),
+    ("min_gps_satellites", "vehicle_gps_position", "min(satellites_used)", "count"),
+    ("max_gps_hdop", "GPS", "max(HDop)", ""),
+    ("max_gps_hdop", "GPS_RAW_INT", "max(eph) / 100.0", ""),
+    ("max_gps_hdop", "vehicle_gps_position", "max(hdop)", ""),
+    ("min_battery_voltage", "BAT", "min(Volt)", "V"),
+    ("min_battery_voltage", "SYS_STATUS", "min(voltage_battery) / 1000.0", "V"),
+    ("min_battery_voltage", "battery_status", "min(voltage_v) FILTER (WHERE voltage_v > 0)", "V"),
+    ("max_battery_voltage", "BAT", "max(Volt)", "V"),
+    ("max_battery_voltage", "SYS_STATUS", "max(voltage_battery) / 1000.0", "V"),
+    ("max_battery_voltage", "battery_status", "max(voltage_v)", "V"),
+    ("max_battery_current", "BAT", "max(Curr)", "A"),
+    ("max_battery_current", "SYS_STATUS", "max(current_battery) / 100.0", "A"),
+    ("max_battery_current", "battery_status", "max(current_a)", "A"),
+    ("battery_consumed", "BAT", "max(CurrTot)", "mAh"),
+    ("battery_consumed", "BATTERY_STATUS", "max(current_consumed) FILTER (WHERE current_consumed >= 0)", "mAh"),
+    ("battery_consumed", "battery_status", "max(discharged_mah)", "mAh"),
+    ("min_battery_remaining", "SYS_STATUS", "min(battery_remaining) FILTER (WHERE battery_remaining >= 0)", "%"),
+    ("min_battery_remaining", "battery_status", "min(remaining) FILTER (WHERE remaining >= 0) * 100", "%"),
+    ("max_battery_temperature", "BAT", "max(Temp)", "degC"),
+    ("max_battery_temperature", "battery_status", "max(temperature)", "degC"),
+    ("max_vibration_x", "VIBE", "max(VibeX)", "m/s/s"),
+    ("max_vibration_y", "VIBE", "max(VibeY)", "m/s/s"),
+    ("max_vibration_z", "VIBE", "max(VibeZ)", "m/s/s"),
+    ("max_vibration_x", "VIBRATION", "max(vibration_x)", "m/s/s"),
+    ("max_vibration_y", "VIBRATION", "max(vibration_y)", "m/s/s"),
+    ("max_vibration_z", "VIBRATION", "max(vibration_z)", "m/s/s"),
+    ("accelerometer_clip_count", "VIBE", "max(Clip)", "count"),
+    ("accelerometer_clip_count", "VIBRATION", "max(clipping_0) + max(clipping_1) + max(clipping_2)", "count"),
+    ("max_roll", "ATT", "max(abs(Roll))", "deg"),
+    ("max_pitch", "ATT", "max(abs(Pitch))", "deg"),
+    ("max_roll", "ATTITUDE", "degrees(max(abs(roll)))", "deg"),
+    ("max_pitch", "ATTITUDE", "degrees(max(abs(pitch)))", "deg"),
+    # PX4 attitude is a quaternion q = (w, x, y, z).
+    ("max_roll", "vehicle_attitude", "degrees(max(abs(atan2(2 * (q[1] * q[2] + q[3] * q[4]), 1 - 2 * (q[2] * q[2] + q[3] * q[3])))))", "deg"),
+    ("max_pitch", "vehicle_attitude", "degrees(max(abs(asin(greatest(-1, least(1, 2 * (q[1] * q[3] - q[4] * q[2])))))))", "deg"),
+]
+
+# Heartbeats sent by ground stations (MAV_AUTOPILOT_INVALID) say nothing about the vehicle.
+VEHICLE_HEARTBEAT_FILTER = f"autopilot <> {mavutil.mavlink.MAV_AUTOPILOT_INVALID}"
+
+# ArduPilot firmware banners written to DataFlash MSG, mapped to the MAV_TYPE used for mode names.
+FIRMWARE_MAV_TYPES = {
+    "ArduCopter": mavutil.mavlink.MAV_TYPE_QUADROTOR,
+    "ArduPlane": mavutil.mavlink.MAV_TYPE_FIXED_WING,
+    "ArduRover": mavutil.mavlink.MAV_TYPE_GROUND_ROVER,
+    "Rover": mavutil.mavlink.MAV_TYPE_GROUND_ROVER,
+    "ArduSub": mavutil.mavlink.MAV_TYPE_SUBMARINE,
+}
+
+# PX4 commander navigation states (vehicle_status.nav_state), which stand in for flight modes in ULogs.
+PX4_NAV_STATE_NAMES = {
+    0: "MANUAL", 1: "ALTCTL", 2: "POSCTL", 3: "AUTO_MISSION", 4: "AUTO_LOITER", 5: "AUTO_RTL", 10: "ACRO",
+    12: "DESCEND", 13: "TERMINATION", 14: "OFFBOARD", 15: "STAB", 17: "AUTO_TAKEOFF", 18: "AUTO_LAND",
+    19: "AUTO_FOLLOW_TARGET", 20: "AUTO_PRECLAND", 21: "ORBIT", 22: "AUTO_VTOL_TAKEOFF",
+}
+# vehicle_status.arming_state while armed.
+PX4_ARMING_STATE_ARMED = 2
+
+# ArduPilot firmware banner, e.g. "ArduCopter V4.5.1 (abcdef12)", in DataFlash MSG or STATUSTEXT.
+FIRMWARE_BANNER = re.compile(r"^(?P<vehicle>Ardu\w+|Rover|Blimp|AntennaTracker)\s+V?(?P<version>\d+\.\d+[\w.\-]*)")
+# GPS week/millisecond time runs ahead of UTC by the leap seconds since 1980.
+GPS_EPOCH = datetime(1980, 1, 6, tzinfo=timezone.utc)
+GPS_UTC_LEAP_SECONDS = 18
+
+
+def _tables(conn: duckdb.DuckDBPyConnection) -> dict[str, dict[str, str]]:
+    """Column name -> type for each table in the main schema of the current database."""
+    rows = conn.execute(
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_catalog = current_database() AND table_schema = 'main' ORDER BY table_name, ordinal_position"
+    ).fetchall()
+    tables: dict[str, dict[str, str]] = {}
+    for table_name, column_name, data_type in rows:
+        tables.setdefault(table_name, {})[column_name] = data_type
+    return tables
+
+
+def time_seconds_expr(columns) -> str | None:
+    """SQL expression for a table's timestamp in seconds, or None if it has no time column."""
+    for column, scale in TIME_COLUMNS:
+        if column in columns:
+            return f'"{column}" * {scale}'
+    return None
+
+
+def _transitions(conn, table: str, time_expr: str | None, value_expr: str, where: str = "TRUE") -> list[tuple]:
+    """(time_s, value, previous_value) for each row where `value_expr` changes, in time order."""
+    # Ordered by time rather than rowid, which the parquet-backed views of imported bundles lack.
+    return conn.execute(f"""
+        SELECT t, v, prev FROM (
+            SELECT {time_expr or 'NULL'} AS t, {value_expr} AS v,
+                   lag({value_expr}) OVER (ORDER BY {time_expr or 'NULL'}) AS prev
+            FROM "{table}" WHERE {where}
+        ) WHERE prev IS NULL OR v IS DISTINCT FROM prev ORDER BY t
+    """).fetchall()
+
+
+def _vehicle_mav_type(conn, tables) -> int | None:
+    if "HEARTBEAT" in tables:
+        row = conn.execute(f'SELECT mode(type) FROM "HEARTBEAT" WHERE {VEHICLE_HEARTBEAT_FILTER}').fetchone()
+        if row and row[0] is not None:
+            return int(row[0])
+    if "MSG" in tables and "Message" in tables["MSG"]:
+        for (message,) in conn.execute('SELECT Message FROM "MSG" LIMIT 50').fetchall():
+            for banner, mav_type in FIRMWARE_MAV_TYPES.items():
+                if isinstance(message, str) and message.startswith(banner):
+                    return mav_type
+    if "ulog_parameters" in tables:
+        row = conn.execute("SELECT value FROM ulog_parameters WHERE name = 'MAV_TYPE' LIMIT 1").fetchone()
+        if row and row[0] is not None:
+            return int(row[0])
+    return None
+
+
+def _collect_events(conn, tables) -> list[tuple]:
+    """Mode changes, arming, GPS fix loss and autopilot messages as (time_s, event, detail, source)."""
+    events = []
+    mode_names = {}
+    mav_type = _vehicle_mav_type(conn, tables)
+    if mav_type is not None:
+        mode_names = mavutil.mode_mapping_bynumber(mav_type) or {}
+
+    def mode_label(mode):
+        return mode_names.get(int(mode), str(mode)) if mode is not None else "unknown"
+
+    if "MODE" in tables and "Mode" in tables["MODE"]:
+        time_expr = time_seconds_expr(tables["MODE"])
+        for t, mode, _ in conn.execute(f'SELECT {time_expr or "NULL"}, Mode, NULL FROM "MODE" ORDER BY 1').fetchall():
+            events.append((t, "mode_change", mode_label(mode), "MODE"))
+    elif "HEARTBEAT" in tables:
+        time_expr = time_seconds_expr(tables["HEARTBEAT"])
+        for t, mode, _ in _transitions(conn, "HEARTBEAT", time_expr, "custom_mode", VEHICLE_HEARTBEAT_FILTER):
+            events.append((t, "mode_change", mode_label(mode), "HEARTBEAT"))
+    elif "vehicle_status" in tables and "nav_state" in tables["vehicle_status"]:
+        time_expr = time_seconds_expr(tables["vehicle_status"])
+        for t, nav_state, _ in _transitions(conn, "vehicle_status", time_expr, "nav_state"):
+            events.append((t, "mode_change", PX4_NAV_STATE_NAMES.get(nav_state, str(nav_state)), "vehicle_status"))
+
+    armed_sources = [("ARM", "ArmState <> 0", "TRUE"),
+                     ("HEARTBEAT", f"(base_mode & {mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED}) <> 0", VEHICLE_HEARTBEAT_FILTER),
+                     ("vehicle_status", f"arming_state = {PX4_ARMING_STATE_ARMED}", "TRUE")]
+    for table, armed_expr, where in armed_sources:
+        if table in tables:
+            try:
+                rows = _transitions(conn, table, time_seconds_expr(tables[table]), armed_expr, where)
+            except duckdb.Error:
+                continue
+            for t, armed, prev in rows:
+                if prev is None and not armed:
+                    continue
+                events.append((t, "armed" if armed else "disarmed", "", table))
+            break
+
+    for table, fix_column in (("GPS", "Status"), ("GPS_RAW_INT", "fix_type"), ("vehicle_gps_position", "fix_type")):
+        if table in tables and fix_column in tables[table]:
+            # Fix types below 3 (GPS_FIX_TYPE_3D_FIX) cannot be trusted for position.
+            for t, has_fix, prev in _transitions(conn, table, time_seconds_expr(tables[table]), f"{fix_column} >= 3"):
+                if prev is None:
+                    continue
+                events.append((t, "gps_fix_regained" if has_fix else "gps_fix_lost", "", table))
+
+    if "STATUSTEXT" in tables:
+        # Severities 0-4 are emergency through warning.
+        for t, severity, text in conn.execute(
+                f'SELECT {time_seconds_expr(tables["STATUSTEXT"]) or "NULL"}, severity, text FROM "STATUSTEXT" '
+                'WHERE severity <= 4 ORDER BY 1').fetchall():
+            events.append((t, "autopilot_warning", f"[severity {severity}] {text}", "STATUSTEXT"))
+    if "ERR" in tables:
+        for t, subsys, ecode in conn.execute(
+                f'SELECT {time_seconds_expr(tables["ERR"]) or "NULL"}, Subsys, ECode FROM "ERR" ORDER BY 1').fetchall():
+            events.append((t, "autopilot_error", f"subsystem {subsys} code {ecode}", "ERR"))
+    if "ulog_logged_messages" in tables:
+        # ULog levels follow syslog: 0-4 are emergency through warning.
+        for t, level, message in conn.execute(
+                f'SELECT {time_seconds_expr(tables["ulog_logged_messages"]) or "NULL"}, log_level, message '
+                'FROM "ulog_logged_messages" WHERE log_level <= 4 ORDER BY 1').fetchall():
+            events.append((t, "autopilot_warning", f"[severity {level}] {message}", "ulog_logged_messages"))
+    return events
+
+
+def _armed_time_s(events: list[tuple], log_end_s: float | None) -> float | None:
+    armed_at = None
+    total = None
+    for t, event, _, _ in events:
+        if t is None:
+            continue
+        if event == "armed" and armed_at is None:
+            armed_at = t
+        elif event == "disarmed" and armed_at is not None:
+            total = (total or 0.0) + t - armed_at
+            armed_at = None
+    if armed_at is not None and log_end_s is not None:
+        total = (total or 0.0) + log_end_s - armed_at
+    return total
+
+
+def _build_rollups(conn, tables) -> int:
+    num_rollups = 0
+    for schema in ROLLUP_BUCKETS_S:
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+    for table_name, columns in tables.items():
+        time_expr = time_seconds_expr(columns)
+        if time_expr is None or table_name in (FLIGHT_SUMMARY_TABLE, FLIGHT_EVENTS_TABLE):
+            continue
+        time_names = {name for name, _ in TIME_COLUMNS}
+        numeric = [name for name, data_type in columns.items()
+                   if name not in time_names and data_type.upper().startswith(NUMERIC_TYPE_PREFIXES) and not data_type.endswith("]")]
+        if not numeric:
+            continue
+        aggregates = ", ".join(f'min("{c}") AS "{c}_min", max("{c}") AS "{c}_max", avg("{c}") AS "{c}_mean"' for c in numeric)
+        for schema, bucket_s in ROLLUP_BUCKETS_S.items():
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE "{schema}"."{table_name}" AS
+                SELECT floor({time_expr} / {bucket_s}) * {bucket_s} AS bucket_s, count(*) AS n, {aggregates}
+                FROM main."{table_name}" GROUP BY 1 ORDER BY 1
+            """)
+        num_rollups += 1
+    return num_rollups
+
+
+def build_flight_summary(conn: duckdb.DuckDBPyConnection) -> dict:
+    """
+    Computes the `flight_summary` and `flight_events` tables and the per-type rollups
+    (rollup_1s / rollup_1m schemas with min/max/mean per bucket) in the current database.
+    Runs right after ingest on the log's writable connection.
+    """
+    tables = _tables(conn)
+    summary_rows = []
+
+    bounds = []
+    for table_name, columns in tables.items():
+        time_expr = time_seconds_expr(columns)
+        if time_expr:
+            bounds.append(f'SELECT min({time_expr}) AS t0, max({time_expr}) AS t1 FROM "{table_name}"')
+    log_end_s = None
+    if bounds:
+        log_start_s, log_end_s = conn.execute(f"SELECT min(t0), max(t1) FROM ({' UNION ALL '.join(bounds)})").fetchone()
+        if log_start_s is not None:
+            # DataFlash time is since boot; tlog time is the Unix time the ground station received each message.
+            summary_rows.append(("log_start", log_start_s, "s", "all tables"))
+            summary_rows.append(("log_end", log_end_s, "s", "all tables"))
+            summary_rows.append(("log_duration", log_end_s - log_start_s, "s", "all tables"))
+
+    seen_metrics = set()
+    for metric, table_name, expression, unit in SUMMARY_METRICS:
+        if metric in seen_metrics or table_name not in tables:
+            continue
+        try:
+            value = conn.execute(f'SELECT {expression} FROM "{table_name}"').fetchone()[0]
+        except duckdb.Error:
+            continue
+        if value is None:
+            continue
+        summary_rows.append((metric, float(value), unit, table_name))
+        seen_metrics.add(metric)
+
+    events = _collect_events(conn, tables)
+    armed_time_s = _armed_time_s(events, log_end_s)
+    if armed_time_s is not None:
+        summary_rows.append(("armed_time", armed_time_s, "s", "arming events"))
+    for event, metric in (("mode_change", "mode_change_count"), ("gps_fix_lost", "gps_fix_loss_count"),
+                          ("autopilot_warning", "autopilot_warning_count"), ("autopilot_error", "autopilot_error_count")):
+        summary_rows.append((metric, float(sum(1 for e in events if e[1] == event)), "count", FLIGHT_EVENTS_TABLE))
+
+    conn.execute(f'CREATE OR REPLACE TABLE "{FLIGHT_SUMMARY_TABLE}" (metric VARCHAR, value DOUBLE, unit VARCHAR, source_table VARCHAR)')
+    conn.executemany(f'INSERT INTO "{FLIGHT_SUMMARY_TABLE}" VALUES (?, ?, ?, ?)', summary_rows)
+    conn.execute(f'CREATE OR REPLACE TABLE "{FLIGHT_EVENTS_TABLE}" (time_s DOUBLE, event VARCHAR, detail VARCHAR, source_table VARCHAR)')
+    if events:
+        conn.executemany(f'INSERT INTO "{FLIGHT_EVENTS_TABLE}" VALUES (?, ?, ?, ?)', events)
+
+    num_rollups = _build_rollups(conn, tables)
+    logger.info("flight_summary_built", num_metrics=len(summary_rows), num_events=len(events), num_rollup_types=num_rollups)
+    return {"metrics": len(summary_rows), "events": len(events), "rollup_types": num_rollups}
+
+
+def _firmware_banner(conn, tables) -> tuple[str, str] | None:
+    for table, column in (("MSG", "Message"), ("STATUSTEXT", "text")):
+        if table in tables and column in tables[table]:
+            for (message,) in conn.execute(f'SELECT "{column}" FROM "{table}" LIMIT 50').fetchall():
+                match = FIRMWARE_BANNER.match(message) if isinstance(message, str) else None
+                if match:
+                    return match["vehicle"], match["version"]
+    return None
+
+
+def _start_time(conn, tables, time_us_min: int) -> datetime | None:
+    """UTC wall-clock time at `time_us_min`, from GPS time, SYSTEM_TIME, PX4 GPS UTC time, or tlog receive times."""
+    if "GPS" in tables and {"GWk", "GMS", "Status"} <= tables["GPS"].keys():
+        row = conn.execute(f'SELECT GWk, GMS, "{TIME_COLUMN}" FROM "GPS" WHERE Status >= 3 AND GWk > 0 '
+                           f'ORDER BY "{TIME_COLUMN}" LIMIT 1').fetchone()
+        if row:
+            week, week_ms, time_us = row
+            gps_utc = GPS_EPOCH + timedelta(weeks=int(week), milliseconds=int(week_ms), seconds=-GPS_UTC_LEAP_SECONDS)
+            return gps_utc - timedelta(microseconds=int(time_us) - time_us_min)
+    if "SYSTEM_TIME" in tables and "time_unix_usec" in tables["SYSTEM_TIME"]:
+        row = conn.execute(f'SELECT time_unix_usec, "{TIME_COLUMN}" FROM "SYSTEM_TIME" WHERE time_unix_usec > 0 '
+                           f'ORDER BY "{TIME_COLUMN}" LIMIT 1').fetchone()
+        if row:
+            return datetime.fromtimestamp((int(row[0]) - (int(row[1]) - time_us_min)) / 1e6, tz=timezone.utc)
+    if "vehicle_gps_position" in tables and "time_utc_usec" in tables["vehicle_gps_position"]:
+        row = conn.execute(f'SELECT time_utc_usec, "{TIME_COLUMN}" FROM "vehicle_gps_position" WHERE time_utc_usec > 0 '
+                           f'ORDER BY "{TIME_COLUMN}" LIMIT 1').fetchone()
+        if row:
+            return datetime.fromtimestamp((int(row[0]) - (int(row[1]) - time_us_min)) / 1e6, tz=timezone.utc)
+    if "HEARTBEAT" in tables:
+        # tlog timestamps are the Unix time the ground station received each message.
+        return datetime.fromtimestamp(time_us_min / 1e6, tz=timezone.utc)
+    return None
+
+
+def log_metadata(conn: duckdb.DuckDBPyConnection) -> dict:
+    """
+    Per-log facts used to pick logs out of a fleet: vehicle, firmware version, UTC start
+    time, duration, time_us range and message types. Reads the current database, so it
+    runs right after ingest or on a cursor pointed at a stored log. Unknown values are None.
+    """
+    tables = _tables(conn)
+    timed = [name for name, columns in tables.items() if TIME_COLUMN in columns]
+    time_us_min = time_us_max = None
+    if timed:
+        time_us_min, time_us_max = conn.execute(
+            "SELECT min(t0), max(t1) FROM (" + " UNION ALL ".join(
+                f'SELECT min("{TIME_COLUMN}") AS t0, max("{TIME_COLUMN}") AS t1 FROM "{name}"' for name in timed) + ")").fetchone()
+
+    vehicle = firmware = None
+    banner = _firmware_banner(conn, tables)
+    if banner:
+        vehicle, firmware = banner
+    if vehicle is None:
+        mav_type = mavutil.mavlink.enums["MAV_TYPE"].get(_vehicle_mav_type(conn, tables))
+        if mav_type is not None:
+            vehicle = mav_type.name.removeprefix("MAV_TYPE_")
+    version = None
+    if firmware is None and "AUTOPILOT_VERSION" in tables:
+        row = conn.execute('SELECT max(flight_sw_version) FROM "AUTOPILOT_VERSION"').fetchone()
+        version = int(row[0]) if row and row[0] else None
+    if firmware is None and version is None and "ulog_info" in tables:
+        # PX4 encodes ver_sw_release like flight_sw_version (major, minor, patch, release type).
+        row = conn.execute("SELECT value FROM ulog_info WHERE key = 'ver_sw_release'").fetchone()
+        version = int(row[0]) if row and row[0] and row[0].isdigit() else None
+    if version:
+        firmware = f"{version >> 24}.{(version >> 16) & 0xFF}.{(version >> 8) & 0xFF}"
+
+    start_time = _start_time(conn, tables, time_us_min) if time_us_min is not None else None
+    return {
+        "vehicle": vehicle,
+        "firmware": firmware,
+        "start_time": start_time.isoformat() if start_time is not None else None,
+        "duration_s": (time_us_max - time_us_min) / 1e6 if time_us_min is not None else None,
+        "time_us_min": time_us_min,
+        "time_us_max": time_us_max,
+        "message_types": sorted(name for name in timed if name not in (FLIGHT_SUMMARY_TABLE, FLIGHT_EVENTS_TABLE)),
+    }
+
+
+def format_flight_summary(cursor: duckdb.DuckDBPyConnection, catalog: str, max_events: int = 30) -> str:
+    """Renders a log's flight summary and first events as prompt text; empty if the log has none."""
+    has_summary = cursor.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_catalog = ? AND table_schema = 'main' AND table_name = ?",
+        [catalog, FLIGHT_SUMMARY_TABLE]).fetchone()[0]
+    if not has_summary:
+        return ""
+    lines = ["Precomputed flight summary (prefer these values over scanning raw tables):"]
+    for metric, value, unit, source in cursor.execute(
+            f'SELECT metric, value, unit, source_table FROM "{catalog}".main."{FLIGHT_SUMMARY_TABLE}"').fetchall():
+        lines.append(f"- {metric}: {value:.6g} {unit} (from {source})".replace("  (", " ("))
+    events = cursor.execute(
+        f'SELECT time_s, event, detail FROM "{catalog}".main."{FLIGHT_EVENTS_TABLE}" LIMIT {max_events + 1}').fetchall()
+    if events:
+        lines.append("Flight events (time_s, event, detail):")
+        for time_s, event, detail in events[:max_events]:
+            time_text = f"{time_s:.1f}" if time_s is not None else "?"
+            lines.append(f"- {time_text}, {event}, {detail}".rstrip(", "))
+        if len(events) > max_events:
+            lines.append(f"- ... more rows in {FLIGHT_EVENTS_TABLE}")
+    lines.append(
+        "Per-type rollups: tables rollup_1s.<TYPE> and rollup_1m.<TYPE> have bucket_s, n and "
+        "<column>_min/<column>_max/<column>_mean for each numeric column; query them instead of raw tables for trends."
+    )
+    return "\n".join(lines)
@@ -1,11 +1,23 @@
 from dotenv import load_dotenv
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 import google.generativeai as genai
+from google.generativeai import caching
 import structlog
 
 logger = structlog.get_logger()
 
 GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
+# Models are reused per system instruction; each loaded log has one instruction.
+GEMINI_MODEL_CACHE_SIZE = int(os.getenv("GEMINI_MODEL_CACHE_SIZE", "32"))
+# Provider-side context caching of the system instruction. The API only accepts it for explicitly
+# versioned model names (e.g. "models/gemini-1.5-flash-001") and prompts above a minimum token count;
+# when it is refused the client falls back to sending the instruction with every request.
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "0").lower() in ("1", "true", "yes")
+GEMINI_CONTEXT_CACHE_TTL_S = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_S", "3600"))
 
 class GeminiClient:
     """
@@ -16,6 +28,10 @@ class GeminiClient:
         load_dotenv()
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.model_name = model_name
+        self.context_cache = GEMINI_CONTEXT_CACHE
+        # instruction hash -> (model, provider cached content or None, expiry as monotonic time or None)
+        self._models: OrderedDict[str, tuple[genai.GenerativeModel, caching.CachedContent | None, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
 
         if not self.api_key:
             logger.error("gemini_api_key_missing", error="GEMINI_API_KEY not found in environment variables.")
@@ -28,17 +44,55 @@ class GeminiClient:
                 logger.error("gemini_client_initialization_failed", model_name=self.model_name, error=str(e), exc_info=True)
 
     def get_model(self, system_instruction: str | None = None) -> genai.GenerativeModel | None:
-        """Returns a new GenerativeModel instance, optionally configured with a system instruction."""
+        """
+        Returns a GenerativeModel configured with `system_instruction`. Models are cached per
+        instruction, so every chat turn against the same log reuses one instance.
+        """
         if not self.api_key:
             logger.error("gemini_api_key_not_configured_at_get_model")
             return None
+        key = hashlib.sha256((system_instruction or "").encode()).hexdigest()
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None and (entry[2] is None or entry[2] > time.monotonic()):
+                self._models.move_to_end(key)
+                return entry[0]
         try:
-            model_instance = genai.GenerativeModel(
-                model_name=self.model_name,
-                system_instruction=system_instruction
-            )
-            logger.info("gemini_model_instance_created", model_name=self.model_name, has_system_instruction=bool(system_instruction))
-            return model_instance
+            entry = self._create_model(system_instruction)
         except Exception as e:
             logger.error("gemini_model_creation_failed", model_name=self.model_name, error=str(e), exc_info=True)
-            return None
\ No newline at end of file
+            return None
+        with self._lock:
+            self._models[key] = entry
+            evicted = []
+            while len(self._models) > GEMINI_MODEL_CACHE_SIZE:
+                evicted.append(self._models.popitem(last=False)[1])
+        for _, cached_content, _ in evicted:
+            self._delete_cached_content(cached_content)
+        return entry[0]
+
+    def _create_model(self, system_instruction: str | None) -> tuple[genai.GenerativeModel, caching.CachedContent | None, float | None]:
+        if self.context_cache and system_instruction:
+            try:
+                cached_content = caching.CachedContent.create(model=self.model_name, system_instruction=system_instruction,
+                                                              ttl=GEMINI_CONTEXT_CACHE_TTL_S)
+                model_instance = genai.GenerativeModel.from_cached_content(cached_content)
+                logger.info("gemini_model_instance_created", model_name=self.model_name, context_cache=cached_content.name)
+                # Rebuild a little before the provider expires the cached content.
+                return model_instance, cached_content, time.monotonic() + GEMINI_CONTEXT_CACHE_TTL_S * 0.9
+            except Exception as e:
+                logger.warning("gemini_context_cache_unavailable", model_name=self.model_name, error=str(e))
+        model_instance = genai.GenerativeModel(
+            model_name=self.model_name,
+            system_instruction=system_instruction
+        )
+        logger.info("gemini_model_instance_created", model_name=self.model_name, has_system_instruction=bool(system_instruction))
+        return model_instance, None, None
+
+    def _delete_cached_content(self, cached_content: caching.CachedContent | None):
+        if cached_content is None:
+            return
+        try:
+            cached_content.delete()
+        except Exception as e:
+            logger.warning("gemini_context_cache_delete_failed", name=cached_content.name, error=str(e))
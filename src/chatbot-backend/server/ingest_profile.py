@@ -0,0 +1,89 @@
+import hashlib
+import json
+
+from pydantic import ValidationError
+
+from server.models import IngestProfile
+
+# High-rate sensor streams that most chat questions never touch.
+HIGH_RATE_SENSOR_TYPES = ["IMU", "IMU2", "IMU3", "ACC", "GYR", "ISBH", "ISBD",
+                          "RAW_IMU", "SCALED_IMU", "SCALED_IMU2", "SCALED_IMU3", "HIGHRES_IMU",
+                          "sensor_combined", "sensor_accel", "sensor_gyro", "sensor_accel_fifo", "sensor_gyro_fifo"]
+
+INGEST_PROFILE_PRESETS: dict[str, IngestProfile] = {
+    "full": IngestProfile(),
+    "chat": IngestProfile(exclude_types=HIGH_RATE_SENSOR_TYPES),
+}
+
+
+def parse_ingest_profile(value: str | None) -> IngestProfile | None:
+    """
+    Reads an ingest profile given as a preset name or a JSON object.
+    Raises ValueError with a readable message if it is neither.
+    """
+    if value is None or not value.strip():
+        return None
+    value = value.strip()
+    if value in INGEST_PROFILE_PRESETS:
+        return INGEST_PROFILE_PRESETS[value]
+    try:
+        return IngestProfile.model_validate_json(value)
+    except ValidationError as e:
+        raise ValueError(f"Invalid ingest profile; use one of {', '.join(INGEST_PROFILE_PRESETS)} or a JSON object: {e}") from e
+
+
+def profile_fingerprint(profile: IngestProfile | None) -> str | None:
+    """Short stable hash of a profile, or None when the profile keeps everything."""
+    if profile is None or profile.is_empty():
+        return None
+    canonical = json.dumps(profile.model_dump(), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:8]
+
+
+class IngestProjection:
+    """Applies an IngestProfile inside the read loop, before messages are converted to rows."""
+    def __init__(self, profile: IngestProfile | None):
+        profile = profile or IngestProfile()
+        self.include_types = set(profile.include_types) if profile.include_types is not None else None
+        self.exclude_types = set(profile.exclude_types)
+        self.downsample = {msg_type: n for msg_type, n in profile.downsample.items() if n > 1}
+        self.drop_fields = {msg_type: set(fields) for msg_type, fields in profile.drop_fields.items()}
+        self._seen: dict[str, int] = {}
+        self._fields: dict[str, list[str]] = {}
+
+    @property
+    def filters_types(self) -> bool:
+        return self.include_types is not None or bool(self.exclude_types)
+
+    def keeps_type(self, msg_type: str) -> bool:
+        if self.include_types is not None and msg_type not in self.include_types:
+            return False
+        return msg_type not in self.exclude_types
+
+    def select_types(self, available_types) -> list[str]:
+        """The subset of `available_types` to ask the reader for."""
+        return [msg_type for msg_type in available_types if self.keeps_type(msg_type)]
+
+    def take(self, msg_type: str) -> bool:
+        """Counts a message of a kept type and says whether downsampling retains it."""
+        every = self.downsample.get(msg_type)
+        if every is None:
+            return True
+        seen = self._seen.get(msg_type, 0)
+        self._seen[msg_type] = seen + 1
+        return seen % every == 0
+
+    def fields_for(self, msg_type: str, fieldnames) -> list[str]:
+        fields = self._fields.get(msg_type)
+        if fields is None:
+            dropped = self.drop_fields.get(msg_type, set()) | self.drop_fields.get("*", set())
+            fields = self._fields[msg_type] = [name for name in fieldnames if name not in dropped]
+        return fields
+
+
+def project_message(msg, fields: list[str]) -> dict:
+    """Reads only `fields` from a decoded message, instead of converting every field with to_dict()."""
+    format_attr = getattr(msg, 'format_attr', None)
+    if format_attr is not None:
+        return {name: format_attr(name) for name in fields}
+    return {name: getattr(msg, name) for name in fields}
@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+UPLOAD_JOB_RETENTION_S = float(os.getenv("UPLOAD_JOB_RETENTION_S", "3600"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_JOB_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def _get_manager():
+    """Lazily starts the manager process that shares progress queues and cancel events with parse workers."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = multiprocessing.get_context("spawn").Manager()
+        return _manager
+
+
+class UploadJob:
+    """State of one background log ingest: status, latest progress snapshot and result."""
+    def __init__(self, job_id: str, filename: str, session_id: str | None):
+        self.job_id = job_id
+        self.filename = filename
+        self.session_id = session_id
+        self.status = JOB_QUEUED
+        self.message: str | None = None
+        self.log_id: str | None = None
+        self.progress: dict[str, Any] = {}
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        # Bumped on every change so event streams only emit when something happened.
+        self.version = 0
+        self.task: asyncio.Task | None = None
+
+        manager = _get_manager()
+        self.cancel_event = manager.Event()
+        self.progress_queue = manager.Queue()
+        self._progress_thread: threading.Thread | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_JOB_STATUSES
+
+    def _update(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.version += 1
+
+    def mark_running(self):
+        self._update(status=JOB_RUNNING)
+        logger.info("upload_job_started", job_id=self.job_id, filename=self.filename)
+
+    def finish(self, status: str, message: str | None = None, log_id: str | None = None):
+        self._update(status=status, message=message, log_id=log_id or self.log_id, finished_at=time.time())
+        logger.info("upload_job_finished", job_id=self.job_id, status=status, log_id=self.log_id, message=message)
+
+    def cancel(self):
+        """Asks the parser to stop at its next checkpoint; the job ends as cancelled once it does."""
+        if not self.finished:
+            self.cancel_event.set()
+            logger.info("upload_job_cancel_requested", job_id=self.job_id)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def start_progress_pump(self):
+        """Copies progress snapshots from the shared queue onto the job in a background thread."""
+        def pump():
+            while True:
+                snapshot = self.progress_queue.get()
+                if snapshot is None:
+                    break
+                self._update(progress=snapshot)
+
+        self._progress_thread = threading.Thread(target=pump, name=f"upload-job-{self.job_id[:8]}", daemon=True)
+        self._progress_thread.start()
+
+    def stop_progress_pump(self):
+        if self._progress_thread is not None:
+            self.progress_queue.put(None)
+            self._progress_thread.join()
+            self._progress_thread = None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "filename": self.filename,
+            "session_id": self.session_id,
+            "log_id": self.log_id,
+            "message": self.message,
+            "progress": self.progress,
+        }
+
+
+class UploadJobRegistry:
+    """Maps job ids to UploadJob objects and forgets finished jobs after `retention_s`."""
+    def __init__(self, retention_s: float = UPLOAD_JOB_RETENTION_S):
+        self.retention_s = retention_s
+        self._jobs: dict[str, UploadJob] = {}
+        self._lock = threading.Lock()
+
+    def create(self, filename: str, session_id: str | None) -> UploadJob:
+        self.evict_finished()
+        job = UploadJob(str(uuid.uuid4()), filename, session_id)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        logger.info("upload_job_created", job_id=job.job_id, filename=filename, session_id=session_id)
+        return job
+
+    def get(self, job_id: str) -> UploadJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def evict_finished(self):
+        cutoff = time.time() - self.retention_s
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -1,115 +1,426 @@
 from pymavlink import mavutil
 import structlog
-import pandas as pd
+import contextlib
 import typing
 import os
 import tempfile
 import shutil
+import time
 import duckdb
+import pyarrow as pa
+
+from server.column_buffers import MessageTypeBuffer, message_column_types, table_name_for
+from server.ingest_profile import IngestProjection, project_message
+from server.models import IngestProfile
+from server.time_index import TIME_COLUMN, TimeNormalizer
+from server.parallel_parser import PARALLEL_PARSE_WORKERS, can_parse_in_parallel, decode_log_parallel
+from server.ulog import (ULOG_DROPOUTS_TABLE, ULOG_INFO_TABLE, ULOG_LOGGED_MESSAGES_TABLE, ULOG_PARAMETERS_TABLE,
+                         ULogFormatError, ULogReader, is_ulog)
 
 logger = structlog.get_logger()
 
-def parse_and_store_log(original_file_obj: typing.IO[bytes], 
+# Upper bound on the number of rows held in the column buffers (summed across all
+# message types) before they are flushed to DuckDB.
+DEFAULT_INGEST_BATCH_SIZE = 50_000
+
+# The serial read loop checks for cancellation and reports progress every this many
+# messages, and progress callbacks fire at most once per PROGRESS_INTERVAL_S.
+PROGRESS_CHECK_EVERY = 2_000
+PROGRESS_INTERVAL_S = 0.5
+
+
+class IngestCancelled(Exception):
+    """Raised inside the ingest loop once the caller has asked for the parse to stop."""
+
+
+class _StageTimer:
+    """Accumulates wall-clock seconds per ingest stage."""
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def rounded(self) -> dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.seconds.items()}
+
+
+class _TableWriter:
+    """Accumulates decoded messages in per-type column buffers and flushes them to DuckDB in batches."""
+    def __init__(self, db_conn: duckdb.DuckDBPyConnection, log_id: str, batch_size: int, timer: _StageTimer):
+        self.db_conn = db_conn
+        self.timer = timer
+        self.log_id = log_id
+        self.batch_size = batch_size
+        self.buffers: dict[str, MessageTypeBuffer] = {}
+        self.tables_created: dict[str, bool] = {}
+        self.rows_stored: dict[str, int] = {}
+        # Tables written whole from Arrow (see add_table): message type -> table, and the
+        # tables whose rows did not arrive in time order.
+        self.arrow_tables: dict[str, str] = {}
+        self.unsorted_tables: set[str] = set()
+        self._last_time: dict[str, int] = {}
+        self.buffered_rows = 0
+        self.total_messages_parsed = 0
+
+    def add_message(self, msg, projection: IngestProjection, time_us: int | None):
+        msg_type = msg.get_type()
+        buffer = self.buffers.get(msg_type)
+        if buffer is None:
+            buffer = self.buffers[msg_type] = MessageTypeBuffer(msg_type, [TIME_COLUMN, *projection.fields_for(msg_type, msg.get_fieldnames())],
+                                                                 message_column_types(msg))
+        values = project_message(msg, buffer.fieldnames[1:]) if projection.drop_fields else msg.to_dict()
+        values[TIME_COLUMN] = time_us
+        buffer.append(values)
+        self._count_rows(1)
+
+    def add_buffer(self, other: MessageTypeBuffer):
+        """Merges a buffer decoded elsewhere (e.g. by a parallel worker) into this writer."""
+        buffer = self.buffers.get(other.msg_type)
+        if buffer is None:
+            buffer = self.buffers[other.msg_type] = MessageTypeBuffer(other.msg_type, other.fieldnames, other.column_types)
+        buffer.extend(other)
+        self._count_rows(other.num_rows)
+
+    def add_table(self, msg_type: str, batch: pa.Table):
+        """
+        Writes rows that were decoded straight into an Arrow table (e.g. by the ULog reader),
+        bypassing the column buffers. Batches of a type must come in file order; the table
+        is sorted by time_us at the end only if they were not already in time order.
+        """
+        table_name = self.arrow_tables.setdefault(msg_type, table_name_for(msg_type))
+        # Tables that are not time series (e.g. ULog info) have no time column to sort by.
+        if TIME_COLUMN in batch.column_names and batch.num_rows:
+            time_column = batch.column(TIME_COLUMN)
+            if time_column.null_count:
+                self.unsorted_tables.add(table_name)
+            else:
+                times = time_column.to_numpy()
+                if (times[:-1] > times[1:]).any() or times[0] < self._last_time.get(table_name, times[0]):
+                    self.unsorted_tables.add(table_name)
+                self._last_time[table_name] = int(times[-1])
+        self.total_messages_parsed += batch.num_rows
+        try:
+            self._write(table_name, batch)
+        except Exception as e_db:
+            logger.error("duckdb_table_creation_failed", table_name=table_name, log_id=self.log_id, error=str(e_db), exc_info=True)
+
+    def message_counts(self) -> dict[str, int]:
+        """Messages decoded so far per message type, stored or still buffered."""
+        counts = {buffer.msg_type: self.rows_stored.get(buffer.table_name, 0) + buffer.num_rows
+                  for buffer in self.buffers.values()}
+        counts.update({msg_type: self.rows_stored.get(table_name, 0) for msg_type, table_name in self.arrow_tables.items()})
+        return counts
+
+    def _count_rows(self, num_rows: int):
+        self.total_messages_parsed += num_rows
+        self.buffered_rows += num_rows
+        if self.buffered_rows >= self.batch_size:
+            self.flush_all()
+
+    def flush_all(self):
+        for buffer in self.buffers.values():
+            try:
+                self._flush(buffer)
+            except Exception as e_db:
+                logger.error("duckdb_table_creation_failed", table_name=buffer.table_name, log_id=self.log_id, error=str(e_db), exc_info=True)
+            buffer.clear()
+        self.buffered_rows = 0
+
+    def sort_tables_by_time(self):
+        """Rewrites, ordered by time_us, the tables whose rows did not arrive in time order."""
+        unsorted = {buffer.table_name for buffer in self.buffers.values() if not buffer.time_sorted} | self.unsorted_tables
+        for table_name in unsorted:
+            if not self.tables_created.get(table_name):
+                continue
+            with self.timer.stage("sort"):
+                self.db_conn.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM "{table_name}" ORDER BY "{TIME_COLUMN}" NULLS FIRST')
+            logger.debug("duckdb_table_sorted_by_time", table_name=table_name, log_id=self.log_id)
+
+    def _flush(self, buffer: MessageTypeBuffer):
+        """Writes the buffered rows to the message type's table."""
+        if buffer.num_rows == 0:
+            return
+        with self.timer.stage("build"):
+            batch = buffer.to_arrow()
+        self._write(buffer.table_name, batch)
+
+    def _write(self, table_name: str, batch: pa.Table):
+        """Creates the table from its first batch and appends later ones."""
+        quoted_view_name = f"arrow_view_{table_name}"
+        with self.timer.stage("write"):
+            self.db_conn.register(quoted_view_name, batch)
+            try:
+                if not self.tables_created.get(table_name):
+                    self.db_conn.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM "{quoted_view_name}"')
+                    self.tables_created[table_name] = True
+                else:
+                    self.db_conn.execute(f'INSERT INTO "{table_name}" BY NAME SELECT * FROM "{quoted_view_name}"')
+            finally:
+                self.db_conn.unregister(quoted_view_name)
+        self.rows_stored[table_name] = self.rows_stored.get(table_name, 0) + batch.num_rows
+        logger.debug("duckdb_batch_flushed", table_name=table_name, log_id=self.log_id, num_rows=batch.num_rows)
+
+
+class _ProgressReporter:
+    """Checks for cancellation and sends throttled progress snapshots from the ingest loop."""
+    def __init__(self, writer: _TableWriter, total_bytes: int,
+                 callback: typing.Callable[[dict], None] | None, cancel_event: typing.Any | None):
+        self.writer = writer
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.started = time.monotonic()
+        self.last_report = 0.0
+
+    def checkpoint(self, bytes_read: int, force: bool = False):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise IngestCancelled()
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_report < PROGRESS_INTERVAL_S:
+            return
+        self.last_report = now
+        elapsed_s = max(now - self.started, 1e-9)
+        self.callback({
+            "bytes_read": bytes_read,
+            "total_bytes": self.total_bytes,
+            "messages_parsed": self.writer.total_messages_parsed,
+            "messages_by_type": self.writer.message_counts(),
+            "elapsed_s": round(elapsed_s, 3),
+            "bytes_per_s": round(bytes_read / elapsed_s),
+            "messages_per_s": round(self.writer.total_messages_parsed / elapsed_s),
+        })
+
+
+def _indexed_type_counts(mlog) -> dict[str, int] | None:
+    """Message counts per type from the offset index that mmap-based readers build on open, if any."""
+    name_to_id = getattr(mlog, 'name_to_id', None)
+    counts = getattr(mlog, 'counts', None)
+    if not name_to_id or counts is None:
+        return None
+    type_counts = {}
+    for msg_type, type_id in name_to_id.items():
+        try:
+            count = counts[type_id]
+        except (IndexError, KeyError, TypeError):
+            continue
+        if count > 0:
+            type_counts[msg_type] = count
+    return type_counts
+
+
+def _reader_offset(mlog) -> int:
+    """Byte offset a pymavlink reader has consumed; mmap-based readers track it themselves."""
+    offset = getattr(mlog, 'offset', None)
+    if offset is not None:
+        return offset
+    return mlog.f.tell()
+
+
+def _decode_ulog(log_path: str, writer: _TableWriter, projection: IngestProjection, batch_size: int,
+                 progress: _ProgressReporter) -> dict[str, int]:
+    """
+    Decodes a ULog with the columnar reader: each kept topic is read in batches of up to
+    `batch_size` records straight into Arrow tables and written to its own table, followed
+    by the info, parameter, logged-message and dropout tables. Returns the row counts of
+    the topics and tables the profile skipped.
+    """
+    skipped_types: dict[str, int] = {}
+    with ULogReader(log_path) as reader:
+        bytes_per_record = reader.size / max(reader.num_records, 1)
+        records_done = 0
+        for topic, num_records in reader.record_counts().items():
+            if not projection.keeps_type(topic):
+                skipped_types[topic] = num_records
+                continue
+            every = projection.downsample.get(topic, 1)
+            fields = projection.fields_for(topic, reader.topics[topic].fieldnames)
+            topic_done = 0
+            for batch in reader.read_topic(topic, batch_size, every=every, fields=fields):
+                writer.add_table(topic, batch)
+                topic_done = min(topic_done + batch.num_rows * every, num_records)
+                progress.checkpoint(round((records_done + topic_done) * bytes_per_record))
+            records_done += num_records
+
+        for table_name, table in ((ULOG_INFO_TABLE, reader.info_table()), (ULOG_PARAMETERS_TABLE, reader.parameters_table()),
+                                  (ULOG_LOGGED_MESSAGES_TABLE, reader.logged_messages_table()),
+                                  (ULOG_DROPOUTS_TABLE, reader.dropouts_table())):
+            if table is None:
+                continue
+            if projection.keeps_type(table_name):
+                writer.add_table(table_name, table)
+            else:
+                skipped_types[table_name] = table.num_rows
+        if reader.corrupt_bytes_skipped or reader.unsubscribed_records:
+            logger.warning("ulog_damaged_data_skipped", path=log_path, corrupt_bytes=reader.corrupt_bytes_skipped,
+                           unsubscribed_records=reader.unsubscribed_records)
+    return skipped_types
+
+
+def parse_and_store_log(original_file_obj: typing.IO[bytes] | str,
                         original_filename: str,
                         db_conn: duckdb.DuckDBPyConnection,
-                        log_id: str) -> dict:
+                        log_id: str,
+                        batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+                        workers: int = PARALLEL_PARSE_WORKERS,
+                        progress_callback: typing.Callable[[dict], None] | None = None,
+                        cancel_event: typing.Any | None = None,
+                        profile: IngestProfile | None = None) -> dict:
     """
     Parses a MAVLink log file (e.g., .bin, .tlog) and extracts all messages
-    into separate tables in DuckDB, one for each MAVLink message type.
-    It writes the input file object to a temporary file on disk for robust parsing
-    with pymavlink.
+    into separate tables in DuckDB, one for each MAVLink message type. PX4 ULog
+    files (.ulg, recognised by their header) are decoded by the columnar ULog
+    reader instead, into one table per uORB topic (see _decode_ulog).
+    A path is parsed in place; a file object is first written to a temporary file on
+    disk for robust parsing with pymavlink, whose binary log readers memory-map the file.
+
+    Every table gets a `time_us` column (see TimeNormalizer) and is stored sorted by
+    it, so DuckDB's per-row-group min/max statistics prune time-range scans.
+
+    Messages are streamed into per-type column buffers which are flushed to DuckDB
+    whenever `batch_size` rows are buffered, so peak memory is bounded by the batch
+    size rather than by the size of the log. Large DataFlash and tlog files are
+    decoded in parallel by `workers` processes when more than one is allowed.
 
     Args:
-        original_file_obj: A file-like object opened in binary mode (e.g., UploadFile.file).
+        original_file_obj: The path of a log file on disk, or a file-like object opened in binary mode.
         original_filename: The original name of the uploaded file.
         db_conn: An active DuckDB connection.
         log_id: A unique identifier for this log file session.
+        batch_size: Maximum number of buffered rows before flushing to DuckDB.
+        workers: Number of decoding processes; 1 forces the serial path.
+        progress_callback: Called from the read loop with a progress snapshot (bytes read
+            from the temp file, messages per type, throughput) at most every PROGRESS_INTERVAL_S.
+        cancel_event: Any object with `is_set()`; once set, parsing stops and the
+            status "cancelled" is returned.
+        profile: Message types and fields to keep. Excluded types are skipped using the
+            reader's offset index where it has one, so they are never decoded, and are
+            reported under "deferred_types" so they can be loaded later on demand.
     Returns:
         A dictionary containing the status of the operation, list of created tables,
-        and counts of parsed/stored messages.
+        counts of parsed/stored messages and, on success, seconds spent per stage
+        ("copy" to the temp file for file objects, "decode", Arrow table "build", DuckDB "write", "sort", "total").
     """
-    messages = []
+    timer = _StageTimer()
+    started = time.perf_counter()
+    writer = _TableWriter(db_conn, log_id, batch_size, timer)
+    projection = IngestProjection(profile)
+    skipped_types: dict[str, int] = {}
     temp_file_path = None
 
     try:
-        if hasattr(original_file_obj, 'seek'):
-            original_file_obj.seek(0)
-
-        _, suffix = os.path.splitext(original_filename)
-        if not suffix:
-            suffix = ".log"
-            logger.debug("log_parser_no_suffix_defaulting", original_filename=original_filename, using_suffix=suffix)
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode='wb') as temp_f:
-            shutil.copyfileobj(original_file_obj, temp_f)
-            temp_file_path = temp_f.name
-        
-        logger.debug("log_parser_using_temp_file", path=temp_file_path, original_filename=original_filename)
-
-        mlog = mavutil.mavlink_connection(temp_file_path, robust_parsing=True)
-
-        while True:
-            msg = mlog.recv_match()
-            if msg is None:
-                break
-            
-            if msg.get_type() == 'BAD_DATA':
-                continue
-            messages.append(msg.to_dict())
-        
-        if not messages:
-            logger.info("log_parser_no_messages_found", file_path=temp_file_path, original_filename=original_filename)
-            return {"status": "no_messages_parsed", "log_id": log_id, "tables_created": [], "total_messages_parsed": 0, "total_rows_stored": 0}
+        if isinstance(original_file_obj, str):
+            log_path = original_file_obj
+        else:
+            if hasattr(original_file_obj, 'seek'):
+                original_file_obj.seek(0)
 
-        df = pd.DataFrame(messages)
-        logger.info("log_parser_success", num_messages_parsed=len(df), file_path=temp_file_path, original_filename=original_filename)
-        if df.empty:
-            logger.info("log_parser_empty_dataframe_after_parsing", log_id=log_id, original_filename=original_filename)
-            return {"status": "no_data_to_store", "log_id": log_id, "tables_created": [], "total_messages_parsed": 0, "total_rows_stored": 0}
+            _, suffix = os.path.splitext(original_filename)
+            if not suffix:
+                suffix = ".log"
+                logger.debug("log_parser_no_suffix_defaulting", original_filename=original_filename, using_suffix=suffix)
 
-        if 'mavpackettype' not in df.columns:
-            logger.error("log_parser_missing_mavpackettype_column", log_id=log_id, columns=df.columns.tolist())
-            return {"status": "error", "message": "mavpackettype column missing in parsed data", "log_id": log_id}
+            with timer.stage("copy"), tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode='wb') as temp_f:
+                shutil.copyfileobj(original_file_obj, temp_f)
+                temp_file_path = temp_f.name
+            log_path = temp_file_path
+            logger.debug("log_parser_using_temp_file", path=temp_file_path, original_filename=original_filename)
 
-        created_tables = []
-        total_rows_stored = 0
+        total_bytes = os.path.getsize(log_path)
+        progress = _ProgressReporter(writer, total_bytes, progress_callback, cancel_event)
+        progress.checkpoint(0, force=True)
 
-        for msg_type, group_df in df.groupby('mavpackettype'):
-            if group_df.empty:
-                continue
-            
-            # Sanitize table name slightly, though mavpackettype is usually safe
-            table_name = f"{msg_type.replace('-', '_').replace('.', '_')}" 
-            
-            quoted_view_name = f"df_view_{table_name}"
-            try:
-                logger.debug(f"Attempting to register view: \"{quoted_view_name}\" for msg_type: {msg_type}")
-                db_conn.register(quoted_view_name, group_df)
-            
-
-                logger.debug(f"Attempting to create table: \"{table_name}\" from view \"{quoted_view_name}\"")
-                db_conn.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM "{quoted_view_name}"')
-                db_conn.unregister(quoted_view_name)
-                
-                created_tables.append(table_name)
-                total_rows_stored += len(group_df)
-                logger.debug("duckdb_table_created_from_log", table_name=table_name, log_id=log_id, num_rows=len(group_df))
-            except Exception as e_db:
-                logger.error("duckdb_table_creation_failed", table_name=table_name, log_id=log_id, error=str(e_db), exc_info=True)
+        decode_started = time.perf_counter()
+        if is_ulog(log_path):
+            logger.info("log_parser_ulog_mode", log_id=log_id, original_filename=original_filename)
+            skipped_types = _decode_ulog(log_path, writer, projection, batch_size, progress)
+        elif original_filename.lower().endswith(".ulg"):
+            raise ULogFormatError("The .ulg file does not start with a ULog header.")
+        elif workers > 1 and can_parse_in_parallel(log_path):
+            logger.info("log_parser_parallel_mode", log_id=log_id, workers=workers, original_filename=original_filename)
+            for range_end, range_buffers, range_skipped in decode_log_parallel(log_path, workers=workers, profile=profile):
+                for buffer in range_buffers.values():
+                    writer.add_buffer(buffer)
+                for msg_type, count in range_skipped.items():
+                    skipped_types[msg_type] = skipped_types.get(msg_type, 0) + count
+                progress.checkpoint(range_end)
+        else:
+            mlog = mavutil.mavlink_connection(log_path, robust_parsing=True)
+
+            wanted_types = None
+            if projection.filters_types:
+                type_counts = _indexed_type_counts(mlog)
+                if type_counts is not None:
+                    # recv_match(type=...) seeks between indexed messages of the wanted types.
+                    wanted_types = projection.select_types(type_counts)
+                    skipped_types = {t: n for t, n in type_counts.items() if not projection.keeps_type(t)}
+
+            clock = TimeNormalizer()
+            messages_since_check = 0
+            while True:
+                msg = mlog.recv_match(type=wanted_types)
+                if msg is None:
+                    break
+                # Counted before any filtering, so long runs of excluded types still reach the cancel check.
+                messages_since_check += 1
+                if messages_since_check >= PROGRESS_CHECK_EVERY:
+                    messages_since_check = 0
+                    progress.checkpoint(_reader_offset(mlog))
+
+                msg_type = msg.get_type()
+                if msg_type == 'BAD_DATA':
+                    continue
+                time_us = clock.time_us(msg)
+                if not projection.keeps_type(msg_type):
+                    if wanted_types is None:
+                        skipped_types[msg_type] = skipped_types.get(msg_type, 0) + 1
+                    continue
+                if projection.take(msg_type):
+                    writer.add_message(msg, projection, time_us)
+
+        # Batches are built and written from inside the read loop; what remains is decoding.
+        timer.seconds["decode"] = time.perf_counter() - decode_started - timer.seconds.get("build", 0.0) - timer.seconds.get("write", 0.0)
+        writer.flush_all()
+        writer.sort_tables_by_time()
+        progress.checkpoint(total_bytes, force=True)
+        total_messages_parsed = writer.total_messages_parsed
+        timer.seconds["total"] = time.perf_counter() - started
+        logger.info("log_parser_stage_timings", log_id=log_id, **timer.rounded())
+
+        if total_messages_parsed == 0:
+            logger.info("log_parser_no_messages_found", file_path=log_path, original_filename=original_filename)
+            return {"status": "no_messages_parsed", "log_id": log_id, "tables_created": [], "total_messages_parsed": 0, "total_rows_stored": 0}
+
+        logger.info("log_parser_success", num_messages_parsed=total_messages_parsed, file_path=log_path, original_filename=original_filename)
+
+        created_tables = list(writer.tables_created)
+        total_rows_stored = sum(writer.rows_stored.values())
 
         if not created_tables:
-            logger.warning("log_parser_no_tables_created_in_db", log_id=log_id, total_messages_parsed=len(df))
-            return {"status": "no_tables_stored", "log_id": log_id, "tables_created": [], "total_messages_parsed": len(df), "total_rows_stored": 0}
+            logger.warning("log_parser_no_tables_created_in_db", log_id=log_id, total_messages_parsed=total_messages_parsed)
+            return {"status": "no_tables_stored", "log_id": log_id, "tables_created": [], "total_messages_parsed": total_messages_parsed, "total_rows_stored": 0}
 
         logger.info("log_parser_storage_success", log_id=log_id, num_tables=len(created_tables), total_rows_stored=total_rows_stored, original_filename=original_filename)
         return {
             "status": "success",
             "log_id": log_id,
             "tables_created": created_tables,
-            "total_messages_parsed": len(df),
-            "total_rows_stored": total_rows_stored
+            "total_messages_parsed": total_messages_parsed,
+            "total_rows_stored": total_rows_stored,
+            "deferred_types": sorted(skipped_types),
+            "stage_timings_s": timer.rounded(),
         }
 
+    except IngestCancelled:
+        logger.info("log_parser_cancelled", log_id=log_id, original_filename=original_filename, messages_parsed=writer.total_messages_parsed)
+        return {"status": "cancelled", "message": "Log ingest was cancelled.", "log_id": log_id}
     except Exception as e:
         log_context = {"original_filename": original_filename, "file_object_info": str(original_file_obj)}
         if temp_file_path:
@@ -122,4 +433,4 @@ def parse_and_store_log(original_file_obj: typing.IO[bytes],
                 os.remove(temp_file_path)
                 logger.debug("temp_log_file_deleted", path=temp_file_path)
             except OSError as e_os:
-                logger.warning("temp_log_file_deletion_failed", path=temp_file_path, error=str(e_os))
\ No newline at end of file
+                logger.warning("temp_log_file_deletion_failed", path=temp_file_path, error=str(e_os))
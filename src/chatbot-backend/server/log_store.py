@@ -0,0 +1,436 @@
+import glob
+import json
+import os
+import re
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import typing
+
+import duckdb
+import structlog
+
+from server.column_buffers import table_name_for
+from server.duckdb_manager import drop_tables_for_log_id
+from server.flight_summary import build_flight_summary, log_metadata
+from server.ingest_profile import profile_fingerprint
+from server.log_parser import parse_and_store_log
+from server.metrics import observe_parse_result
+from server.models import IngestProfile
+from server.parquet_bundle import BundleError, import_log_bundle, is_bundle_filename
+from server.workers import WorkerPool
+
+logger = structlog.get_logger()
+
+LOG_STORE_DIR = os.getenv("LOG_STORE_DIR", "log_store")
+LOG_STORE_MAX_BYTES = int(os.getenv("LOG_STORE_MAX_BYTES", str(10 * 1024 ** 3)))
+# Uploads in incoming/ untouched for this long are leftovers of a crashed process.
+LOG_STORE_STALE_UPLOAD_S = float(os.getenv("LOG_STORE_STALE_UPLOAD_S", str(24 * 3600)))
+
+def parse_log_file_into_database(log_path: str, filename: str, db_path: str, log_id: str,
+                                 progress_queue: typing.Any | None = None,
+                                 cancel_event: typing.Any | None = None,
+                                 profile: IngestProfile | None = None, summarize: bool = True) -> dict:
+    """
+    Parses a log file on disk into a fresh DuckDB database file. Runs in a parse worker process,
+    so progress is reported by putting snapshots on `progress_queue` (e.g. a multiprocessing
+    manager queue) and cancellation is signalled through a shared `cancel_event`.
+    With `summarize`, the flight summary and rollup tables are built before returning.
+    """
+    log_conn = duckdb.connect(database=db_path, read_only=False)
+    try:
+        parse_result = parse_and_store_log(
+            original_file_obj=log_path,
+            original_filename=filename,
+            db_conn=log_conn,
+            log_id=log_id,
+            progress_callback=progress_queue.put if progress_queue is not None else None,
+            cancel_event=cancel_event,
+            profile=profile
+        )
+        if summarize and parse_result.get("status") == "success":
+            summary_started = time.perf_counter()
+            try:
+                parse_result["flight_summary"] = build_flight_summary(log_conn)
+            except Exception as e_summary:
+                # The raw tables are still usable without the summary.
+                logger.error("flight_summary_failed", log_id=log_id, error=str(e_summary), exc_info=True)
+            parse_result["metadata"] = log_metadata(log_conn)
+            parse_result["stage_timings_s"]["summary"] = round(time.perf_counter() - summary_started, 4)
+        if parse_result.get("status") == "success":
+            # ru_maxrss is in KiB on Linux; it is this worker's peak over all the parses it has run.
+            parse_result["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return parse_result
+    finally:
+        log_conn.close()
+
+
+def _remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _path_bytes(path: str) -> int:
+    """Size of a file, or of all files under a directory; 0 if it has vanished."""
+    if os.path.isdir(path):
+        return sum(_path_bytes(os.path.join(path, name)) for name in os.listdir(path))
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class LogStore:
+    """
+    Persistent store of parsed logs, one DuckDB database file per log content hash.
+
+    Each stored log is attached read-only to the shared connection under its log id,
+    so re-uploading a known file skips parsing entirely. The store directory is kept
+    under `max_bytes` by evicting the least recently used logs.
+
+    Next to `<log_id>.duckdb` the store keeps a `<log_id>.json` manifest. Logs ingested
+    with a profile that excluded message types also keep the raw upload
+    (`<log_id>.raw<ext>`) so those types can be parsed on demand into a writable
+    `<log_id>.deferred.duckdb` database, attached as `<log_id>_deferred`.
+
+    Parquet bundles (see server.parquet_bundle) are not parsed: their files are unpacked
+    into `<log_id>.parquet/` and `<log_id>.duckdb` only holds views over them.
+
+    Uploads are written straight into `incoming/` (see `new_upload_path`), on the same
+    filesystem as the store, and parsed where they land.
+    """
+    def __init__(self, conn: duckdb.DuckDBPyConnection | None,
+                 store_dir: str = LOG_STORE_DIR,
+                 max_bytes: int = LOG_STORE_MAX_BYTES):
+        self.conn = conn
+        self.store_dir = store_dir
+        self.incoming_dir = os.path.join(store_dir, "incoming")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._ingest_locks: dict[str, threading.Lock] = {}
+        self.attached: set[str] = set()
+        self._stored_listeners: list[typing.Callable[[str], None]] = []
+        self._evicted_listeners: list[typing.Callable[[str], None]] = []
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        self._remove_stale_uploads()
+        logger.info("log_store_initialized", store_dir=self.store_dir, max_bytes=self.max_bytes)
+
+    @staticmethod
+    def log_id_for_hash(content_hash: str, profile: IngestProfile | None = None) -> str:
+        """Log id of a file's content; ingesting with a non-trivial profile yields a separate log."""
+        fingerprint = profile_fingerprint(profile)
+        if fingerprint:
+            return f"log_{content_hash[:16]}_{fingerprint}"
+        return f"log_{content_hash[:16]}"
+
+    @staticmethod
+    def deferred_catalog_for(log_id: str) -> str:
+        return f"{log_id}_deferred"
+
+    def path_for(self, log_id: str) -> str:
+        return os.path.join(self.store_dir, f"{log_id}.duckdb")
+
+    def _remove_stale_uploads(self):
+        """Deletes uploads left in incoming/ by processes that died mid-request. Spawned workers
+        import this module too, so only files too old to belong to a live request are removed."""
+        cutoff = time.time() - LOG_STORE_STALE_UPLOAD_S
+        for path in glob.glob(os.path.join(glob.escape(self.incoming_dir), "*")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    logger.info("log_store_stale_upload_removed", path=path)
+            except OSError as e_os:
+                logger.warning("log_store_stale_upload_removal_failed", path=path, error=str(e_os))
+
+    def new_upload_path(self, filename: str) -> str:
+        """A fresh path in incoming/ for an upload of `filename`, keeping its extension for the parser."""
+        _, suffix = os.path.splitext(filename)
+        fd, path = tempfile.mkstemp(dir=self.incoming_dir, suffix=suffix)
+        os.close(fd)
+        return path
+
+    def manifest_path_for(self, log_id: str) -> str:
+        return os.path.join(self.store_dir, f"{log_id}.json")
+
+    def deferred_path_for(self, log_id: str) -> str:
+        return os.path.join(self.store_dir, f"{log_id}.deferred.duckdb")
+
+    def parquet_dir_for(self, log_id: str) -> str:
+        return os.path.join(self.store_dir, f"{log_id}.parquet")
+
+    def read_manifest(self, log_id: str) -> dict:
+        try:
+            with open(self.manifest_path_for(log_id)) as manifest_f:
+                return json.load(manifest_f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, log_id: str, manifest: dict):
+        temp_path = f"{self.manifest_path_for(log_id)}.tmp"
+        with open(temp_path, 'w') as manifest_f:
+            json.dump(manifest, manifest_f, indent=2)
+        os.replace(temp_path, self.manifest_path_for(log_id))
+
+    def update_manifest(self, log_id: str, **fields):
+        with self._lock:
+            self._write_manifest(log_id, {**self.read_manifest(log_id), **fields})
+
+    def on_log_stored(self, callback: typing.Callable[[str], None]):
+        """Registers `callback(log_id)` to run after a log, or tables loaded into it on demand, are stored."""
+        self._stored_listeners.append(callback)
+
+    def on_log_evicted(self, callback: typing.Callable[[str], None]):
+        """Registers `callback(log_id)` to run after a log is evicted from the store."""
+        self._evicted_listeners.append(callback)
+
+    def stored_log_ids(self) -> list[str]:
+        return sorted(name[:-len(".duckdb")] for name in os.listdir(self.store_dir)
+                      if name.endswith(".duckdb") and not name.endswith(".deferred.duckdb"))
+
+    def contains(self, log_id: str) -> bool:
+        return os.path.exists(self.path_for(log_id))
+
+    def attach(self, log_id: str, touch: bool = True):
+        """Attaches a stored log read-only under its log id and, with `touch`, marks it as recently used."""
+        path = self.path_for(log_id)
+        with self._lock:
+            if log_id not in self.attached:
+                self.conn.execute(f"ATTACH '{path}' AS \"{log_id}\" (READ_ONLY)")
+                self.attached.add(log_id)
+                logger.info("log_store_attached", log_id=log_id, path=path)
+                if os.path.exists(self.deferred_path_for(log_id)):
+                    self._attach_deferred(log_id)
+        if not touch:
+            return
+        try:
+            os.utime(path)
+        except OSError as e_os:
+            logger.warning("log_store_touch_failed", log_id=log_id, error=str(e_os))
+
+    def _attach_deferred(self, log_id: str):
+        """Attaches (creating if needed) the writable database of on-demand types. Caller holds `_lock`."""
+        catalog = self.deferred_catalog_for(log_id)
+        if catalog not in self.attached:
+            self.conn.execute(f"ATTACH '{self.deferred_path_for(log_id)}' AS \"{catalog}\"")
+            self.attached.add(catalog)
+            logger.info("log_store_deferred_attached", log_id=log_id, catalog=catalog)
+
+    def query_catalogs(self, log_id: str) -> list[str]:
+        """Catalogs a query against the log should search, in order."""
+        catalog = self.deferred_catalog_for(log_id)
+        with self._lock:
+            return [log_id, catalog] if catalog in self.attached else [log_id]
+
+    def deferred_types(self, log_id: str) -> list[str]:
+        """Message types excluded at ingest that have not been loaded on demand yet."""
+        deferred = self.read_manifest(log_id).get("deferred_types", [])
+        if not deferred:
+            return []
+        catalog = self.deferred_catalog_for(log_id)
+        with self._lock:
+            if catalog not in self.attached:
+                return list(deferred)
+            loaded = {row[0] for row in self.conn.execute(
+                "SELECT table_name FROM information_schema.tables WHERE table_catalog = ?", [catalog]).fetchall()}
+        return [msg_type for msg_type in deferred if table_name_for(msg_type) not in loaded]
+
+    def deferred_types_in_query(self, log_id: str, sql_query: str) -> list[str]:
+        """Deferred message types whose table name appears in the query."""
+        return [msg_type for msg_type in self.deferred_types(log_id)
+                if re.search(rf'(?<!\w){re.escape(table_name_for(msg_type))}(?!\w)', sql_query, re.IGNORECASE)]
+
+    def load_deferred_types(self, log_id: str, msg_types: typing.Iterable[str], parse_pool: WorkerPool | None = None) -> dict:
+        """
+        Parses message types that were excluded at ingest from the retained raw file and
+        adds them to the log's deferred database. Blocks until done, like `ingest`.
+        """
+        msg_types = sorted(set(msg_types))
+        manifest = self.read_manifest(log_id)
+        raw_file = manifest.get("raw_file")
+        if not msg_types or not raw_file:
+            return {"status": "no_raw_file", "log_id": log_id, "tables_created": []}
+
+        with self._lock:
+            ingest_lock = self._ingest_locks.setdefault(log_id, threading.Lock())
+        with ingest_lock:
+            msg_types = [t for t in msg_types if t in self.deferred_types(log_id)]
+            if not msg_types:
+                return {"status": "success", "log_id": log_id, "tables_created": []}
+
+            logger.info("log_store_loading_deferred_types", log_id=log_id, msg_types=msg_types)
+            raw_path = os.path.join(self.store_dir, raw_file)
+            temp_path = f"{self.deferred_path_for(log_id)}.incoming"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            args = (raw_path, manifest.get("filename", raw_file), temp_path, log_id, None, None,
+                    IngestProfile(include_types=msg_types), False)
+            try:
+                if parse_pool is not None:
+                    parse_result = parse_pool.submit(parse_log_file_into_database, *args).result()
+                else:
+                    parse_result = parse_log_file_into_database(*args)
+                if parse_result.get("status") != "success":
+                    return parse_result
+
+                incoming = f"{log_id}_incoming"
+                with self._lock:
+                    self._attach_deferred(log_id)
+                    catalog = self.deferred_catalog_for(log_id)
+                    self.conn.execute(f"ATTACH '{temp_path}' AS \"{incoming}\" (READ_ONLY)")
+                    try:
+                        for table_name in parse_result["tables_created"]:
+                            self.conn.execute(f'CREATE OR REPLACE TABLE "{catalog}".main."{table_name}" AS SELECT * FROM "{incoming}".main."{table_name}"')
+                    finally:
+                        self.conn.execute(f'DETACH DATABASE "{incoming}"')
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        logger.info("log_store_deferred_types_loaded", log_id=log_id, tables=parse_result["tables_created"])
+        for callback in self._stored_listeners:
+            callback(log_id)
+        return parse_result
+
+    def ingest(self, upload_path: str, filename: str, content_hash: str,
+               keep: typing.Iterable[str] = (), parse_pool: WorkerPool | None = None,
+               progress_queue: typing.Any | None = None, cancel_event: typing.Any | None = None,
+               profile: IngestProfile | None = None) -> dict:
+        """
+        Makes the log with the given content hash available on the shared connection,
+        parsing it into a new database file only if it is not already stored.
+        The upload at `upload_path` (normally from `new_upload_path`) is parsed in place and
+        then kept as the raw file or deleted; either way the store takes ownership of it.
+
+        Parsing runs on `parse_pool` when one is given (the call still blocks until it
+        finishes, so callers on the event loop should run this method in a thread).
+        `progress_queue` and `cancel_event` are handed to the parser (see
+        parse_log_file_into_database); they are unused on cache hits. Message types
+        excluded by `profile` can be loaded later with `load_deferred_types`. Parquet
+        bundles are unpacked instead of parsed and take no profile.
+        Logs in `keep` (e.g. those open in sessions) are never evicted to make room.
+        Returns the parse result dictionary; cache hits report status "success" with
+        `cached` set to True.
+        """
+        is_bundle = is_bundle_filename(filename)
+        log_id = self.log_id_for_hash(content_hash, profile)
+        with self._lock:
+            ingest_lock = self._ingest_locks.setdefault(log_id, threading.Lock())
+
+        with ingest_lock:
+            if self.contains(log_id):
+                logger.info("log_store_hit", log_id=log_id, content_hash=content_hash, filename=filename)
+                _remove_upload(upload_path)
+                self.attach(log_id)
+                return {"status": "success", "log_id": log_id, "cached": True}
+
+            logger.info("log_store_miss", log_id=log_id, content_hash=content_hash, filename=filename)
+            final_path = self.path_for(log_id)
+            temp_path = f"{final_path}.tmp"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            _, suffix = os.path.splitext(filename)
+            raw_file = None
+            try:
+                if is_bundle:
+                    parse_result = self._import_bundle(upload_path, log_id, temp_path)
+                elif parse_pool is not None:
+                    parse_result = parse_pool.submit(parse_log_file_into_database, upload_path, filename, temp_path, log_id,
+                                                     progress_queue, cancel_event, profile).result()
+                else:
+                    parse_result = parse_log_file_into_database(upload_path, filename, temp_path, log_id,
+                                                                progress_queue, cancel_event, profile)
+                if not is_bundle:
+                    observe_parse_result(parse_result, os.path.getsize(upload_path))
+                if parse_result.get("status") == "success" and parse_result.get("deferred_types"):
+                    # Keep the raw file so excluded types can be loaded when a query needs them.
+                    raw_file = f"{log_id}.raw{suffix}"
+                    os.replace(upload_path, os.path.join(self.store_dir, raw_file))
+            finally:
+                _remove_upload(upload_path)
+
+            if parse_result.get("status") != "success":
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return parse_result
+
+            self._write_manifest(log_id, {
+                "log_id": log_id,
+                "filename": filename,
+                "content_hash": content_hash,
+                "profile": profile.model_dump() if profile is not None else None,
+                "tables": parse_result.get("tables_created", []),
+                "deferred_types": parse_result.get("deferred_types", []),
+                "raw_file": raw_file,
+                "bundle": {key: value for key, value in parse_result["bundle"].items() if key != "tables"} if is_bundle else None,
+                "metadata": parse_result.get("metadata"),
+            })
+            os.replace(temp_path, final_path)
+            self.attach(log_id)
+        for callback in self._stored_listeners:
+            callback(log_id)
+
+        self.enforce_size_limit(keep={log_id, *keep})
+        return {**parse_result, "cached": False}
+
+    def _import_bundle(self, bundle_path: str, log_id: str, db_path: str) -> dict:
+        parquet_dir = self.parquet_dir_for(log_id)
+        if os.path.exists(parquet_dir):
+            shutil.rmtree(parquet_dir)
+        try:
+            return {**import_log_bundle(bundle_path, parquet_dir, db_path), "log_id": log_id}
+        except (BundleError, duckdb.Error) as e_bundle:
+            logger.warning("log_store_bundle_rejected", log_id=log_id, error=str(e_bundle))
+            shutil.rmtree(parquet_dir, ignore_errors=True)
+            for path in (db_path, f"{db_path}.wal"):
+                if os.path.exists(path):
+                    os.remove(path)
+            return {"status": "error", "log_id": log_id, "message": str(e_bundle)}
+
+    def enforce_size_limit(self, keep: typing.Iterable[str] = ()):
+        """Evicts least recently used logs, with their companion files, until the store fits in `max_bytes`."""
+        keep = set(keep)
+        evicted = []
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.store_dir):
+                log_id, _, ext = name.partition(".")
+                if ext != "duckdb":
+                    continue
+                try:
+                    mtime = os.stat(os.path.join(self.store_dir, name)).st_mtime
+                except OSError:
+                    continue
+                companions = glob.glob(os.path.join(glob.escape(self.store_dir), f"{log_id}.*"))
+                size = sum(_path_bytes(path) for path in companions)
+                entries.append((mtime, size, log_id))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, log_id in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                if log_id in keep:
+                    continue
+                for catalog in (log_id, self.deferred_catalog_for(log_id)):
+                    if catalog in self.attached:
+                        drop_tables_for_log_id(self.conn, catalog)
+                        self.attached.discard(catalog)
+                try:
+                    # Detaching checkpoints and removes any WAL file, so list the files again.
+                    for path in glob.glob(os.path.join(glob.escape(self.store_dir), f"{log_id}.*")):
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        else:
+                            os.remove(path)
+                    total_bytes -= size
+                    evicted.append(log_id)
+                    logger.info("log_store_evicted", log_id=log_id, size_bytes=size, store_bytes=total_bytes)
+                except OSError as e_os:
+                    logger.warning("log_store_eviction_failed", log_id=log_id, error=str(e_os))
+        for log_id in evicted:
+            for callback in self._evicted_listeners:
+                callback(log_id)
@@ -0,0 +1,319 @@
+import inspect
+import math
+
+import duckdb
+import numpy as np
+import structlog
+from duckdb.typing import DOUBLE
+
+from server.mag_field_tables import DECLINATION_TABLE, INCLINATION_TABLE, INTENSITY_TABLE
+
+logger = structlog.get_logger()
+
+# Vectorized ports of the derived signals in the frontend's src/mavextra/mavextra.js. The JS
+# evaluates them one sample at a time; these take whole columns. The JS unit conversions use
+# rounded constants, kept here so results match the graphs in the log viewer.
+DEGREES_PER_RADIAN = 57.2958
+RADIANS_PER_DEGREE = 0.0174533
+
+SAMPLING_RES = 10.0
+SAMPLING_MIN_LAT = -90.0
+SAMPLING_MAX_LAT = 90.0
+SAMPLING_MIN_LON = -180.0
+SAMPLING_MAX_LON = 180.0
+_DECLINATION = np.array(DECLINATION_TABLE)
+_INCLINATION = np.array(INCLINATION_TABLE)
+_INTENSITY = np.array(INTENSITY_TABLE)
+
+# lowpass runs its recursion in blocks of this many samples: one matrix product per block,
+# and a Python-level carry between blocks.
+LOWPASS_BLOCK = 256
+
+
+def _float_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def degrees(radians_):
+    return DEGREES_PER_RADIAN * _float_array(radians_)
+
+
+def radians(degrees_):
+    return RADIANS_PER_DEGREE * _float_array(degrees_)
+
+
+def kmh(mps):
+    """m/s to km/h."""
+    return _float_array(mps) * 3.6
+
+
+def altitude(press_abs, ground_pressure, ground_temp):
+    """Barometric altitude in m from SCALED_PRESSURE.press_abs (hPa), ground pressure (Pa) and temperature (degC)."""
+    scaling = _float_array(ground_pressure) / (_float_array(press_abs) * 100.0)
+    return np.log(scaling) * (_float_array(ground_temp) + 273.15) * 29271.267 * 0.001
+
+
+def altitude2(press_abs, ground_pressure, ground_temp):
+    """Barometric altitude in m using the standard-atmosphere exponent, with altitude's inputs."""
+    scaling = _float_array(press_abs) * 100.0 / _float_array(ground_pressure)
+    return 153.8462 * (_float_array(ground_temp) + 273.15) * (1.0 - np.exp(0.190259 * np.log(scaling)))
+
+
+def _euler_dcm(roll, pitch, yaw) -> list[np.ndarray]:
+    """Row-major elements of Matrix3.fromEuler for each sample (angles in radians)."""
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cr, sr = np.cos(roll), np.sin(roll)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    return [cp * cy, sr * sp * cy - cr * sy, cr * sp * cy + sr * sy,
+            cp * sy, sr * sp * sy + cr * cy, cr * sp * sy - sr * cy,
+            -sp, sr * cp, cr * cp]
+
+
+def _tilt_compensated_heading(mag_x, mag_y, mag_z, roll, pitch, yaw, declination):
+    # Goes through the DCM like the autopilot does.
+    dcm = _euler_dcm(_float_array(roll), _float_array(pitch), _float_array(yaw))
+    mag_x, mag_y, mag_z = _float_array(mag_x), _float_array(mag_y), _float_array(mag_z)
+    cos_pitch_sqr = 1.0 - dcm[6] * dcm[6]
+    head_y = mag_y * dcm[8] - mag_z * dcm[7]
+    head_x = mag_x * cos_pitch_sqr - dcm[6] * (mag_y * dcm[7] + mag_z * dcm[8])
+    return degrees(np.arctan2(-head_y, head_x)) + _float_array(declination)
+
+
+def mag_heading(mag_x, mag_y, mag_z, roll, pitch, yaw, declination=0.0):
+    """
+    Heading in degrees from raw magnetometer readings (RAW_IMU xmag/ymag/zmag) and attitude
+    in radians (ATTITUDE). `declination` is in degrees. Wrapped like the JS, to [-180, 360).
+    """
+    heading = _tilt_compensated_heading(mag_x, mag_y, mag_z, roll, pitch, yaw, declination)
+    return np.where(heading < -180, heading + 360, heading)
+
+
+def mag_heading_df(mag_x, mag_y, mag_z, roll, pitch, yaw, declination=0.0):
+    """mag_heading for DataFlash MAG and ATT, whose attitude is in degrees. Wrapped to [0, 360)."""
+    heading = _tilt_compensated_heading(mag_x, mag_y, mag_z, radians(roll), radians(pitch), radians(yaw), declination)
+    return np.where(heading < 0, heading + 360, heading)
+
+
+def mag_field(mag_x, mag_y, mag_z):
+    """Magnetic field strength from raw magnetometer readings."""
+    return np.sqrt(_float_array(mag_x) ** 2 + _float_array(mag_y) ** 2 + _float_array(mag_z) ** 2)
+
+
+def _lowpass_run(values: np.ndarray, factor: float) -> np.ndarray:
+    """y[0] = x[0], y[i] = factor * y[i-1] + (1 - factor) * x[i], for a run without NaNs."""
+    out = np.empty(len(values))
+    if len(values) == 0:
+        return out
+    out[0] = values[0]
+    rest = (1.0 - factor) * values[1:]
+    if len(rest) == 0:
+        return out
+    block = min(LOWPASS_BLOCK, len(rest))
+    num_blocks = -(-len(rest) // block)
+    inputs = np.zeros(num_blocks * block)
+    inputs[:len(rest)] = rest
+    # Within a block, y[j] = sum_{k<=j} factor^(j-k) * u[k] + factor^(j+1) * carry.
+    lags = np.subtract.outer(np.arange(block), np.arange(block))
+    kernel = np.where(lags >= 0, factor ** np.maximum(lags, 0), 0.0)
+    blocks = inputs.reshape(num_blocks, block) @ kernel.T
+    carry_gain = factor ** np.arange(1, block + 1)
+    carry = values[0]
+    for i in range(num_blocks):
+        blocks[i] += carry_gain * carry
+        carry = blocks[i, -1]
+    out[1:] = blocks.ravel()[:len(rest)]
+    return out
+
+
+def lowpass(values, factor: float):
+    """
+    First-order low-pass filter over a series in time order, as mavextra.js applies it
+    sample by sample. A NaN sample yields NaN and restarts the filter at the next sample.
+    """
+    values = _float_array(values)
+    out = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    if valid.all():
+        return _lowpass_run(values, factor)
+    # Runs of consecutive valid samples, each filtered from its first sample.
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], valid, [False])).astype(np.int8)))
+    for start, stop in zip(edges[::2], edges[1::2]):
+        out[start:stop] = _lowpass_run(values[start:stop], factor)
+    return out
+
+
+def delta(values):
+    """Difference from the previous sample in time order; 0 for the first sample and after a NaN."""
+    values = _float_array(values)
+    out = np.zeros(len(values))
+    if len(values) > 1:
+        out[1:] = values[1:] - values[:-1]
+        out[1:][np.isnan(values[:-1])] = 0.0
+    return out
+
+
+def interpolate_table(table: np.ndarray, lat, lon):
+    """Bilinear interpolation in one of the 10-degree magnetic field tables; NaN outside them."""
+    lat, lon = _float_array(lat), _float_array(lon)
+    inside = (lat >= SAMPLING_MIN_LAT) & (lat < SAMPLING_MAX_LAT) & (lon >= SAMPLING_MIN_LON) & (lon < SAMPLING_MAX_LON)
+    lat, lon = np.where(inside, lat, 0.0), np.where(inside, lon, 0.0)
+    min_lat = np.floor(np.floor(lat / SAMPLING_RES) * SAMPLING_RES)
+    min_lon = np.floor(np.floor(lon / SAMPLING_RES) * SAMPLING_RES)
+    lat_index = np.floor(np.floor(-SAMPLING_MIN_LAT + min_lat) / SAMPLING_RES).astype(np.intp)
+    lon_index = np.floor(np.floor(-SAMPLING_MIN_LON + min_lon) / SAMPLING_RES).astype(np.intp)
+
+    data_sw = table[lat_index, lon_index]
+    data_se = table[lat_index, lon_index + 1]
+    data_ne = table[lat_index + 1, lon_index + 1]
+    data_nw = table[lat_index + 1, lon_index]
+    data_min = ((lon - min_lon) / SAMPLING_RES) * (data_se - data_sw) + data_sw
+    data_max = ((lon - min_lon) / SAMPLING_RES) * (data_ne - data_nw) + data_nw
+    value = ((lat - min_lat) / SAMPLING_RES) * (data_max - data_min) + data_min
+    return np.where(inside, value, np.nan)
+
+
+def mag_field_ef(lat, lon):
+    """(declination deg, inclination deg, intensity Gauss) of the earth's field at lat/lon in degrees."""
+    return (interpolate_table(_DECLINATION, lat, lon), interpolate_table(_INCLINATION, lat, lon),
+            interpolate_table(_INTENSITY, lat, lon))
+
+
+def earth_field(lat, lon) -> np.ndarray:
+    """Expected earth-frame magnetic field vector in milligauss at lat/lon, as an (n, 3) array."""
+    declination, inclination, intensity = mag_field_ef(np.atleast_1d(lat), np.atleast_1d(lon))
+    # Matrix3.fromEuler(0, -inclination, declination) applied to (intensity, 0, 0) is its first column.
+    dcm = _euler_dcm(0.0, -radians(inclination), radians(declination))
+    return np.stack([dcm[0], dcm[3], dcm[6]], axis=-1) * (intensity * 1000.0)[:, None]
+
+
+def expected_mag(gps_status, lat, lon, roll, pitch, yaw) -> np.ndarray:
+    """
+    Body-frame magnetic field the compass should read, as an (n, 3) array, for time-aligned
+    GPS fix status, position (degrees) and attitude (degrees). Like mavextra.js, the earth field
+    is taken once, at the first sample with a 3D fix; samples before it give zeros.
+    """
+    gps_status = _float_array(gps_status)
+    roll, pitch, yaw = radians(roll), radians(pitch), radians(yaw)
+    out = np.zeros((len(gps_status), 3))
+    fixed = np.flatnonzero(gps_status >= 3)
+    if len(fixed) == 0:
+        return out
+    first = fixed[0]
+    field = earth_field(_float_array(lat)[first], _float_array(lon)[first])[0]
+    dcm = _euler_dcm(roll[first:], pitch[first:], yaw[first:])
+    # The transposed DCM rotates the earth-frame field into the body frame.
+    out[first:, 0] = dcm[0] * field[0] + dcm[3] * field[1] + dcm[6] * field[2]
+    out[first:, 1] = dcm[1] * field[0] + dcm[4] * field[1] + dcm[7] * field[2]
+    out[first:, 2] = dcm[2] * field[0] + dcm[5] * field[1] + dcm[8] * field[2]
+    return out
+
+
+# The row-wise derivations as SQL macros, so DuckDB evaluates them vectorized in its own
+# threads; Python UDFs in the pinned DuckDB release run under the GIL, and its Arrow UDFs can
+# deadlock the executor. Angles follow mavextra.js: radians for MAVLink ATTITUDE, degrees for
+# DataFlash ATT, with the same rounded conversion constants.
+_MACROS = {
+    "kmh(mps)": "CAST(mps AS DOUBLE) * 3.6",
+    "altitude(press_abs, ground_pressure, ground_temp)":
+        "ln(ground_pressure / (press_abs * 100.0)) * (ground_temp + 273.15) * 29271.267 * 0.001",
+    "altitude2(press_abs, ground_pressure, ground_temp)":
+        "153.8462 * (ground_temp + 273.15) * (1.0 - exp(0.190259 * ln(press_abs * 100.0 / ground_pressure)))",
+    "mag_field(mag_x, mag_y, mag_z)": "sqrt(mag_x * mag_x + mag_y * mag_y + mag_z * mag_z)",
+    "mavextra_heading(mag_x, mag_y, mag_z, roll, pitch, declination)":
+        f"{DEGREES_PER_RADIAN} * atan2(-(mag_y * cos(roll) * cos(pitch) - mag_z * sin(roll) * cos(pitch)), "
+        f"mag_x * (1.0 - sin(pitch) * sin(pitch)) + sin(pitch) * (mag_y * sin(roll) * cos(pitch) + mag_z * cos(roll) * cos(pitch))) "
+        f"+ declination",
+    "mavextra_wrap(heading, lower)": "CASE WHEN heading < lower THEN heading + 360 ELSE heading END",
+    "mag_heading(mag_x, mag_y, mag_z, roll, pitch, yaw, declination := 0)":
+        "mavextra_wrap(mavextra_heading(mag_x, mag_y, mag_z, roll, pitch, declination), -180)",
+    "mag_heading_df(mag_x, mag_y, mag_z, roll, pitch, yaw, declination := 0)":
+        f"mavextra_wrap(mavextra_heading(mag_x, mag_y, mag_z, roll * {RADIANS_PER_DEGREE}, pitch * {RADIANS_PER_DEGREE}, "
+        f"declination), 0)",
+    # Rotates an earth-frame vector into the body frame with the transposed Matrix3.fromEuler.
+    "mavextra_body_frame(field, roll, pitch, yaw)":
+        "struct_pack("
+        "x := cos(pitch) * cos(yaw) * field.x + cos(pitch) * sin(yaw) * field.y - sin(pitch) * field.z, "
+        "y := (sin(roll) * sin(pitch) * cos(yaw) - cos(roll) * sin(yaw)) * field.x "
+        "+ (sin(roll) * sin(pitch) * sin(yaw) + cos(roll) * cos(yaw)) * field.y + sin(roll) * cos(pitch) * field.z, "
+        "z := (cos(roll) * sin(pitch) * cos(yaw) + sin(roll) * sin(yaw)) * field.x "
+        "+ (cos(roll) * sin(pitch) * sin(yaw) - sin(roll) * cos(yaw)) * field.y + cos(roll) * cos(pitch) * field.z)",
+    "expected_mag(ref_lat, ref_lon, roll, pitch, yaw)":
+        f"mavextra_body_frame(earth_field(ref_lat, ref_lon), roll * {RADIANS_PER_DEGREE}, pitch * {RADIANS_PER_DEGREE}, "
+        f"yaw * {RADIANS_PER_DEGREE})",
+}
+
+
+def _series_udf(fn):
+    """Wraps a series function as a native DuckDB UDF that takes and returns one whole list."""
+    def udf(series, *params):
+        result = fn(np.array(series, dtype=np.float64), *params)
+        return [None if np.isnan(value) else value for value in result.tolist()]
+    udf.__signature__ = inspect.signature(fn)
+    return udf
+
+
+def _interpolate_at(table: list[list[float]], lat: float, lon: float) -> float:
+    """interpolate_table for one position, without NumPy's per-call overhead."""
+    min_lat = math.floor(lat / SAMPLING_RES) * SAMPLING_RES
+    min_lon = math.floor(lon / SAMPLING_RES) * SAMPLING_RES
+    lat_index = int((min_lat - SAMPLING_MIN_LAT) / SAMPLING_RES)
+    lon_index = int((min_lon - SAMPLING_MIN_LON) / SAMPLING_RES)
+    data_sw, data_se = table[lat_index][lon_index], table[lat_index][lon_index + 1]
+    data_nw, data_ne = table[lat_index + 1][lon_index], table[lat_index + 1][lon_index + 1]
+    data_min = ((lon - min_lon) / SAMPLING_RES) * (data_se - data_sw) + data_sw
+    data_max = ((lon - min_lon) / SAMPLING_RES) * (data_ne - data_nw) + data_nw
+    return ((lat - min_lat) / SAMPLING_RES) * (data_max - data_min) + data_min
+
+
+def _mag_field_ef_udf(lat: float, lon: float) -> dict | None:
+    if not (SAMPLING_MIN_LAT <= lat < SAMPLING_MAX_LAT and SAMPLING_MIN_LON <= lon < SAMPLING_MAX_LON):
+        return None
+    return {"declination": _interpolate_at(DECLINATION_TABLE, lat, lon),
+            "inclination": _interpolate_at(INCLINATION_TABLE, lat, lon),
+            "intensity": _interpolate_at(INTENSITY_TABLE, lat, lon)}
+
+
+def _earth_field_udf(lat: float, lon: float) -> dict | None:
+    field = _mag_field_ef_udf(lat, lon)
+    if field is None:
+        return None
+    pitch = -field["inclination"] * RADIANS_PER_DEGREE
+    yaw = field["declination"] * RADIANS_PER_DEGREE
+    scale = field["intensity"] * 1000.0
+    return {"x": scale * math.cos(pitch) * math.cos(yaw), "y": scale * math.cos(pitch) * math.sin(yaw),
+            "z": scale * -math.sin(pitch)}
+
+
+SERIES_FUNCTIONS = {
+    "lowpass": (lowpass, [DOUBLE]),
+    "delta": (delta, []),
+}
+# Looked up row by row in Python, so these suit a reference position (a constant, which
+# DuckDB folds to a single call) or a low-rate GPS table rather than high-rate messages.
+FIELD_FUNCTIONS = {
+    "mag_field_ef": (_mag_field_ef_udf, ("declination", "inclination", "intensity")),
+    "earth_field": (_earth_field_udf, ("x", "y", "z")),
+}
+
+
+def register_mavextra_functions(conn: duckdb.DuckDBPyConnection):
+    """
+    Registers the Python-backed derivations on `conn`, where every cursor sees them. lowpass
+    and delta depend on sample order, so they take and return a whole series as a list,
+    filtered in one NumPy call: SELECT unnest(lowpass(list(Alt ORDER BY time_us), 0.9)) FROM BARO.
+    """
+    series_type = duckdb.list_type(DOUBLE)
+    for name, (fn, param_types) in SERIES_FUNCTIONS.items():
+        conn.create_function(name, _series_udf(fn), [series_type, *param_types], series_type)
+    for name, (fn, fields) in FIELD_FUNCTIONS.items():
+        conn.create_function(name, fn, [DOUBLE, DOUBLE], duckdb.struct_type({field: DOUBLE for field in fields}))
+    logger.info("mavextra_functions_registered", functions=sorted([*SERIES_FUNCTIONS, *FIELD_FUNCTIONS]))
+
+
+def create_mavextra_macros(cursor: duckdb.DuckDBPyConnection):
+    """
+    Defines the row-wise derivations (altitude, mag_heading, expected_mag, ...) as temporary
+    macros on `cursor`. Needs register_mavextra_functions on the cursor's connection first.
+    """
+    for signature, body in _MACROS.items():
+        cursor.execute(f"CREATE OR REPLACE TEMP MACRO {signature} AS {body}")
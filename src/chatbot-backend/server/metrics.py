@@ -0,0 +1,132 @@
+import time
+import typing
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+
+_BYTES_BUCKETS = tuple(2 ** power for power in range(16, 36, 2))  # 64 KiB .. 16 GiB
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+_ROWS_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.",
+    ["method", "route", "status"], buckets=_SECONDS_BUCKETS)
+UPLOAD_BYTES = Histogram(
+    "log_upload_bytes", "Size of uploaded log files and bundles.", buckets=_BYTES_BUCKETS)
+PARSE_MESSAGES_PER_SECOND = Histogram(
+    "log_parse_messages_per_second", "Messages decoded per second of parse time, per parsed log.",
+    buckets=(1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000))
+PARSE_MEGABYTES_PER_SECOND = Histogram(
+    "log_parse_megabytes_per_second", "Log file megabytes parsed per second of parse time, per parsed log.",
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500))
+INGEST_STAGE_SECONDS = Histogram(
+    "log_ingest_stage_seconds", "Time spent in each ingest stage (copy, decode, build, write, sort, summary, total).",
+    ["stage"], buckets=_SECONDS_BUCKETS)
+TABLE_CREATION_SECONDS = Histogram(
+    "duckdb_table_creation_seconds", "Time spent writing and sorting a parsed log's DuckDB tables.",
+    buckets=_SECONDS_BUCKETS)
+PARSE_WORKER_PEAK_RSS_BYTES = Histogram(
+    "log_parse_worker_peak_rss_bytes", "Peak resident memory of the parse worker after each parse.",
+    buckets=_BYTES_BUCKETS)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_seconds", "Latency of each model call, until the full response has been read.",
+    ["endpoint"], buckets=_SECONDS_BUCKETS)
+SQL_QUERY_SECONDS = Histogram(
+    "sql_query_seconds", "Execution time of model-issued and fleet SQL queries.",
+    ["kind"], buckets=_SECONDS_BUCKETS)
+SQL_QUERY_ROWS = Histogram(
+    "sql_query_rows", "Rows produced by model-issued and fleet SQL queries, before sampling.",
+    ["kind"], buckets=_ROWS_BUCKETS)
+CHAT_DB_QUERY_ITERATIONS = Histogram(
+    "chat_db_query_iterations", "Database queries run by the model in one chat turn.",
+    ["endpoint"], buckets=(0, 1, 2, 3, 4, 5))
+
+
+def observe_parse_result(parse_result: dict, file_bytes: int):
+    """
+    Records throughput, stage timings and worker memory from a fresh parse. Parsing runs in
+    worker processes, so their figures travel back in the parse result and are recorded here.
+    """
+    timings = parse_result.get("stage_timings_s")
+    if parse_result.get("status") != "success" or parse_result.get("cached") or not timings:
+        return
+    for stage, seconds in timings.items():
+        INGEST_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    TABLE_CREATION_SECONDS.observe(timings.get("write", 0.0) + timings.get("sort", 0.0))
+    parse_seconds = timings.get("total")
+    if parse_seconds:
+        PARSE_MESSAGES_PER_SECOND.observe(parse_result.get("total_messages_parsed", 0) / parse_seconds)
+        PARSE_MEGABYTES_PER_SECOND.observe(file_bytes / 1e6 / parse_seconds)
+    if parse_result.get("peak_rss_bytes"):
+        PARSE_WORKER_PEAK_RSS_BYTES.observe(parse_result["peak_rss_bytes"])
+
+
+def observe_sql_query(kind: str, result: dict):
+    """Records the latency and size of a budgeted query result (see run_budgeted_query)."""
+    SQL_QUERY_SECONDS.labels(kind=kind).observe(result["elapsed_ms"] / 1000)
+    total_rows = result["total_rows"] if result["total_rows"] is not None else len(result["rows"])
+    SQL_QUERY_ROWS.labels(kind=kind).observe(total_rows)
+
+
+@contextmanager
+def time_llm_call(endpoint: str):
+    """Records the latency of the model call made inside the block under `endpoint`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        LLM_CALL_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - started)
+
+
+async def timed_llm_stream(endpoint: str, response_call: typing.Awaitable) -> typing.AsyncIterator:
+    """
+    Awaits a streamed model call and yields its chunks, recording under `endpoint` only the time
+    spent waiting on the model. Time the caller spends between chunks (e.g. while a slow client
+    reads them) is left out. Use with contextlib.aclosing when the caller may stop early.
+    """
+    waited_s = 0.0
+    wait_started = time.perf_counter()
+    try:
+        response = await response_call
+        async for chunk in response:
+            waited_s += time.perf_counter() - wait_started
+            wait_started = None
+            yield chunk
+            wait_started = time.perf_counter()
+    finally:
+        if wait_started is not None:
+            waited_s += time.perf_counter() - wait_started
+        LLM_CALL_SECONDS.labels(endpoint=endpoint).observe(waited_s)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request durations by route template, including streamed bodies."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(method=scope["method"], route=getattr(route, "path", "unmatched"),
+                                        status=str(status)).observe(time.perf_counter() - started)
+
+
+def metrics_endpoint(_request: Request) -> Response:
+    """Prometheus text exposition of the default registry (these histograms plus process metrics)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
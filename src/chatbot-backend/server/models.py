@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Any
+
 from pydantic import BaseModel
 
 class ChatMessage(BaseModel):
@@ -6,7 +9,87 @@ class ChatMessage(BaseModel):
 class ChatResponse(BaseModel):
     response: str
 
+class IngestProfile(BaseModel):
+    """
+    Which message types and fields to materialize when a log is ingested.
+
+    `include_types` limits ingest to the listed types (None keeps every type);
+    `exclude_types` skips types, which stay loadable on demand from the raw file;
+    `downsample` keeps every Nth message of a type; `drop_fields` removes fields
+    per type, with the key "*" applying to every type.
+    """
+    include_types: list[str] | None = None
+    exclude_types: list[str] = []
+    downsample: dict[str, int] = {}
+    drop_fields: dict[str, list[str]] = {}
+
+    def is_empty(self) -> bool:
+        return self.include_types is None and not self.exclude_types and not self.downsample and not self.drop_fields
+
 class UploadResponse(BaseModel):
     message: str
     filename: str
     log_id: str | None = None
+    session_id: str | None = None
+
+class SeriesData(BaseModel):
+    time_us: list[int]
+    values: list[float | int | None]
+
+class SeriesResponse(BaseModel):
+    table: str
+    method: str
+    start_us: int | None = None
+    end_us: int | None = None
+    total_rows: int
+    series: dict[str, SeriesData]
+
+class UploadJobStatus(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+    session_id: str | None = None
+    log_id: str | None = None
+    message: str | None = None
+    progress: dict[str, Any] = {}
+
+class FleetFilter(BaseModel):
+    """
+    Narrows a fleet query to stored logs whose metadata matches every field that is set.
+    `firmware` matches a version prefix ("4.5" matches 4.5.1); start times are UTC, and
+    `message_types` keeps logs that contain all of the listed tables.
+    """
+    log_ids: list[str] | None = None
+    vehicle: str | None = None
+    firmware: str | None = None
+    start_after: datetime | None = None
+    start_before: datetime | None = None
+    min_duration_s: float | None = None
+    max_duration_s: float | None = None
+    message_types: list[str] = []
+
+class FleetQueryRequest(FleetFilter):
+    sql: str
+
+class FleetLog(BaseModel):
+    log_id: str
+    filename: str | None = None
+    content_hash: str | None = None
+    vehicle: str | None = None
+    firmware: str | None = None
+    start_time: datetime | None = None
+    duration_s: float | None = None
+    time_us_min: int | None = None
+    time_us_max: int | None = None
+    message_types: list[str] = []
+
+class FleetLogsResponse(BaseModel):
+    logs: list[FleetLog]
+
+class FleetQueryResponse(BaseModel):
+    log_ids: list[str]
+    columns: list[str]
+    rows: list[list[Any]]
+    total_rows: int | None = None
+    truncated: bool
+    note: str
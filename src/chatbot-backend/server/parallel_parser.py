@@ -0,0 +1,276 @@
+import array
+import mmap
+import multiprocessing
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import structlog
+from pymavlink import mavutil
+from pymavlink.DFReader import DFFormat, DFMessage, null_term
+
+from server.column_buffers import MessageTypeBuffer, dataflash_column_types, message_column_types
+from server.ingest_profile import IngestProjection, project_message
+from server.models import IngestProfile
+from server.time_index import TIME_COLUMN, TimeNormalizer
+from server.workers import LOG_PARSE_WORKERS
+
+logger = structlog.get_logger()
+
+# Each parse pool worker may fan out to its own range decoders, so by default every one of them
+# gets an equal share of the CPUs.
+PARALLEL_PARSE_WORKERS = int(os.getenv("PARALLEL_PARSE_WORKERS", str(max(1, (os.cpu_count() or 1) // LOG_PARSE_WORKERS))))
+# Files smaller than this are decoded serially; process start-up would dominate.
+PARALLEL_PARSE_MIN_BYTES = int(os.getenv("PARALLEL_PARSE_MIN_BYTES", str(64 * 1024 * 1024)))
+PARALLEL_PARSE_CHUNK_BYTES = int(os.getenv("PARALLEL_PARSE_CHUNK_BYTES", str(16 * 1024 * 1024)))
+
+DF_HEAD = b"\xa3\x95"
+DF_FMT_TYPE = 0x80
+DF_FMT_LEN = 89
+MAVLINK_STX_V1 = 0xFE
+MAVLINK_STX_V2 = 0xFD
+TLOG_TIMESTAMP_LEN = 8
+# Number of consecutive well-formed records required to accept a sync boundary.
+SYNC_CHAIN_LENGTH = 4
+
+
+def _log_kind(path: str) -> str | None:
+    lower = path.lower()
+    if lower.endswith(".bin") or lower.endswith(".px4log"):
+        return "dataflash"
+    if lower.endswith(".tlog"):
+        return "tlog"
+    return None
+
+
+def can_parse_in_parallel(path: str) -> bool:
+    """Whether a log file is large enough and of a format that supports range decoding."""
+    return _log_kind(path) is not None and os.path.getsize(path) >= PARALLEL_PARSE_MIN_BYTES
+
+
+def read_dataflash_formats(data: mmap.mmap) -> dict[int, DFFormat]:
+    """Collects every FMT definition in a DataFlash log so range workers can share them."""
+    formats = {DF_FMT_TYPE: DFFormat(DF_FMT_TYPE, 'FMT', DF_FMT_LEN, 'BBnNZ', "Type,Length,Name,Format,Columns")}
+    fmt_struct = struct.Struct(formats[DF_FMT_TYPE].msg_struct)
+    marker = DF_HEAD + bytes([DF_FMT_TYPE])
+    ofs = data.find(marker)
+    while ofs != -1 and ofs + DF_FMT_LEN <= len(data):
+        try:
+            ftype, flen, name, fmt, columns = fmt_struct.unpack_from(data, ofs + 3)
+            formats[ftype] = DFFormat(ftype, null_term(name), flen, null_term(fmt), null_term(columns),
+                                      oldfmt=formats.get(ftype))
+        except Exception:
+            # A false-positive marker inside another message's payload.
+            pass
+        ofs = data.find(marker, ofs + 1)
+    return formats
+
+
+def _dataflash_record_len(data: mmap.mmap, ofs: int, formats: dict[int, DFFormat]) -> int | None:
+    if data[ofs:ofs + 2] != DF_HEAD or ofs + 3 > len(data):
+        return None
+    fmt = formats.get(data[ofs + 2])
+    return fmt.len if fmt is not None else None
+
+
+def _tlog_record_len(data: mmap.mmap, ofs: int) -> int | None:
+    stx_ofs = ofs + TLOG_TIMESTAMP_LEN
+    if stx_ofs + 3 > len(data):
+        return None
+    stx = data[stx_ofs]
+    payload_len = data[stx_ofs + 1]
+    if stx == MAVLINK_STX_V1:
+        return TLOG_TIMESTAMP_LEN + 6 + payload_len + 2
+    if stx == MAVLINK_STX_V2:
+        signed = data[stx_ofs + 2] & 0x01
+        return TLOG_TIMESTAMP_LEN + 10 + payload_len + 2 + (13 if signed else 0)
+    return None
+
+
+def _is_sync_point(data: mmap.mmap, ofs: int, record_len) -> bool:
+    """A sync point starts a chain of well-formed records (or one that runs to end of file)."""
+    for _ in range(SYNC_CHAIN_LENGTH):
+        if ofs == len(data):
+            return True
+        length = record_len(data, ofs)
+        if length is None or ofs + length > len(data):
+            return False
+        ofs += length
+    return True
+
+
+def find_sync_boundaries(data: mmap.mmap, kind: str, chunk_bytes: int,
+                         formats: dict[int, DFFormat] | None = None) -> list[int]:
+    """
+    Splits a log into byte ranges whose start offsets fall on message boundaries:
+    DataFlash `0xA3 0x95` headers or tlog timestamps followed by a MAVLink STX marker.
+    Returns the sorted list of range starts, ending with the file length.
+    """
+    if kind == "dataflash":
+        def record_len(buf, ofs):
+            return _dataflash_record_len(buf, ofs, formats)
+    else:
+        record_len = _tlog_record_len
+
+    data_len = len(data)
+    boundaries = [0]
+    nominal = chunk_bytes
+    while nominal < data_len:
+        ofs = nominal
+        found = None
+        while ofs < data_len:
+            if kind == "dataflash":
+                ofs = data.find(DF_HEAD, ofs)
+                if ofs == -1:
+                    break
+            if _is_sync_point(data, ofs, record_len):
+                found = ofs
+                break
+            ofs += 1
+        if found is None:
+            break
+        if found > boundaries[-1]:
+            boundaries.append(found)
+        nominal = max(found + 1, nominal + chunk_bytes)
+    boundaries.append(data_len)
+    return boundaries
+
+
+def _decode_dataflash_range(path: str, start: int, end: int, formats: dict[int, DFFormat],
+                            projection: IngestProjection) -> tuple[dict[str, MessageTypeBuffer], dict[str, int], int | None]:
+    buffers: dict[str, MessageTypeBuffer] = {}
+    skipped: dict[str, int] = {}
+    unpackers = {}
+    clock = TimeNormalizer()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        data_len = len(data)
+        ofs = start
+        while ofs < end and ofs + 3 <= data_len:
+            if data[ofs] != 0xA3 or data[ofs + 1] != 0x95 or data[ofs + 2] not in formats:
+                ofs += 1
+                continue
+            msg_type = data[ofs + 2]
+            fmt = formats[msg_type]
+            if ofs + fmt.len > data_len:
+                break
+            # Filtered records are stepped over by length without unpacking them.
+            if not projection.keeps_type(fmt.name):
+                skipped[fmt.name] = skipped.get(fmt.name, 0) + 1
+                ofs += fmt.len
+                continue
+            if not projection.take(fmt.name):
+                ofs += fmt.len
+                continue
+            unpack = unpackers.get(msg_type)
+            if unpack is None:
+                unpack = unpackers[msg_type] = struct.Struct(fmt.msg_struct).unpack_from
+            try:
+                elements = list(unpack(data, ofs + 3))
+            except struct.error:
+                ofs += 1
+                continue
+            for a_index in fmt.a_indexes:
+                elements[a_index] = array.array('h', elements[a_index])
+            ofs += fmt.len
+
+            msg = DFMessage(fmt, elements, True, None)
+            buffer = buffers.get(fmt.name)
+            if buffer is None:
+                buffer = buffers[fmt.name] = MessageTypeBuffer(fmt.name, [TIME_COLUMN, *projection.fields_for(fmt.name, fmt.columns)],
+                                                             dataflash_column_types(fmt))
+            values = project_message(msg, buffer.fieldnames[1:]) if projection.drop_fields else msg.to_dict()
+            values[TIME_COLUMN] = clock.time_us(msg)
+            buffer.append(values)
+    return buffers, skipped, clock.last_time_us
+
+
+def _decode_tlog_range(path: str, start: int, end: int,
+                       projection: IngestProjection) -> tuple[dict[str, MessageTypeBuffer], dict[str, int], int | None]:
+    buffers: dict[str, MessageTypeBuffer] = {}
+    skipped: dict[str, int] = {}
+    mlog = mavutil.mavlogfile(path, robust_parsing=True)
+    clock = TimeNormalizer()
+    try:
+        mlog.f.seek(start)
+        while mlog.f.tell() < end:
+            msg = mlog.recv_msg()
+            if msg is None:
+                break
+            msg_type = msg.get_type()
+            if msg_type == 'BAD_DATA':
+                continue
+            if not projection.keeps_type(msg_type):
+                skipped[msg_type] = skipped.get(msg_type, 0) + 1
+                continue
+            if not projection.take(msg_type):
+                continue
+            buffer = buffers.get(msg_type)
+            if buffer is None:
+                buffer = buffers[msg_type] = MessageTypeBuffer(msg_type, [TIME_COLUMN, *projection.fields_for(msg_type, msg.get_fieldnames())],
+                                                           message_column_types(msg))
+            values = project_message(msg, buffer.fieldnames[1:]) if projection.drop_fields else msg.to_dict()
+            values[TIME_COLUMN] = clock.time_us(msg)
+            buffer.append(values)
+    finally:
+        mlog.close()
+    return buffers, skipped, clock.last_time_us
+
+
+def _decode_range(path: str, kind: str, start: int, end: int, formats,
+                  profile: IngestProfile | None) -> tuple[dict[str, MessageTypeBuffer], dict[str, int], int | None]:
+    """Decodes one byte range; also returns the last timestamp seen in it, or None."""
+    projection = IngestProjection(profile)
+    if kind == "dataflash":
+        return _decode_dataflash_range(path, start, end, formats, projection)
+    return _decode_tlog_range(path, start, end, projection)
+
+
+def decode_log_parallel(path: str, workers: int = PARALLEL_PARSE_WORKERS,
+                        chunk_bytes: int = PARALLEL_PARSE_CHUNK_BYTES,
+                        profile: IngestProfile | None = None):
+    """
+    Decodes a DataFlash or tlog file in a process pool, one byte range per task.
+
+    Yields `(range_end_offset, buffers, skipped_type_counts)` for each range in file
+    order, so rows of a message type come out in the same (timestamp) order as the
+    serial reader. Each range starts its own TimeNormalizer, so messages decoded before
+    the range's first timestamp are given the last timestamp of the ranges before it
+    here, as the serial reader would. At most two ranges per worker are in flight,
+    which bounds the memory held by pending results. `profile` is applied inside the
+    workers; downsampling counters restart at each range boundary.
+    """
+    kind = _log_kind(path)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        formats = read_dataflash_formats(data) if kind == "dataflash" else None
+        boundaries = find_sync_boundaries(data, kind, chunk_bytes, formats)
+    ranges = list(zip(boundaries[:-1], boundaries[1:]))
+    logger.info("parallel_parse_ranges_computed", path=path, kind=kind, num_ranges=len(ranges), workers=workers)
+
+    last_time_us = None
+
+    def merged(range_end, future):
+        nonlocal last_time_us
+        buffers, skipped, range_last_time_us = future.result()
+        if last_time_us is not None:
+            for buffer in buffers.values():
+                buffer.fill_missing_time(last_time_us)
+        if range_last_time_us is not None:
+            last_time_us = range_last_time_us
+        return range_end, buffers, skipped
+
+    # Spawned workers avoid inheriting the server's threads and open DuckDB handles.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = deque()
+        try:
+            for start, end in ranges:
+                pending.append((end, executor.submit(_decode_range, path, kind, start, end, formats, profile)))
+                if len(pending) >= 2 * workers:
+                    yield merged(*pending.popleft())
+            while pending:
+                yield merged(*pending.popleft())
+        except GeneratorExit:
+            # The consumer stopped early (e.g. a cancelled ingest); drop ranges not yet started.
+            for _, future in pending:
+                future.cancel()
+            raise
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+import duckdb
+import structlog
+
+from server.flight_summary import ROLLUP_BUCKETS_S, log_metadata
+from server.time_index import TIME_COLUMN
+
+logger = structlog.get_logger()
+
+BUNDLE_FORMAT = "mavlog-parquet-bundle"
+BUNDLE_VERSION = 1
+BUNDLE_EXTENSION = ".zip"
+BUNDLE_MANIFEST = "manifest.json"
+BUNDLE_SCHEMAS = ("main", *ROLLUP_BUCKETS_S)
+# Member names are "<schema>/<table>.parquet"; anything else in the archive is ignored.
+_MEMBER_NAME = re.compile(r"^(?P<schema>[A-Za-z0-9_]+)/(?P<table>[A-Za-z0-9_]+)\.parquet$")
+
+
+class BundleError(ValueError):
+    """Raised for archives that are not valid Parquet log bundles."""
+
+
+def is_bundle_filename(filename: str) -> bool:
+    return filename.lower().endswith(BUNDLE_EXTENSION)
+
+
+def _export_tables(cursor: duckdb.DuckDBPyConnection, catalogs: list[str]) -> list[tuple[str, str, str]]:
+    """(catalog, schema, table) of every table to export; on-demand tables are folded into main."""
+    placeholders = ", ".join("?" for _ in catalogs)
+    schema_placeholders = ", ".join("?" for _ in BUNDLE_SCHEMAS)
+    rows = cursor.execute(
+        f"SELECT database_name, schema_name, table_name FROM duckdb_tables() "
+        f"WHERE database_name IN ({placeholders}) AND schema_name IN ({schema_placeholders}) "
+        f"UNION ALL SELECT database_name, schema_name, view_name FROM duckdb_views() "
+        f"WHERE NOT internal AND database_name IN ({placeholders}) AND schema_name IN ({schema_placeholders}) "
+        f"ORDER BY 2, 3", [*catalogs, *BUNDLE_SCHEMAS, *catalogs, *BUNDLE_SCHEMAS]).fetchall()
+    return [(catalog, schema, table) for catalog, schema, table in rows if _MEMBER_NAME.match(f"{schema}/{table}.parquet")]
+
+
+def source_content_hash(manifest: dict) -> str | None:
+    """Content hash of the log file a stored log was built from, looking through imported bundles."""
+    return (manifest.get("bundle") or {}).get("source_content_hash") or manifest.get("content_hash")
+
+
+def source_profile(manifest: dict) -> dict | None:
+    """The ingest profile a stored log's tables were parsed with, looking through imported bundles."""
+    bundle = manifest.get("bundle")
+    return bundle.get("profile") if bundle else manifest.get("profile")
+
+
+def export_log_bundle(cursor: duckdb.DuckDBPyConnection, catalogs: list[str], manifest: dict, out_path: str) -> dict:
+    """
+    Writes every table of a stored log (message tables, flight summary and rollups) to
+    `out_path` as a zip of zstd-compressed Parquet files plus a manifest listing message
+    types, row counts, time ranges and the source file's content hash. Runs on a db pool
+    worker. Returns the bundle manifest.
+    """
+    tables = []
+    with tempfile.TemporaryDirectory(prefix="bundle_export_") as work_dir, \
+            zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_STORED) as bundle:
+        for catalog, schema, table in _export_tables(cursor, catalogs):
+            source = f'"{catalog}"."{schema}"."{table}"'
+            member = f"{schema}/{table}.parquet"
+            parquet_path = os.path.join(work_dir, f"{schema}.{table}.parquet")
+            cursor.execute(f"COPY (SELECT * FROM {source}) TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+            # Parquet is already compressed; storing it keeps members seekable.
+            bundle.write(parquet_path, member)
+            os.remove(parquet_path)
+
+            columns = [row[0] for row in cursor.execute(f"DESCRIBE {source}").fetchall()]
+            if TIME_COLUMN in columns:
+                rows, time_min, time_max = cursor.execute(
+                    f'SELECT count(*), min("{TIME_COLUMN}"), max("{TIME_COLUMN}") FROM {source}').fetchone()
+            else:
+                rows, time_min, time_max = cursor.execute(f"SELECT count(*) FROM {source}").fetchone()[0], None, None
+            tables.append({"schema": schema, "table": table, "file": member, "rows": rows,
+                           "time_us_min": time_min, "time_us_max": time_max})
+
+        message_tables = [t for t in tables if t["schema"] == "main" and t["time_us_min"] is not None]
+        bundle_manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": BUNDLE_VERSION,
+            "source_log_id": manifest.get("log_id", catalogs[0]),
+            "source_filename": manifest.get("filename"),
+            "source_content_hash": source_content_hash(manifest),
+            "profile": source_profile(manifest),
+            "message_types": sorted(t["table"] for t in message_tables),
+            "not_included_types": [t for t in manifest.get("deferred_types", [])
+                                   if t not in {m["table"] for m in message_tables}],
+            "time_us_min": min((t["time_us_min"] for t in message_tables), default=None),
+            "time_us_max": max((t["time_us_max"] for t in message_tables), default=None),
+            "tables": tables,
+        }
+        bundle.writestr(BUNDLE_MANIFEST, json.dumps(bundle_manifest, indent=2))
+    logger.info("log_bundle_exported", log_id=catalogs[0], tables=len(tables), size_bytes=os.path.getsize(out_path))
+    return bundle_manifest
+
+
+def read_bundle_manifest(bundle: zipfile.ZipFile) -> dict:
+    try:
+        bundle_manifest = json.loads(bundle.read(BUNDLE_MANIFEST))
+    except KeyError:
+        raise BundleError(f"Archive has no {BUNDLE_MANIFEST}; not a Parquet log bundle.")
+    except ValueError as e_json:
+        raise BundleError(f"Bundle manifest is not valid JSON: {e_json}")
+    if bundle_manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError("Archive is not a Parquet log bundle.")
+    if bundle_manifest.get("version") != BUNDLE_VERSION:
+        raise BundleError(f"Unsupported bundle version {bundle_manifest.get('version')!r}.")
+    return bundle_manifest
+
+
+def import_log_bundle(bundle_path: str, parquet_dir: str, db_path: str) -> dict:
+    """
+    Unpacks a bundle's Parquet files into `parquet_dir` and creates a DuckDB database at
+    `db_path` holding one view per table over its file. Nothing is parsed or loaded into
+    memory; queries scan the Parquet files lazily, pruning row groups by time_us.
+    Returns a parse-style result dictionary with the bundle manifest.
+    """
+    try:
+        with zipfile.ZipFile(bundle_path) as bundle:
+            bundle_manifest = read_bundle_manifest(bundle)
+            members = {entry["file"] for entry in bundle_manifest.get("tables", [])}
+            os.makedirs(parquet_dir, exist_ok=True)
+            views = []
+            for member in sorted(members):
+                match = _MEMBER_NAME.match(member)
+                if match is None or match["schema"] not in BUNDLE_SCHEMAS:
+                    raise BundleError(f"Unexpected bundle member '{member}'.")
+                target = os.path.join(parquet_dir, f"{match['schema']}.{match['table']}.parquet")
+                try:
+                    with bundle.open(member) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                except KeyError:
+                    raise BundleError(f"Bundle manifest lists '{member}', which is missing from the archive.")
+                views.append((match["schema"], match["table"], os.path.abspath(target)))
+    except zipfile.BadZipFile as e_zip:
+        raise BundleError(f"Not a valid zip archive: {e_zip}")
+
+    conn = duckdb.connect(database=db_path, read_only=False)
+    try:
+        for schema in {schema for schema, _, _ in views}:
+            conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+        for schema, table, parquet_path in views:
+            conn.execute(f"""CREATE VIEW "{schema}"."{table}" AS SELECT * FROM read_parquet('{parquet_path.replace("'", "''")}')""")
+        metadata = log_metadata(conn)
+    finally:
+        conn.close()
+    message_types = [table for schema, table, _ in views if schema == "main"]
+    logger.info("log_bundle_imported", db_path=db_path, views=len(views), source_log_id=bundle_manifest.get("source_log_id"))
+    return {"status": "success", "tables_created": message_types, "deferred_types": [], "bundle": bundle_manifest,
+            "metadata": metadata}
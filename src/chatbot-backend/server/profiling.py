@@ -0,0 +1,138 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Requests slower than this are written out as a profile; 0 turns the profiler off.
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv("PROFILE_SLOW_REQUESTS_MS", "0"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_SAMPLES = int(os.getenv("PROFILE_MAX_SAMPLES", "200000"))
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+
+# A thread whose innermost frame outside these modules is one of the worker or event loops
+# below is parked waiting for work; such samples are not recorded.
+_WAIT_MODULES = {"threading.py", "queue.py", "selectors.py", "connection.py"}
+_IDLE_LOOPS = {("thread.py", "_worker"), ("_asyncio.py", "run"), ("base_events.py", "_run_once"), ("queues.py", "_feed"),
+               ("process.py", "wait_result_broken_or_wakeup")}
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler over every thread of the API process. Samples are taken only
+    while at least one request is in flight and kept in a bounded buffer, so the stacks seen
+    during any recent time window can be collapsed into a flame graph afterwards. Work done in
+    the parse worker processes is not visible here.
+    """
+    def __init__(self, interval_s: float, max_samples: int = PROFILE_MAX_SAMPLES):
+        self.interval_s = interval_s
+        self._samples: deque[tuple[float, str]] = deque(maxlen=max_samples)
+        self._labels: dict = {}
+        self._active = 0
+        self._wake = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def request_started(self):
+        with self._wake:
+            self._active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def request_finished(self):
+        with self._wake:
+            self._active -= 1
+
+    def collapse(self, started: float, finished: float) -> Counter:
+        """Counts the stacks sampled between two time.monotonic() readings, in collapsed-stack form."""
+        return Counter(stack for sampled_at, stack in list(self._samples) if started <= sampled_at <= finished)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while True:
+            with self._wake:
+                while self._active == 0:
+                    self._wake.wait()
+            sampled_at = time.monotonic()
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = self._stack(frame)
+                if stack is not None:
+                    self._samples.append((sampled_at, f"{thread_names.get(ident, ident)};{stack}"))
+            time.sleep(self.interval_s)
+
+    def _stack(self, frame) -> str | None:
+        caller = frame
+        while caller is not None and os.path.basename(caller.f_code.co_filename) in _WAIT_MODULES:
+            caller = caller.f_back
+        if caller is not None and (os.path.basename(caller.f_code.co_filename), caller.f_code.co_name) in _IDLE_LOOPS:
+            return None
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+def _write_folded(path: str, stacks: Counter):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as out_f:
+        for stack, count in stacks.most_common():
+            out_f.write(f"{stack} {count}\n")
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    ASGI middleware that samples stacks while requests run and, for each request slower than
+    `threshold_ms`, writes the stacks seen during it to `output_dir` as a collapsed-stack
+    (.folded) file for flamegraph.pl or speedscope. Concurrent requests share the samples of
+    overlapping time, so a profile can include other requests' work.
+    """
+    def __init__(self, app, threshold_ms: float = PROFILE_SLOW_REQUESTS_MS,
+                 interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS, output_dir: str = PROFILE_OUTPUT_DIR):
+        self.app = app
+        self.threshold_s = threshold_ms / 1000
+        self.output_dir = output_dir
+        self.profiler = SamplingProfiler(interval_ms / 1000)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.profiler.request_started()
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished = time.monotonic()
+            self.profiler.request_finished()
+            elapsed_s = finished - started
+            if elapsed_s >= self.threshold_s:
+                await self._save_profile(scope, started, finished, elapsed_s)
+
+    async def _save_profile(self, scope, started: float, finished: float, elapsed_s: float):
+        stacks = self.profiler.collapse(started, finished)
+        route = getattr(scope.get("route"), "path", scope["path"])
+        name = _UNSAFE_FILENAME_CHARS.sub("_", f"{scope['method']}{route}").strip("_")
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%dT%H%M%S')}_{name}_{round(elapsed_s * 1000)}ms.folded")
+        try:
+            await asyncio.to_thread(_write_folded, path, stacks)
+        except OSError as e_write:
+            logger.warning("slow_request_profile_write_failed", path=path, error=str(e_write))
+            return
+        logger.info("slow_request_profiled", method=scope["method"], route=route, elapsed_ms=round(elapsed_s * 1000, 1),
+                    samples=sum(stacks.values()), path=path)
@@ -0,0 +1,43 @@
+import os
+import threading
+from collections import OrderedDict
+
+import structlog
+
+logger = structlog.get_logger()
+
+PROMPT_CACHE_MAX_LOGS = int(os.getenv("PROMPT_CACHE_MAX_LOGS", "64"))
+
+
+class SystemPromptCache:
+    """
+    Per-log cache of the schema summary and system prompt built when a log is loaded into a
+    session. Both depend only on the log's tables, so every session that opens the same log
+    reuses them. An entry is rebuilt when the set of not-yet-loaded (deferred) message types
+    changes, and dropped when the log's tables are.
+    """
+    def __init__(self, max_logs: int = PROMPT_CACHE_MAX_LOGS):
+        self.max_logs = max_logs
+        self._entries: OrderedDict[str, tuple[tuple[str, ...], str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, log_id: str, deferred_types: list[str]) -> tuple[str, str] | None:
+        """Returns (schema summary, system prompt) for `log_id`, or None if absent or stale."""
+        with self._lock:
+            entry = self._entries.get(log_id)
+            if entry is None or entry[0] != tuple(deferred_types):
+                return None
+            self._entries.move_to_end(log_id)
+            return entry[1], entry[2]
+
+    def put(self, log_id: str, deferred_types: list[str], data_schema_summary: str, system_prompt: str):
+        with self._lock:
+            self._entries[log_id] = (tuple(deferred_types), data_schema_summary, system_prompt)
+            self._entries.move_to_end(log_id)
+            while len(self._entries) > self.max_logs:
+                self._entries.popitem(last=False)
+
+    def invalidate_log(self, log_id: str):
+        with self._lock:
+            if self._entries.pop(log_id, None) is not None:
+                logger.info("system_prompt_cache_invalidated", log_id=log_id)
@@ -0,0 +1,92 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+import structlog
+
+from server.query_executor import normalize_llm_sql
+
+logger = structlog.get_logger()
+
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# String literals and quoted identifiers are kept verbatim; whitespace elsewhere is collapsed.
+_QUOTED_OR_SPACE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+
+
+def normalize_sql_for_cache(sql_query: str) -> str:
+    """Collapses whitespace outside quotes so formatting-only differences share a cache entry."""
+    return _QUOTED_OR_SPACE.sub(lambda m: m.group(1) or " ", normalize_llm_sql(sql_query))
+
+
+def _estimate_size(result: dict) -> int:
+    size = sys.getsizeof(result.get("text", ""))
+    for row in result.get("rows", ()):
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryResultCache:
+    """
+    LRU cache of query results keyed by (log_id, normalized SQL), bounded by an estimate of
+    the memory its entries hold. Log tables never change after ingest, so an entry stays
+    valid until its log is dropped; log ids are derived from the log's content hash and
+    ingest profile, so the same upload always maps to the same entries.
+    """
+    def __init__(self, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[dict, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, log_id: str, sql_query: str) -> dict | None:
+        key = (log_id, normalize_sql_for_cache(sql_query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, log_id: str, sql_query: str, result: dict):
+        size = _estimate_size(result)
+        if size > self.max_bytes:
+            return
+        key = (log_id, normalize_sql_for_cache(sql_query))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_log(self, log_id: str):
+        """Forgets every cached result for `log_id`; called when the log's tables are dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == log_id]
+            for key in stale:
+                self.current_bytes -= self._entries.pop(key)[1]
+        if stale:
+            logger.info("query_cache_invalidated", log_id=log_id, entries=len(stale))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
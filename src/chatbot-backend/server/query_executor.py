@@ -0,0 +1,176 @@
+import csv
+import io
+import os
+import re
+import threading
+import time
+
+import duckdb
+import structlog
+
+from server.metrics import observe_sql_query
+from server.workers import get_worker_cursor, use_log
+
+logger = structlog.get_logger()
+
+LLM_QUERY_MAX_ROWS = int(os.getenv("LLM_QUERY_MAX_ROWS", "200"))
+LLM_QUERY_MAX_BYTES = int(os.getenv("LLM_QUERY_MAX_BYTES", "16000"))
+LLM_QUERY_TIMEOUT_S = float(os.getenv("LLM_QUERY_TIMEOUT_S", "10"))
+# Longer text cells (e.g. STATUSTEXT, PARM names are short; FILE/blob fields are not) are cut to this many characters.
+LLM_QUERY_MAX_CELL_CHARS = 200
+# Rows fetched per batch while sampling an oversized result.
+SAMPLE_FETCH_ROWS = 10_000
+
+# Statements that can be wrapped in a subquery, so the row budget is pushed into the plan.
+_WRAPPABLE_STATEMENT = re.compile(r"^\s*(\(|select\b|with\b|from\b|values\b)", re.IGNORECASE)
+_CODE_FENCE = re.compile(r"^```(?:sql)?\s*|\s*```$", re.IGNORECASE)
+
+
+class QueryTimeoutError(RuntimeError):
+    """Raised when an LLM-issued query runs past the statement timeout and is interrupted."""
+
+
+class QueryRejectedError(ValueError):
+    """Raised when a budgeted query is anything other than a single read-only statement."""
+
+
+def normalize_llm_sql(sql_query: str) -> str:
+    """Strips code fences, backticks and trailing semicolons that models wrap around SQL."""
+    sql_query = _CODE_FENCE.sub("", sql_query.strip()).strip().strip("`").strip()
+    return sql_query.rstrip(";").strip()
+
+
+def check_read_only(cursor: duckdb.DuckDBPyConnection, sql_query: str):
+    """
+    Raises QueryRejectedError unless `sql_query` is exactly one SELECT statement. Queries run on
+    cursors of the shared connection, so statements such as ATTACH, DETACH, COPY or DROP would
+    affect every session. DESCRIBE, SHOW and PRAGMA table_info parse as SELECT and are allowed.
+    """
+    statements = cursor.extract_statements(sql_query)
+    if len(statements) != 1:
+        raise QueryRejectedError(f"Expected exactly one SQL statement, got {len(statements)}.")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise QueryRejectedError(f"Only read-only SELECT queries are allowed, not {statements[0].type.name} statements.")
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return format(value, ".7g")
+    if isinstance(value, (bytes, bytearray)):
+        value = value.hex()
+    text = str(value)
+    if len(text) > LLM_QUERY_MAX_CELL_CHARS:
+        text = text[:LLM_QUERY_MAX_CELL_CHARS] + "..."
+    return text
+
+
+def render_csv(columns: list[str], rows: list[tuple], max_bytes: int) -> tuple[str, int]:
+    """Renders rows as CSV, keeping as many leading rows as fit in `max_bytes`. Returns the text and rows kept."""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(columns)
+    kept = 0
+    for row in rows:
+        mark = out.tell()
+        writer.writerow([_format_cell(v) for v in row])
+        if out.tell() > max_bytes:
+            out.seek(mark)
+            out.truncate()
+            break
+        kept += 1
+    return out.getvalue(), kept
+
+
+def _strided_rows(result: duckdb.DuckDBPyConnection, step: int, max_rows: int) -> list[tuple]:
+    """
+    Every `step`-th row of a result, streamed in the query's own order. Numbering the rows
+    in SQL with a window over the query would not be bound to its ORDER BY.
+    """
+    rows = []
+    offset = 0  # index of the next row to keep, within the next batch
+    while len(rows) < max_rows:
+        batch = result.fetchmany(SAMPLE_FETCH_ROWS)
+        if not batch:
+            break
+        rows.extend(batch[offset::step])
+        offset = (offset - len(batch)) % step
+    return rows[:max_rows]
+
+
+def execute_llm_query(log_id: str, sql_query: str, catalogs: list[str] | None = None,
+                      max_rows: int = LLM_QUERY_MAX_ROWS, max_bytes: int = LLM_QUERY_MAX_BYTES,
+                      timeout_s: float = LLM_QUERY_TIMEOUT_S) -> dict:
+    """
+    Runs a model-issued query against one log within row, byte and time budgets. Runs on a db pool worker.
+
+    Anything but a single SELECT statement is rejected with QueryRejectedError (see
+    check_read_only). SELECT-like statements are wrapped so that at most `max_rows` + 1
+    rows are produced. When a result is larger than that, it is replaced by an evenly
+    spaced sample of `max_rows` rows taken in the query's own order, and the total row
+    count is reported. The rendered CSV is cut to `max_bytes`. A timer interrupts the
+    cursor after `timeout_s`, raising QueryTimeoutError.
+
+    Returns a dict with "columns", "rows", "total_rows" (None if unknown), "truncated",
+    "note" and "text" (the CSV plus a metadata line, ready to put into a prompt).
+    """
+    cursor = get_worker_cursor()
+    use_log(cursor, log_id, catalogs)
+    result = run_budgeted_query(cursor, sql_query, max_rows, max_bytes, timeout_s)
+    logger.info("llm_query_executed", log_id=log_id, rows=len(result["rows"]), total_rows=result["total_rows"],
+                truncated=result["truncated"], elapsed_ms=round(result["elapsed_ms"], 1), bytes=len(result["text"]))
+    observe_sql_query("chat", result)
+    return result
+
+
+def run_budgeted_query(cursor: duckdb.DuckDBPyConnection, sql_query: str, max_rows: int = LLM_QUERY_MAX_ROWS,
+                       max_bytes: int = LLM_QUERY_MAX_BYTES, timeout_s: float = LLM_QUERY_TIMEOUT_S) -> dict:
+    """The budgeted execution behind `execute_llm_query`, on a cursor the caller has already set up."""
+    sql_query = normalize_llm_sql(sql_query)
+    check_read_only(cursor, sql_query)
+    timer = threading.Timer(timeout_s, cursor.interrupt)
+    timer.daemon = True
+    started = time.perf_counter()
+    timer.start()
+    try:
+        total_rows = None
+        note = ""
+        if _WRAPPABLE_STATEMENT.match(sql_query):
+            result = cursor.execute(f"SELECT * FROM ({sql_query}) AS llm_query LIMIT {max_rows + 1}")
+            columns = [d[0] for d in result.description]
+            rows = result.fetchall()
+            if len(rows) > max_rows:
+                total_rows = cursor.execute(f"SELECT count(*) FROM ({sql_query}) AS llm_query").fetchone()[0]
+                step = -(-total_rows // max_rows)
+                rows = _strided_rows(cursor.execute(sql_query), step, max_rows)
+                note = f"sampled 1 in every {step} of {total_rows} rows; aggregate, filter on time_us or use the rollup tables for complete answers"
+        else:
+            result = cursor.execute(sql_query)
+            columns = [d[0] for d in result.description] if result.description else []
+            rows = result.fetchmany(max_rows + 1) if result.description else []
+            if len(rows) > max_rows:
+                rows = rows[:max_rows]
+                note = f"first {max_rows} rows only"
+    except duckdb.InterruptException:
+        raise QueryTimeoutError(f"The query ran longer than {timeout_s:g} s and was cancelled. Narrow the time_us range, aggregate, or use the rollup tables")
+    finally:
+        timer.cancel()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    text, kept = render_csv(columns, rows, max_bytes)
+    if kept < len(rows):
+        byte_note = f"cut to the first {kept} of {len(rows)} rows to fit {max_bytes} bytes"
+        note = f"{note}; {byte_note}" if note else byte_note
+        rows = rows[:kept]
+    truncated = bool(note)
+    meta = f"# rows={len(rows)}" + (f" of {total_rows}" if total_rows is not None else "") + (f" ({note})" if note else "")
+    return {
+        "columns": columns,
+        "rows": rows,
+        "total_rows": total_rows,
+        "truncated": truncated,
+        "note": note,
+        "elapsed_ms": elapsed_ms,
+        "text": f"{meta}\n{text}",
+    }
@@ -0,0 +1,130 @@
+import duckdb
+import numpy as np
+
+from server.time_index import TIME_COLUMN
+
+SERIES_DEFAULT_POINTS = 1000
+SERIES_MAX_POINTS = 10_000
+SERIES_METHODS = ("minmax", "lttb")
+
+
+class SeriesRequestError(ValueError):
+    """Raised for series requests naming unknown tables or fields, or an unknown method."""
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that preserve the
+    visual shape of (x, y). The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        xs, ys = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _resolve_table(cursor: duckdb.DuckDBPyConnection, catalogs: list[str], table: str) -> tuple[str, str, dict[str, str]]:
+    """Finds `table` (case-insensitively) in the log's catalogs; returns catalog, table name and column types."""
+    placeholders = ", ".join("?" for _ in catalogs)
+    rows = cursor.execute(
+        f"SELECT table_catalog, table_name, column_name, data_type FROM information_schema.columns "
+        f"WHERE table_catalog IN ({placeholders}) AND table_schema = 'main' AND lower(table_name) = lower(?) "
+        f"ORDER BY ordinal_position", [*catalogs, table]).fetchall()
+    if not rows:
+        raise SeriesRequestError(f"Unknown table '{table}'.")
+    catalog, table_name = rows[0][0], rows[0][1]
+    columns = {column: data_type for cat, name, column, data_type in rows if cat == catalog and name == table_name}
+    if TIME_COLUMN not in columns:
+        raise SeriesRequestError(f"Table '{table_name}' has no {TIME_COLUMN} column; re-upload the log to index it by time.")
+    return catalog, table_name, columns
+
+
+def _minmax(cursor, source: str, field: str, start_us: int, end_us: int, points: int) -> tuple[list, list]:
+    """Keeps the minimum and maximum sample of each of points/2 equal time buckets."""
+    num_buckets = max(points // 2, 1)
+    span = end_us - start_us + 1
+    rows = cursor.execute(f"""
+        SELECT arg_min("{TIME_COLUMN}", v), min(v), arg_max("{TIME_COLUMN}", v), max(v)
+        FROM (
+            SELECT "{TIME_COLUMN}", "{field}"::DOUBLE AS v,
+                   floor(("{TIME_COLUMN}" - ?)::DOUBLE * ? / ?)::BIGINT AS bucket
+            FROM {source}
+            WHERE "{TIME_COLUMN}" BETWEEN ? AND ? AND "{field}" IS NOT NULL
+        ) GROUP BY bucket ORDER BY bucket
+    """, [start_us, num_buckets, span, start_us, end_us]).fetchall()
+    times, values = [], []
+    for t_min, v_min, t_max, v_max in rows:
+        for t, v in sorted({(t_min, v_min), (t_max, v_max)}):
+            times.append(t)
+            values.append(v)
+    return times, values
+
+
+def _lttb(cursor, source: str, field: str, start_us: int, end_us: int, points: int) -> tuple[list, list]:
+    data = cursor.execute(f"""
+        SELECT "{TIME_COLUMN}" AS t, "{field}"::DOUBLE AS v FROM {source}
+        WHERE "{TIME_COLUMN}" BETWEEN ? AND ? AND "{field}" IS NOT NULL ORDER BY "{TIME_COLUMN}"
+    """, [start_us, end_us]).fetchnumpy()
+    times, values = np.asarray(data["t"]), np.asarray(data["v"])
+    keep = lttb_indices(times.astype(np.float64), values, points)
+    return times[keep].tolist(), values[keep].tolist()
+
+
+def query_series(cursor: duckdb.DuckDBPyConnection, catalogs: list[str], table: str, fields: list[str],
+                 start_us: int | None = None, end_us: int | None = None,
+                 points: int = SERIES_DEFAULT_POINTS, method: str = "minmax") -> dict:
+    """
+    Reads `fields` of a message table over a time window, downsampled to about `points`
+    samples per field with min/max bucketing or LTTB. Windows that already fit the
+    budget are returned as is. The time filter is a range predicate on the sorted
+    time_us column, so DuckDB only reads the row groups that overlap the window.
+    """
+    if method not in SERIES_METHODS:
+        raise SeriesRequestError(f"Unknown method '{method}'; use one of {', '.join(SERIES_METHODS)}.")
+    points = max(2, min(points, SERIES_MAX_POINTS))
+    catalog, table_name, columns = _resolve_table(cursor, catalogs, table)
+    columns_by_lower = {name.lower(): name for name in columns}
+    resolved_fields = []
+    for field in fields:
+        name = columns_by_lower.get(field.lower())
+        if name is None or name == TIME_COLUMN:
+            raise SeriesRequestError(f"Unknown field '{field}' in table '{table_name}'.")
+        resolved_fields.append(name)
+
+    source = f'"{catalog}".main."{table_name}"'
+    if start_us is None or end_us is None:
+        t_min, t_max = cursor.execute(f'SELECT min("{TIME_COLUMN}"), max("{TIME_COLUMN}") FROM {source}').fetchone()
+        start_us = t_min if start_us is None else start_us
+        end_us = t_max if end_us is None else end_us
+    result = {"table": table_name, "method": method, "start_us": start_us, "end_us": end_us, "total_rows": 0, "series": {}}
+    if start_us is None or end_us is None or end_us < start_us:
+        return result
+
+    total_rows = cursor.execute(f'SELECT count(*) FROM {source} WHERE "{TIME_COLUMN}" BETWEEN ? AND ?', [start_us, end_us]).fetchone()[0]
+    result["total_rows"] = total_rows
+    for field in resolved_fields:
+        if total_rows <= points:
+            rows = cursor.execute(f"""
+                SELECT "{TIME_COLUMN}", "{field}" FROM {source}
+                WHERE "{TIME_COLUMN}" BETWEEN ? AND ? AND "{field}" IS NOT NULL ORDER BY "{TIME_COLUMN}"
+            """, [start_us, end_us]).fetchall()
+            times, values = [r[0] for r in rows], [r[1] for r in rows]
+        elif method == "lttb":
+            times, values = _lttb(cursor, source, field, start_us, end_us, points)
+        else:
+            times, values = _minmax(cursor, source, field, start_us, end_us, points)
+        result["series"][field] = {"time_us": times, "values": values}
+    return result
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+import uuid
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+SESSION_IDLE_TIMEOUT_S = float(os.getenv("SESSION_IDLE_TIMEOUT_S", "3600"))
+
+
+class Session:
+    """Log and conversation state of one analyst, isolated from other sessions."""
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.active_log_id: str | None = None
+        self.log_filename: str | None = None
+        self.data_schema_summary: str = ""
+        self.conversation_history: list[dict[str, Any]] = []
+        self.current_system_instruction: str | None = None
+        self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def set_log(self, log_id: str, log_filename: str, data_schema_summary: str, system_instruction: str):
+        """Points the session at a newly uploaded log, starting a fresh conversation."""
+        self.active_log_id = log_id
+        self.log_filename = log_filename
+        self.data_schema_summary = data_schema_summary
+        self.current_system_instruction = system_instruction
+        self.conversation_history = []
+        logger.info("session_log_set", session_id=self.session_id, log_id=log_id)
+
+
+class SessionRegistry:
+    """Maps session ids to Session objects and evicts sessions idle for longer than `idle_timeout_s`."""
+    def __init__(self, idle_timeout_s: float = SESSION_IDLE_TIMEOUT_S):
+        self.idle_timeout_s = idle_timeout_s
+        self._sessions: dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> Session:
+        self.evict_idle()
+        session = Session(str(uuid.uuid4()))
+        with self._lock:
+            self._sessions[session.session_id] = session
+        logger.info("session_created", session_id=session.session_id, active_sessions=len(self._sessions))
+        return session
+
+    def get(self, session_id: str | None) -> Session | None:
+        self.evict_idle()
+        if not session_id:
+            return None
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
+
+    def active_log_ids(self) -> set[str]:
+        with self._lock:
+            return {s.active_log_id for s in self._sessions.values() if s.active_log_id}
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout_s
+        with self._lock:
+            expired = [s for s in self._sessions.values() if s.last_active < cutoff]
+            for session in expired:
+                del self._sessions[session.session_id]
+        for session in expired:
+            logger.info("session_evicted_idle", session_id=session.session_id, log_id=session.active_log_id)
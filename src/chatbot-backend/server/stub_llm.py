@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+import structlog
+
+logger = structlog.get_logger()
+
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+STUB_LLM_QUERY = os.getenv("STUB_LLM_QUERY", "SELECT * FROM flight_summary")
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubStreamResponse:
+    """Async iterable of response chunks, like a streamed GenerateContentResponse."""
+    def __init__(self, text: str, latency_s: float, chunk_chars: int = 8):
+        self.text = text
+        self.latency_s = latency_s
+        self.chunk_chars = chunk_chars
+
+    async def __aiter__(self):
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        for start in range(0, len(self.text), self.chunk_chars):
+            yield StubResponse(self.text[start:start + self.chunk_chars])
+            await asyncio.sleep(0)
+
+
+class StubModel:
+    """
+    Offline stand-in for a GenerativeModel. The first turn asks for `STUB_LLM_QUERY`; once
+    the chat loop feeds query results or an error back, it answers. Each call sleeps for
+    `latency_s` to mimic provider latency; streamed responses spend it before the first chunk.
+    """
+    def __init__(self, system_instruction: str | None, latency_s: float, query: str):
+        self.system_instruction = system_instruction
+        self.latency_s = latency_s
+        self.query = query
+
+    async def generate_content_async(self, contents, generation_config=None, stream: bool = False, **kwargs):
+        last_message = str(contents[-1]["parts"][0]) if contents else ""
+        if last_message.startswith(("Here are the results", "You tried to execute")):
+            text = f"Stub answer based on: {last_message[:200]}"
+        else:
+            text = f"Let me check the log.\nQUERY DB:{self.query}\n"
+        if stream:
+            return StubStreamResponse(text, self.latency_s)
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return StubResponse(text)
+
+
+class StubLLMClient:
+    """Drop-in replacement for GeminiClient (LLM_BACKEND=stub) for offline runs and benchmarks."""
+    def __init__(self, latency_ms: float = STUB_LLM_LATENCY_MS, query: str = STUB_LLM_QUERY):
+        self.model_name = "stub"
+        self.latency_s = latency_ms / 1000.0
+        self.query = query
+        logger.info("stub_llm_client_configured", latency_ms=latency_ms)
+
+    def get_model(self, system_instruction: str | None = None) -> StubModel:
+        return StubModel(system_instruction, self.latency_s, self.query)
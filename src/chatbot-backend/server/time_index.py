@@ -0,0 +1,34 @@
+from pymavlink.DFReader import DFMessage
+
+# Every message table gets this column, microseconds on the log's own clock, and is stored sorted by it.
+TIME_COLUMN = "time_us"
+
+
+class TimeNormalizer:
+    """
+    Derives the `time_us` value of each message in file order.
+
+    DataFlash messages use their boot-time TimeUS (or TimeMS) field, or in legacy PX4
+    .px4log files the StartTime of TIME messages; telemetry log messages use the receive
+    timestamp recorded in the tlog. Messages without a timestamp of their own (e.g. FMT,
+    PARM in older logs, most .px4log messages) inherit the last one seen.
+    """
+    def __init__(self):
+        self.last_time_us: int | None = None
+
+    def time_us(self, msg) -> int | None:
+        if isinstance(msg, DFMessage):
+            time_us = getattr(msg, 'TimeUS', None)
+            if time_us is None:
+                time_ms = getattr(msg, 'TimeMS', None)
+                time_us = time_ms * 1000 if time_ms is not None else None
+            if time_us is None:
+                # Legacy PX4 .px4log files only timestamp their TIME messages.
+                time_us = getattr(msg, 'StartTime', None)
+        else:
+            timestamp = getattr(msg, '_timestamp', None)
+            time_us = round(timestamp * 1e6) if timestamp is not None else None
+        if time_us is None:
+            return self.last_time_us
+        self.last_time_us = int(time_us)
+        return self.last_time_us
@@ -0,0 +1,366 @@
+import array
+import mmap
+import typing
+
+import numpy as np
+import pyarrow as pa
+import structlog
+
+from server.time_index import TIME_COLUMN
+
+logger = structlog.get_logger()
+
+# File header: magic, version byte, then the uint64 log start timestamp.
+ULOG_MAGIC = b"ULog\x01\x12\x35"
+ULOG_HEADER_BYTES = 16
+ULOG_SYNC_MAGIC = b"\x2f\x73\x13\x20\x25\x0c\xbb\x12"
+# Every message starts with a uint16 size (excluding this header) and a type character.
+_MSG_HEADER_BYTES = 3
+# Bit 0 of incompat_flags[0] marks appended data, which is read like any other message.
+_INCOMPAT_DATA_APPENDED = 1
+
+_MSG_FLAG_BITS, _MSG_FORMAT, _MSG_INFO, _MSG_INFO_MULTI = ord("B"), ord("F"), ord("I"), ord("M")
+_MSG_PARAMETER, _MSG_ADD_LOGGED, _MSG_DATA = ord("P"), ord("A"), ord("D")
+_MSG_LOGGING, _MSG_LOGGING_TAGGED, _MSG_DROPOUT = ord("L"), ord("C"), ord("O")
+# Also default parameters (Q), unsubscriptions (R) and sync markers (S).
+_KNOWN_MSG_TYPES = frozenset(b"BFIMPQADRLCSO")
+
+# Little-endian NumPy types of ULog's basic field types.
+ULOG_NUMPY_TYPES = {
+    "int8_t": "i1", "uint8_t": "u1", "int16_t": "<i2", "uint16_t": "<u2",
+    "int32_t": "<i4", "uint32_t": "<u4", "int64_t": "<i8", "uint64_t": "<u8",
+    "float": "<f4", "double": "<f8", "bool": "?", "char": "S1",
+}
+
+# Extra tables written for each ULog besides one per logged topic.
+ULOG_INFO_TABLE = "ulog_info"
+ULOG_PARAMETERS_TABLE = "ulog_parameters"
+ULOG_LOGGED_MESSAGES_TABLE = "ulog_logged_messages"
+ULOG_DROPOUTS_TABLE = "ulog_dropouts"
+# Added to every topic table; multi-instance topics (e.g. two GPS receivers) share one table.
+MULTI_ID_COLUMN = "multi_id"
+# Records are gathered with index arrays of at most this many byte offsets at a time.
+_GATHER_INDEX_ELEMENTS = 1 << 22
+
+
+class ULogFormatError(ValueError):
+    """Raised when a file is not a ULog this reader can decode."""
+
+
+def is_ulog(path: str) -> bool:
+    """Whether a file starts with the ULog magic, whatever its extension."""
+    with open(path, "rb") as f:
+        return f.read(len(ULOG_MAGIC)) == ULOG_MAGIC
+
+
+def _parse_type(type_spec: str) -> tuple[str, int]:
+    """Splits e.g. "float[3]" into ("float", 3); scalars have a count of 0."""
+    if type_spec.endswith("]"):
+        base, _, count = type_spec[:-1].partition("[")
+        return base, int(count)
+    return type_spec, 0
+
+
+def _parse_format(text: str) -> tuple[str, list[tuple[str, int, str]]]:
+    """Parses a format definition "name:type field;type[n] field;..." into (name, [(type, count, field)])."""
+    name, _, body = text.partition(":")
+    fields = []
+    for item in body.split(";"):
+        type_spec, _, field_name = item.strip().rpartition(" ")
+        if not type_spec:
+            continue
+        fields.append((*_parse_type(type_spec), field_name))
+    return name, fields
+
+
+def _is_padding(field_name: str) -> bool:
+    return field_name.startswith("_padding")
+
+
+class _Topic:
+    """A logged uORB topic: its record layout and the subscriptions (msg_id → multi_id) logging it."""
+    def __init__(self, name: str, dtype: np.dtype):
+        self.name = name
+        self.dtype = dtype
+        self.subscriptions: dict[int, int] = {}
+        self.fieldnames = [field for field in dtype.names if not _is_padding(field)]
+        fields = dtype.fields
+        self.timestamp_offset = fields["timestamp"][1] if "timestamp" in fields and fields["timestamp"][0] == np.dtype("<u8") else None
+
+
+class ULogReader:
+    """
+    Memory-maps a ULog file and indexes its messages in one pass over the message headers.
+
+    Each topic's data messages are fixed-size records of the topic's format, so a batch of
+    them is gathered from the mapping into one buffer and viewed as a NumPy structured array
+    of the topic's dtype; fields become Arrow columns without decoding a message at a time.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e_map:
+            self._file.close()
+            raise ULogFormatError("The ULog file is empty.") from e_map
+        self._bytes: np.ndarray | None = None
+        self.size = len(self._data)
+        self.start_timestamp_us = 0
+        self.formats: dict[str, list[tuple[str, int, str]]] = {}
+        self._dtypes: dict[str, np.dtype] = {}
+        self.topics: dict[str, _Topic] = {}
+        self._subscriptions: dict[int, _Topic] = {}
+        self.info: dict[str, typing.Any] = {}
+        self.parameters: list[tuple[int | None, str, float]] = []
+        self.logged_messages: list[tuple[int, int, int | None, str]] = []
+        self.dropouts: list[tuple[int | None, int]] = []
+        self.corrupt_bytes_skipped = 0
+        self._data_offsets = array.array("q")
+        self._record_starts: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        try:
+            self._read_header()
+            self._scan()
+            self._index_records()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "ULogReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Views into the mapping must be released before it can be closed.
+        self._bytes = None
+        self._record_starts = {}
+        if not self._data.closed:
+            self._data.close()
+        self._file.close()
+
+    def _read_header(self):
+        if self.size < ULOG_HEADER_BYTES or self._data[:len(ULOG_MAGIC)] != ULOG_MAGIC:
+            raise ULogFormatError("Not a ULog file (missing the ULog header).")
+        self.start_timestamp_us = int.from_bytes(self._data[8:16], "little")
+
+    def _scan(self):
+        """Walks the message headers once, recording data message offsets and decoding everything else."""
+        data = self._data
+        size = self.size
+        data_offsets = self._data_offsets
+        pos = ULOG_HEADER_BYTES
+        while pos + _MSG_HEADER_BYTES <= size:
+            msg_type = data[pos + 2]
+            end = pos + _MSG_HEADER_BYTES + (data[pos] | data[pos + 1] << 8)
+            if end > size:
+                logger.warning("ulog_truncated_message", path=self.path, offset=pos, file_size=size)
+                break
+            if msg_type == _MSG_DATA:
+                data_offsets.append(pos)
+            elif msg_type in _KNOWN_MSG_TYPES:
+                self._read_message(msg_type, pos + _MSG_HEADER_BYTES, end)
+            else:
+                resync = data.find(ULOG_SYNC_MAGIC, pos + 1)
+                if resync < 0:
+                    self.corrupt_bytes_skipped += size - pos
+                    logger.warning("ulog_corrupt_tail_skipped", path=self.path, offset=pos, num_bytes=size - pos)
+                    break
+                # The sync message's own header sits just before its magic.
+                end = max(resync - _MSG_HEADER_BYTES, pos + 1)
+                self.corrupt_bytes_skipped += end - pos
+            pos = end
+
+    def _read_message(self, msg_type: int, start: int, end: int):
+        data = self._data
+        if msg_type == _MSG_ADD_LOGGED:
+            multi_id = data[start]
+            msg_id = data[start + 1] | data[start + 2] << 8
+            name = data[start + 3:end].decode("utf-8", "replace")
+            topic = self.topics.get(name)
+            if topic is None:
+                if name not in self.formats:
+                    logger.warning("ulog_subscription_without_format", path=self.path, topic=name)
+                    return
+                topic = self.topics[name] = _Topic(name, self._topic_dtype(name))
+            topic.subscriptions[msg_id] = multi_id
+            self._subscriptions[msg_id] = topic
+        elif msg_type == _MSG_FORMAT:
+            name, fields = _parse_format(data[start:end].decode("utf-8", "replace"))
+            self.formats[name] = fields
+        elif msg_type == _MSG_PARAMETER:
+            key, value = self._key_value(start + 1, end, data[start])
+            self.parameters.append((self._last_data_timestamp(), key, float(value)))
+        elif msg_type in (_MSG_INFO, _MSG_INFO_MULTI):
+            is_continued = msg_type == _MSG_INFO_MULTI and data[start]
+            if msg_type == _MSG_INFO_MULTI:
+                start += 1
+            key, value = self._key_value(start + 1, end, data[start])
+            if is_continued and isinstance(value, str) and isinstance(self.info.get(key), str):
+                value = self.info[key] + value
+            self.info[key] = value
+        elif msg_type == _MSG_LOGGING:
+            timestamp = int.from_bytes(data[start + 1:start + 9], "little")
+            self.logged_messages.append((timestamp, data[start] - ord("0"), None, data[start + 9:end].decode("utf-8", "replace")))
+        elif msg_type == _MSG_LOGGING_TAGGED:
+            tag = data[start + 1] | data[start + 2] << 8
+            timestamp = int.from_bytes(data[start + 3:start + 11], "little")
+            self.logged_messages.append((timestamp, data[start] - ord("0"), tag, data[start + 11:end].decode("utf-8", "replace")))
+        elif msg_type == _MSG_DROPOUT:
+            self.dropouts.append((self._last_data_timestamp(), data[start] | data[start + 1] << 8))
+        elif msg_type == _MSG_FLAG_BITS:
+            incompat_flags = data[start + 8:start + 16]
+            if incompat_flags[0] & ~_INCOMPAT_DATA_APPENDED or any(incompat_flags[1:]):
+                raise ULogFormatError("The ULog file uses incompatible features this reader does not support.")
+        # Default parameters (Q), unsubscriptions (R) and sync markers (S) carry nothing stored.
+
+    def _key_value(self, start: int, end: int, key_len: int) -> tuple[str, typing.Any]:
+        """Decodes an info or parameter key ("type name") and its value."""
+        type_spec, _, key = self._data[start:start + key_len].decode("utf-8", "replace").partition(" ")
+        raw = self._data[start + key_len:end]
+        base, count = _parse_type(type_spec)
+        if base == "char":
+            return key, raw.split(b"\0", 1)[0].decode("utf-8", "replace")
+        numpy_type = ULOG_NUMPY_TYPES.get(base)
+        if numpy_type is None:
+            return key, raw.hex()
+        values = np.frombuffer(raw, dtype=numpy_type, count=max(count, 1)).tolist()
+        return key, values if count else values[0]
+
+    def _last_data_timestamp(self) -> int | None:
+        """Timestamp of the latest data message, for messages (parameter changes, dropouts) without one."""
+        for pos in reversed(self._data_offsets[-64:]):
+            topic = self._subscriptions.get(self._data[pos + 3] | self._data[pos + 4] << 8)
+            if topic is not None and topic.timestamp_offset is not None:
+                start = pos + _MSG_HEADER_BYTES + 2 + topic.timestamp_offset
+                return int.from_bytes(self._data[start:start + 8], "little")
+        return None
+
+    def _format_dtype(self, name: str) -> np.dtype:
+        """The packed record dtype of a format, with nested formats as sub-structures."""
+        dtype = self._dtypes.get(name)
+        if dtype is None:
+            dtype = self._dtypes[name] = np.dtype([self._field_dtype(field) for field in self.formats[name]])
+        return dtype
+
+    def _field_dtype(self, field: tuple[str, int, str]) -> tuple:
+        base, count, field_name = field
+        if base == "char" and count:
+            return (field_name, f"S{count}")
+        numpy_type = ULOG_NUMPY_TYPES.get(base)
+        if numpy_type is None:
+            if base not in self.formats:
+                raise ULogFormatError(f"Format of field '{field_name}' references unknown type '{base}'.")
+            numpy_type = self._format_dtype(base)
+        return (field_name, numpy_type, (count,)) if count else (field_name, numpy_type)
+
+    def _topic_dtype(self, name: str) -> np.dtype:
+        """A topic's record dtype; trailing padding is not written to data messages, so it is dropped."""
+        fields = list(self.formats[name])
+        while fields and _is_padding(fields[-1][2]):
+            fields.pop()
+        return np.dtype([self._field_dtype(field) for field in fields])
+
+    def _index_records(self):
+        """Groups the data message offsets by topic, dropping records too short for their format."""
+        self._bytes = np.frombuffer(self._data, dtype=np.uint8)
+        offsets = np.frombuffer(self._data_offsets, dtype=np.int64)
+        msg_ids = self._bytes[offsets + 3].astype(np.uint16) | self._bytes[offsets + 4].astype(np.uint16) << 8
+        record_bytes = (self._bytes[offsets].astype(np.int64) | self._bytes[offsets + 1].astype(np.int64) << 8) - 2
+        multi_ids = np.zeros(1 << 16, dtype=np.uint8)
+        known = np.zeros(1 << 16, dtype=bool)
+        for msg_id, topic in self._subscriptions.items():
+            multi_ids[msg_id] = topic.subscriptions[msg_id]
+            known[msg_id] = True
+        self.unsubscribed_records = int(np.count_nonzero(~known[msg_ids]))
+        for name, topic in self.topics.items():
+            in_topic = np.isin(msg_ids, np.fromiter(topic.subscriptions, dtype=np.uint16))
+            complete = in_topic & (record_bytes >= topic.dtype.itemsize)
+            short = int(np.count_nonzero(in_topic)) - int(np.count_nonzero(complete))
+            if short:
+                logger.warning("ulog_short_records_skipped", path=self.path, topic=name, num_records=short)
+            self._record_starts[name] = (offsets[complete] + _MSG_HEADER_BYTES + 2, multi_ids[msg_ids[complete]])
+
+    def record_counts(self) -> dict[str, int]:
+        """Data messages per topic that have at least one record."""
+        return {name: len(starts) for name, (starts, _) in self._record_starts.items() if len(starts)}
+
+    @property
+    def num_records(self) -> int:
+        return len(self._data_offsets)
+
+    def read_topic(self, name: str, batch_rows: int, every: int = 1,
+                   fields: list[str] | None = None) -> typing.Iterator[pa.Table]:
+        """
+        Yields a topic's records in file order as Arrow tables of at most `batch_rows` rows,
+        with `time_us` (the record's timestamp) and `multi_id` columns in front. `every`
+        keeps one record in that many; `fields` limits the topic's own columns.
+        """
+        topic = self.topics[name]
+        starts, multi_ids = self._record_starts[name]
+        if every > 1:
+            starts, multi_ids = starts[::every], multi_ids[::every]
+        columns = [field for field in (topic.fieldnames if fields is None else fields) if field not in (TIME_COLUMN, MULTI_ID_COLUMN)]
+        record_bytes = topic.dtype.itemsize
+        for batch_start in range(0, len(starts), batch_rows):
+            batch_starts = starts[batch_start:batch_start + batch_rows]
+            records = self._gather(batch_starts, record_bytes).view(topic.dtype).reshape(-1)
+            arrays = [pa.array(records["timestamp"].astype(np.int64)) if topic.timestamp_offset is not None
+                      else pa.nulls(len(records), pa.int64()),
+                      pa.array(multi_ids[batch_start:batch_start + batch_rows])]
+            arrays.extend(_to_arrow(records[field]) for field in columns)
+            yield pa.Table.from_arrays(arrays, names=[TIME_COLUMN, MULTI_ID_COLUMN, *columns])
+
+    def _gather(self, starts: np.ndarray, record_bytes: int) -> np.ndarray:
+        """Copies fixed-size records at `starts` out of the mapping into one contiguous (rows, bytes) array."""
+        records = np.empty((len(starts), record_bytes), dtype=np.uint8)
+        byte_offsets = np.arange(record_bytes)
+        # Bounds the temporary index array to about _GATHER_INDEX_ELEMENTS entries.
+        step = max(1, _GATHER_INDEX_ELEMENTS // record_bytes)
+        for row in range(0, len(starts), step):
+            np.take(self._bytes, starts[row:row + step, None] + byte_offsets, out=records[row:row + step])
+        return records
+
+    def info_table(self) -> pa.Table | None:
+        if not self.info:
+            return None
+        return pa.table({"key": list(self.info), "value": [str(value) for value in self.info.values()]})
+
+    def parameters_table(self) -> pa.Table | None:
+        """Parameter values in file order: those set at log start have a null `time_us`, later changes the time logged."""
+        if not self.parameters:
+            return None
+        times, names, values = zip(*self.parameters)
+        return pa.table({TIME_COLUMN: pa.array(times, pa.int64()), "name": list(names), "value": pa.array(values, pa.float64())})
+
+    def logged_messages_table(self) -> pa.Table | None:
+        if not self.logged_messages:
+            return None
+        times, levels, tags, messages = zip(*self.logged_messages)
+        return pa.table({TIME_COLUMN: pa.array(times, pa.int64()), "log_level": pa.array(levels, pa.int8()),
+                         "tag": pa.array(tags, pa.uint16()), "message": list(messages)})
+
+    def dropouts_table(self) -> pa.Table | None:
+        if not self.dropouts:
+            return None
+        times, durations = zip(*self.dropouts)
+        return pa.table({TIME_COLUMN: pa.array(times, pa.int64()), "duration_ms": pa.array(durations, pa.uint16())})
+
+
+def _to_arrow(values: np.ndarray) -> pa.Array:
+    """Converts one field of a structured record array to Arrow: arrays become lists, nested formats structs."""
+    if values.ndim > 1:
+        num_rows, width = values.shape[0], values.shape[1]
+        flat = _to_arrow(values.reshape(num_rows * width, *values.shape[2:]))
+        return pa.ListArray.from_arrays(pa.array(np.arange(0, num_rows * width + 1, width, dtype=np.int32)), flat)
+    if values.dtype.names:
+        names = [name for name in values.dtype.names if not _is_padding(name)]
+        return pa.StructArray.from_arrays([_to_arrow(values[name]) for name in names], names=names)
+    if values.dtype.kind == "S":
+        strings = pa.array(values, pa.binary())
+        try:
+            return strings.cast(pa.string())
+        except pa.ArrowInvalid:
+            return pa.array([value.decode("utf-8", "replace") for value in values.tolist()], pa.string())
+    return pa.array(np.ascontiguousarray(values))
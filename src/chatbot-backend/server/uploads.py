@@ -0,0 +1,169 @@
+import hashlib
+import os
+import typing
+
+import structlog
+from fastapi.concurrency import run_in_threadpool
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+logger = structlog.get_logger()
+
+# Request body chunks are gathered into batches of about this size before each hop to a
+# worker thread, where they are parsed, hashed and written.
+UPLOAD_WRITE_BATCH_BYTES = int(os.getenv("UPLOAD_WRITE_BATCH_BYTES", str(1024 * 1024)))
+# Limit on each non-file form field (e.g. ingest_profile), which is held in memory.
+UPLOAD_MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadError(ValueError):
+    """Raised when a request body is not a well-formed multipart upload with exactly one file."""
+
+
+class ReceivedUpload:
+    """A file streamed to disk from a multipart request, with its SHA-256 and the other form fields."""
+    def __init__(self, path: str, filename: str, content_hash: str, size: int, fields: dict[str, str]):
+        self.path = path
+        self.filename = filename
+        self.content_hash = content_hash
+        self.size = size
+        self.fields = fields
+
+
+class _MultipartFileReceiver:
+    """
+    Push parser callbacks that write the file part of a multipart body to one file as it
+    arrives, hashing it on the way. Not thread-safe; batches are fed one at a time.
+    """
+    def __init__(self, boundary: bytes, file_field: str, open_file: typing.Callable[[str], str],
+                 validate_filename: typing.Callable[[str], None] | None):
+        self.file_field = file_field
+        self.open_file = open_file
+        self.validate_filename = validate_filename
+        self.path: str | None = None
+        self.filename: str | None = None
+        self.size = 0
+        self.fields: dict[str, str] = {}
+        self._digest = hashlib.sha256()
+        self._file: typing.BinaryIO | None = None
+        self._headers: dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name: str | None = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def write(self, data: bytes):
+        try:
+            self._parser.write(data)
+        except MultipartParseError as e_parse:
+            raise UploadError(f"Malformed multipart body: {e_parse}") from e_parse
+
+    def finish(self) -> ReceivedUpload:
+        self._parser.finalize()
+        if self.path is None or self._file is not None:
+            raise UploadError(f"The request must include a complete '{self.file_field}' file part.")
+        return ReceivedUpload(self.path, self.filename, self._digest.hexdigest(), self.size, self.fields)
+
+    def discard(self):
+        """Closes and deletes a partially or fully written file, e.g. after a client disconnect."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._part_name = options.get(b"name", b"").decode("utf-8", "replace")
+        if self._part_name != self.file_field:
+            return
+        if self.path is not None:
+            raise UploadError(f"Only one '{self.file_field}' file part is allowed.")
+        filename = options.get(b"filename")
+        if not filename:
+            raise UploadError(f"The '{self.file_field}' part must be a file with a filename.")
+        self.filename = filename.decode("utf-8", "replace")
+        if self.validate_filename is not None:
+            self.validate_filename(self.filename)
+        self.path = self.open_file(self.filename)
+        self._file = open(self.path, "wb")
+        self._part_is_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        chunk = memoryview(data)[start:end]
+        if self._part_is_file:
+            self._digest.update(chunk)
+            self._file.write(chunk)
+            self.size += len(chunk)
+        else:
+            if len(self._field_value) + len(chunk) > UPLOAD_MAX_FIELD_BYTES:
+                raise UploadError(f"Form field '{self._part_name}' is larger than {UPLOAD_MAX_FIELD_BYTES} bytes.")
+            self._field_value += chunk
+
+    def _on_part_end(self):
+        if self._part_is_file:
+            self._file.close()
+            self._file = None
+        elif self._part_name:
+            self.fields[self._part_name] = self._field_value.decode("utf-8", "replace")
+
+
+async def receive_upload(request: Request, open_file: typing.Callable[[str], str], file_field: str = "file",
+                         validate_filename: typing.Callable[[str], None] | None = None) -> ReceivedUpload:
+    """
+    Streams a multipart/form-data request body straight to disk: the `file_field` part is
+    written to the path returned by `open_file(filename)` and hashed as it arrives, so the
+    upload is written once and never spooled. `validate_filename` runs before any file data
+    is written and may raise to reject the upload. Other fields are returned as strings.
+    The file is deleted if the request fails; otherwise the caller owns it.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError("Uploads must be sent as multipart/form-data.")
+
+    receiver = _MultipartFileReceiver(boundary, file_field, open_file, validate_filename)
+    try:
+        batch, batch_bytes = [], 0
+        async for chunk in request.stream():
+            batch.append(chunk)
+            batch_bytes += len(chunk)
+            if batch_bytes >= UPLOAD_WRITE_BATCH_BYTES:
+                await run_in_threadpool(receiver.write, b"".join(batch))
+                batch, batch_bytes = [], 0
+        if batch:
+            await run_in_threadpool(receiver.write, b"".join(batch))
+        upload = await run_in_threadpool(receiver.finish)
+    except BaseException:
+        receiver.discard()
+        raise
+    logger.info("upload_received", filename=upload.filename, size_bytes=upload.size, content_hash=upload.content_hash)
+    return upload
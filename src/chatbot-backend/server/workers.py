@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+import duckdb
+import structlog
+
+logger = structlog.get_logger()
+
+DB_QUERY_WORKERS = int(os.getenv("DB_QUERY_WORKERS", "4"))
+DB_QUERY_MAX_PENDING = int(os.getenv("DB_QUERY_MAX_PENDING", "32"))
+LOG_PARSE_WORKERS = int(os.getenv("LOG_PARSE_WORKERS", "2"))
+LOG_PARSE_MAX_PENDING = int(os.getenv("LOG_PARSE_MAX_PENDING", "4"))
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a worker pool already has its maximum number of queued and running tasks."""
+
+
+class WorkerPool:
+    """An executor wrapper that rejects new work once `max_pending` tasks are queued or running."""
+    def __init__(self, name: str, executor: Executor, max_pending: int):
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                logger.warning("worker_pool_saturated", pool=self.name, pending=self.pending, max_pending=self.max_pending)
+                raise PoolSaturatedError(f"The {self.name} pool is busy; please retry shortly.")
+            self.pending += 1
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, _future):
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs `fn` on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+
+_thread_state = threading.local()
+
+
+def _init_db_worker(conn: duckdb.DuckDBPyConnection, setup_cursor: Callable[[duckdb.DuckDBPyConnection], None] | None):
+    # One cursor per worker thread; cursors are cheap but must not be shared across threads.
+    _thread_state.cursor = conn.cursor()
+    if setup_cursor is not None:
+        setup_cursor(_thread_state.cursor)
+
+
+def get_worker_cursor() -> duckdb.DuckDBPyConnection:
+    """Returns the DuckDB cursor owned by the current db pool worker thread."""
+    return _thread_state.cursor
+
+
+def use_log(cursor: duckdb.DuckDBPyConnection, log_id: str, catalogs: list[str] | None = None):
+    """
+    Points `cursor` at one log's tables. Unqualified table names are resolved in
+    `catalogs` (default: just the log's own catalog).
+    """
+    cursor.execute(f'USE "{log_id}"')
+    if catalogs and len(catalogs) > 1:
+        search_path = ",".join(f'"{catalog}".main' for catalog in catalogs)
+        cursor.execute(f"SET search_path = '{search_path}'")
+
+
+def create_db_pool(conn: duckdb.DuckDBPyConnection,
+                   setup_cursor: Callable[[duckdb.DuckDBPyConnection], None] | None = None) -> WorkerPool:
+    """`setup_cursor(cursor)` runs once on each worker's cursor, e.g. to define temporary macros."""
+    executor = ThreadPoolExecutor(max_workers=DB_QUERY_WORKERS, thread_name_prefix="duckdb",
+                                  initializer=_init_db_worker, initargs=(conn, setup_cursor))
+    return WorkerPool("database", executor, DB_QUERY_MAX_PENDING)
+
+
+def create_parse_pool() -> WorkerPool:
+    # Spawned workers avoid inheriting the server's threads and open DuckDB handles.
+    executor = ProcessPoolExecutor(max_workers=LOG_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return WorkerPool("log parsing", executor, LOG_PARSE_MAX_PENDING)
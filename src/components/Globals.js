@@ -69,5 +69,6 @@ export const store = {
     chatHistory: [], // Array of { sender: 'user' | 'bot', text: string }
     chatLoading: false,
     chatInput: '',
+    chatSessionId: null, // Backend session id returned by /api/upload_log/
     backendApiUrl: process.env.VUE_APP_API_URL || 'http://localhost:8000'
 }